@@ -1,49 +1,32 @@
+from datetime import datetime
+
 import streamlit as st
-from services.fpl_client import FPLClient
-from services.prediction import add_predicted_scores
-from services.optimize_team import pick_best_xi
 from ui.player_modal import show_player_modal
-from utils.team_names import TEAM_NAMES
-from utils.fixture_difficulty import TEAM_FDR
 from services.captaincy_optimizer_ui import display_captaincy_optimizer
 from ui.best_xi_pitch import display_best_xi_pitch
-from services.ml_predictor import predict_player_score
 from ui.shap_tab import display_shap_tab
 from ui.uncertainty_tab import display_uncertainty_tab
-
-# Position mapping
-POSITION_MAP = {1: "GK", 2: "DEF", 3: "MID", 4: "FWD"}
+from services.snapshot import get_snapshot
+from rag.news import get_default_news_store, join_sentiment
 
 st.title("FPL Predictor")
 
 # ----------------------------
-# Load and prepare all data
-# ----------------------------
-client = FPLClient()
-df = client.get_players_df()
-
-df["pos"] = df["position"].map(POSITION_MAP)
-##df = add_predicted_scores(df)
-df["predicted_score"] = df.apply(lambda row: predict_player_score(row), axis=1)
-
-
-df["next_opponent_name"] = df["next_opponent"].map(TEAM_NAMES)
-df["fixture_difficulty"] = df["next_opponent"].map(TEAM_FDR).fillna(3)
-
-df["fixture_label"] = df["fixture_difficulty"].apply(
-    lambda x: "Easy" if x <= 2 else "Medium" if x == 3 else "Hard"
-)
-
-# ----------------------------
-# Compute Best XI **before** navigation
+# Load the gameweek snapshot
 # ----------------------------
-best_xi = pick_best_xi(df)
+# Prewarmed by services/prewarm.py when the worker runs; otherwise
+# built once per gameweek / model version and shared by every session
+snapshot = get_snapshot()
+# Prefetched news sentiment (services/news_prefetch.py), neutral if absent
+df = join_sentiment(snapshot.players, get_default_news_store().load_table())
+best_xi = snapshot.best_xi
 player_row = None
 
 # ----------------------------
 # Sidebar Navigation
 # ----------------------------
 st.sidebar.title("Navigation")
+st.sidebar.caption(f"Data as of {datetime.fromtimestamp(snapshot.built_at):%Y-%m-%d %H:%M}")
 page = st.sidebar.radio(
     "Select a Page",
     ["Player Overview", "Captaincy Optimizer", "Best XI Pitch", "SHAP Explainability", "Prediction Uncertainty"]
@@ -70,18 +53,18 @@ if page == "Player Overview":
 # PAGE 2: Captaincy Optimizer
 # ----------------------------
 elif page == "Captaincy Optimizer":
-    display_captaincy_optimizer(df)
+    display_captaincy_optimizer(df, snapshot.simulation)
 
 # ----------------------------
 # PAGE 3: Best XI Pitch
 # ----------------------------
 elif page == "Best XI Pitch":
-    display_best_xi_pitch(best_xi)
+    display_best_xi_pitch(best_xi, snapshot.squad_simulation)
 
 elif page == "SHAP Explainability":
 
 
-    display_shap_tab(df)
+    display_shap_tab(df, snapshot.gameweek, snapshot.contributions)
 
 elif page == "Prediction Uncertainty":
-    display_uncertainty_tab(df)
+    display_uncertainty_tab(df, snapshot.simulation)
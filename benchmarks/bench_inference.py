@@ -0,0 +1,48 @@
+# benchmarks/bench_inference.py
+#
+# Compares the XGBoost and flattened NumPy inference backends.
+# Run from the repo root: python -m benchmarks.bench_inference
+
+import argparse
+import time
+
+import numpy as np
+
+from data.storage import load_training_dataset
+from services.ml_predictor import _predict_matrix
+from utils.feature_engineering import FEATURES
+
+
+def time_call(fn, repeats):
+    """Median wall time of `fn` in milliseconds."""
+    fn()  # warm-up (model load, engine build)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inference backends.")
+    parser.add_argument("--batch-sizes", type=int, nargs="*", default=[1, 10, 700])
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    pool = load_training_dataset(columns=FEATURES)[FEATURES].astype(float)
+    rng = np.random.default_rng(0)
+
+    print(f"{'batch':>6} {'xgboost ms':>11} {'numpy ms':>9} {'speedup':>8} {'max |diff|':>11}")
+    for n in args.batch_sizes:
+        X = pool.iloc[rng.choice(len(pool), size=n, replace=False)].reset_index(drop=True)
+
+        xgb_ms = time_call(lambda: _predict_matrix(X, "xgboost"), args.repeats)
+        np_ms = time_call(lambda: _predict_matrix(X, "numpy"), args.repeats)
+        diff = np.abs(_predict_matrix(X, "xgboost") - _predict_matrix(X, "numpy")).max()
+
+        print(f"{n:>6} {xgb_ms:>11.3f} {np_ms:>9.3f} {xgb_ms / np_ms:>7.1f}x {diff:>11.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# benchmarks/bench_sentiment.py
+#
+# Headline sentiment throughput (headlines per second) on synthetic
+# headlines: the lexicon model one headline at a time vs one batch, and
+# the memoized HeadlineScorer with a cold store, a warm in-memory memo
+# and a warm on-disk store (a new session).
+# Deterministic; run from the repo root: python -m benchmarks.bench_sentiment
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from rag.sentiment import HeadlineScorer, LexiconSentimentModel, SentimentStore
+
+NAMES = ["Salah", "Haaland", "Palmer", "Saka", "Isak", "Watkins", "Son", "Gordon"]
+TEMPLATES = [
+    "{name} ruled out of {club} clash with hamstring injury",
+    "{name} scores brace as {club} cruise to victory",
+    "{name} back in training ahead of {club} trip",
+    "{club} boss gives update on {name} fitness concern",
+    "{name} not ruled out despite knock against {club}",
+    "Five things we learned from {club} v {name}'s old side",
+    "{name} hat-trick inspires {club} comeback",
+    "{name} dropped as {club} rotate for cup tie",
+]
+CLUBS = ["Arsenal", "Chelsea", "Liverpool", "Spurs", "Villa", "Newcastle", "Brighton", "Fulham"]
+
+
+def synthetic_headlines(n, seed=0):
+    """n distinct headlines (a round counter keeps them unique)."""
+    rng = np.random.default_rng(seed)
+    t, p, c = (rng.integers(0, len(x), size=n) for x in (TEMPLATES, NAMES, CLUBS))
+    return [
+        TEMPLATES[t[i]].format(name=NAMES[p[i]], club=CLUBS[c[i]]) + f" (GW{i})"
+        for i in range(n)
+    ]
+
+
+def rate(fn, n):
+    start = time.perf_counter()
+    fn()
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark headline sentiment scoring.")
+    parser.add_argument("--headlines", type=int, default=50_000)
+    parser.add_argument("--single", type=int, default=5_000, help="headlines scored one at a time")
+    args = parser.parse_args()
+
+    headlines = synthetic_headlines(args.headlines)
+    model = LexiconSentimentModel()
+    model.score(headlines[:10])  # warm-up
+
+    rows = [
+        ("model, one at a time", rate(lambda: [model.score([h]) for h in headlines[:args.single]], args.single)),
+        ("model, one batch", rate(lambda: model.score(headlines), len(headlines))),
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        scorer = HeadlineScorer(model, SentimentStore(directory))
+        rows.append(("scorer, cold store", rate(lambda: scorer.score(headlines), len(headlines))))
+        rows.append(("scorer, warm memo", rate(lambda: scorer.score(headlines), len(headlines))))
+
+        session = HeadlineScorer(model, SentimentStore(directory))
+        rows.append(("scorer, warm store", rate(lambda: session.score(headlines), len(headlines))))
+        assert session.score(headlines) == scorer.score(headlines)
+
+    print(f"{len(headlines)} headlines\n")
+    print(f"{'path':<22} {'headlines/s':>12}")
+    for name, per_second in rows:
+        print(f"{name:<22} {per_second:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
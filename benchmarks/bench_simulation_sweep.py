@@ -0,0 +1,48 @@
+# benchmarks/bench_simulation_sweep.py
+#
+# Scaling of the process-pool simulation sweep from 1 to N workers, and a
+# check that every worker count produces identical results.
+# Run from the repo root: python -m benchmarks.bench_simulation_sweep
+
+import argparse
+import os
+import time
+
+from benchmarks.bench_streaming_simulation import synthetic_pool
+from services.simulation_sweep import run_sweep, scenario_grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the simulation sweep.")
+    parser.add_argument("--players", type=int, default=700)
+    parser.add_argument("--gameweeks", type=int, default=4)
+    parser.add_argument("--n-sims", type=int, default=10000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    frames = {gw: synthetic_pool(args.players, seed=gw) for gw in range(args.gameweeks)}
+    scenarios = scenario_grid(
+        gameweeks=list(frames),
+        explosiveness=(0.2, 0.4, 0.6),
+        base_stdev_scales=(0.8, 1.0, 1.2),
+        n_sims=(args.n_sims,),
+    )
+    print(f"{len(scenarios)} scenarios × {args.players} players × {args.n_sims} sims")
+
+    counts = sorted({1, 2, 4, 8, args.max_workers} & set(range(1, args.max_workers + 1)))
+    baseline = reference = None
+
+    print(f"{'workers':>8} {'seconds':>8} {'speedup':>8} {'identical':>10}")
+    for workers in counts:
+        start = time.perf_counter()
+        result = run_sweep(frames, scenarios, seed=42, workers=workers)
+        elapsed = time.perf_counter() - start
+
+        if reference is None:
+            baseline, reference = elapsed, result
+        identical = result.equals(reference)
+        print(f"{workers:>8} {elapsed:>8.2f} {baseline / elapsed:>7.2f}x {str(identical):>10}")
+
+
+if __name__ == "__main__":
+    main()
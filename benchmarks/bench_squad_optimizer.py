@@ -0,0 +1,130 @@
+# benchmarks/bench_squad_optimizer.py
+#
+# Greedy vs exact Best XI: predicted points, cost and wall time on
+# synthetic player pools (20 clubs, FPL-like price/score relationship).
+# Run from the repo root: python -m benchmarks.bench_squad_optimizer
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from services.optimize_team import greedy_best_xi
+from services.player_index import PlayerIndex
+from services.squad_optimizer import solve_index, solve_squad, squad_model
+
+# Rough share of the pool per position (GK, DEF, MID, FWD)
+POSITION_SHARE = [0.1, 0.33, 0.4, 0.17]
+BASE_PRICE = {1: 4.0, 2: 4.0, 3: 4.5, 4: 4.5}
+
+# The greedy's composition (1 GK, 3 DEF, 3 MID, 1 FWD + flex) as XI rules
+GREEDY_RULES = {"GK": (1, 2), "DEF": (3, 6), "MID": (3, 6), "FWD": (1, 4)}
+
+
+def synthetic_pool(n_players, seed=0):
+    rng = np.random.default_rng(seed)
+    position = rng.choice([1, 2, 3, 4], n_players, p=POSITION_SHARE)
+    quality = rng.gamma(2.0, 1.0, n_players)
+    base = np.array([BASE_PRICE[p] for p in position])
+    # Price tracks quality, with noise so that value picks exist
+    now_cost = np.round(base + 0.9 * quality + rng.normal(0, 0.5, n_players), 1).clip(base)
+    return pd.DataFrame({
+        "id": np.arange(1, n_players + 1),
+        "web_name": [f"Player {i}" for i in range(n_players)],
+        "position": position,
+        "team": rng.integers(1, 21, n_players),
+        "now_cost": now_cost,
+        "predicted_score": (quality * 2.2 + rng.normal(0, 0.8, n_players)).clip(0),
+    })
+
+
+def timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - start
+
+
+def what_if_queries(pool, n_queries, seed=0):
+    """(exclude, lock, budget) queries around the top of the pool."""
+    rng = np.random.default_rng(seed)
+    top = pool.sort_values("predicted_score", ascending=False)["id"].to_numpy()[:60]
+    for _ in range(n_queries):
+        picks = rng.choice(top, 3, replace=False)
+        yield picks[:2], picks[2:], round(float(rng.uniform(90, 100)), 1)
+
+
+def what_if_rates(pool, n_greedy, n_exact):
+    """
+    Queries per second against one PlayerIndex vs a fresh DataFrame pass.
+    The exact model is built once (timed separately) and each query only
+    changes its bounds and budget.
+    """
+    index, build = timed(lambda: PlayerIndex.from_frame(pool))
+    _, model_build = timed(lambda: squad_model(index))
+
+    _, t_frame = timed(lambda: [greedy_best_xi(pool) for _ in range(n_exact)])
+    queries = list(what_if_queries(pool, n_greedy))
+    _, t_greedy = timed(lambda: [index.greedy_xi(budget, exclude, lock) for exclude, lock, budget in queries])
+    _, t_exact = timed(lambda: [
+        solve_index(index, budget, exclude=exclude, lock=lock)
+        for exclude, lock, budget in queries[:n_exact]
+    ])
+    return {
+        "index_build_ms": 1000 * build,
+        "exact_model_build_ms": 1000 * model_build,
+        "greedy_frame_per_s": n_exact / t_frame,
+        "greedy_index_per_s": n_greedy / t_greedy,
+        "exact_index_per_s": n_exact / t_exact,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--players", type=int, default=700)
+    parser.add_argument("--pools", type=int, default=5)
+    parser.add_argument("--what-if", type=int, default=1000, help="greedy what-if queries")
+    parser.add_argument("--what-if-exact", type=int, default=50, help="exact what-if queries")
+    args = parser.parse_args()
+
+    rows = []
+    for seed in range(args.pools):
+        pool = synthetic_pool(args.players, seed)
+
+        greedy, t_greedy = timed(lambda: greedy_best_xi(pool))
+        # Same problem the greedy solves (11 players, budget on the XI)
+        xi, t_xi = timed(lambda: solve_squad(pool, squad_quota=None, xi_rules=GREEDY_RULES))
+        # Full problem: 15-man squad, formation rules, budget on the squad
+        squad, t_squad = timed(lambda: solve_squad(pool))
+        starters = squad[squad["starting"]]
+
+        rows.append({
+            "pool": seed,
+            "greedy_size": len(greedy),
+            "greedy_pts": greedy["predicted_score"].sum(),
+            "exact_xi_pts": xi["predicted_score"].sum(),
+            "squad_xi_pts": starters["predicted_score"].sum(),
+            "greedy_cost": greedy["now_cost"].sum(),
+            "squad_cost": squad["now_cost"].sum(),
+            "greedy_ms": 1000 * t_greedy,
+            "exact_xi_ms": 1000 * t_xi,
+            "squad_ms": 1000 * t_squad,
+        })
+
+    table = pd.DataFrame(rows).set_index("pool")
+    # The greedy reserves budget for its remaining slots, but club limits
+    # can still leave it short; only compare points for full XIs
+    valid = table["greedy_size"] == 11
+    table["xi_gain_%"] = (100 * (table["exact_xi_pts"] / table["greedy_pts"] - 1)).where(valid)
+    print(f"{args.players} players per pool, greedy full XI in {valid.sum()}/{len(table)} pools\n")
+    print(table.round(2).to_string())
+    print("\nmean:")
+    print(table.mean().round(2).to_string())
+
+    rates = what_if_rates(synthetic_pool(args.players), args.what_if, args.what_if_exact)
+    print("\nwhat-if queries (exclude 2, lock 1, budget 90-100):")
+    print(pd.Series(rates).round(1).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# benchmarks/bench_streaming_simulation.py
+#
+# Peak memory / wall time of exact vs streaming simulation, plus the
+# streaming sketch accuracy against exact statistics on the same draws.
+# Run from the repo root: python -m benchmarks.bench_streaming_simulation
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from services.simulation import (
+    simulate_players,
+    simulate_players_streaming,
+    streaming_accuracy,
+)
+
+POSITIONS = np.array(["GK", "DEF", "MID", "FWD"])
+
+
+def synthetic_pool(n_players, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "id": np.arange(1, n_players + 1),
+        "web_name": [f"Player {i}" for i in range(n_players)],
+        "pos": POSITIONS[rng.integers(0, 4, n_players)],
+        "xGI": rng.gamma(1.5, 1.0, n_players),
+        "predicted_score": rng.gamma(2.0, 1.6, n_players),
+    })
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return wall, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming simulation.")
+    parser.add_argument("--players", type=int, default=700)
+    parser.add_argument("--sims", type=int, nargs="*", default=[10000, 50000, 100000])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    df = synthetic_pool(args.players)
+
+    print(f"{'n_sims':>8} {'exact s':>8} {'exact MB':>9} {'stream s':>9} {'stream MB':>10}")
+    for n in args.sims:
+        exact_s, exact_mb = measure(lambda: simulate_players(df, n_sims=n, seed=0))
+        stream_s, stream_mb = measure(
+            lambda: simulate_players_streaming(df, n_sims=n, chunk_size=args.chunk_size, seed=0)
+        )
+        print(f"{n:>8} {exact_s:>8.2f} {exact_mb:>9.1f} {stream_s:>9.2f} {stream_mb:>10.1f}")
+
+    print("\nStreaming accuracy vs exact statistics (same draws):")
+    print(streaming_accuracy(df, n_sims=20000, chunk_size=args.chunk_size).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
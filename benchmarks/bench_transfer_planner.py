@@ -0,0 +1,133 @@
+# benchmarks/bench_transfer_planner.py
+#
+# Rolling transfer-planning backtest on the bundled data/fpl_raw_history.csv:
+# each gameweek the squad is re-planned from the predictions available at
+# that point, the first week of the plan is executed, and the XI picked by
+# predicted points is scored with the actual points. Compares holding the
+# squad, one-week-ahead planning and the multi-gameweek planner.
+# Deterministic; run from the repo root: python -m benchmarks.bench_transfer_planner
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from data.storage import RAW_HISTORY_CSV
+from services.ml_predictor import predict_horizon
+from services.squad_optimizer import BUDGET, solve_squad
+from services.transfer_planner import HIT_COST, MAX_FREE_TRANSFERS, plan_transfers, starting_xi
+from utils.feature_engineering import FORM_WINDOW, XGI_WINDOW
+
+STAT_COLUMNS = ["minutes", "xG", "xA", "xGI", "ict_index"]
+
+# The history has no prices: derive them once from points per match
+# before the backtest starts (FPL-like range per position)
+BASE_PRICE = {1: 4.0, 2: 4.0, 3: 4.5, 4: 4.5}
+MAX_PRICE = 13.0
+PRICE_PER_POINT = 1.1
+
+
+def player_state(history, before_round):
+    """One feature row per player from the matches before `before_round`."""
+    past = history[history["round"] < before_round].sort_values(["player_id", "round"])
+    grouped = past.groupby("player_id")
+    state = grouped[STAT_COLUMNS].mean()
+    last = grouped[["web_name", "position", "team", "team_strength"]].last()
+    state = state.join(last)
+    state["rolling_form"] = grouped["total_points"].apply(lambda s: s.tail(FORM_WINDOW).mean())
+    state["rolling_xgi"] = grouped["xGI"].apply(lambda s: s.tail(XGI_WINDOW).mean())
+    state["form"] = state["rolling_form"]
+    return state.rename_axis("id").reset_index()
+
+
+def prices(history, before_round):
+    past = history[history["round"] < before_round]
+    per_match = past.groupby("player_id").agg(points=("total_points", "mean"), position=("position", "last"))
+    base = per_match["position"].map(BASE_PRICE)
+    price = (base + PRICE_PER_POINT * per_match["points"].clip(lower=0)).clip(upper=MAX_PRICE)
+    return price.round(1).rename("now_cost")
+
+
+def fixtures_from(history, first_round, last_round):
+    rows = history[history["round"].between(first_round, last_round)]
+    return pd.DataFrame({
+        "id": rows["player_id"].to_numpy(),
+        "event": rows["round"].to_numpy(),
+        "opponent": rows["opponent_team"].to_numpy(),
+        "is_home": rows["was_home"].astype(bool).to_numpy(),
+    })
+
+
+def actual_points(history, week):
+    rows = history[history["round"] == week]
+    return rows.set_index("player_id")["total_points"]
+
+
+def backtest(history, cost, start, weeks, horizon, strategy):
+    last_round = int(history["round"].max())
+    squad, bank, free = None, 0.0, 1
+    realized, predicted, hits, plan_seconds = 0.0, 0.0, 0, []
+
+    for week in range(start, start + weeks):
+        state = player_state(history, week).merge(cost, left_on="id", right_index=True)
+        end = min(week + horizon - 1, last_round)
+        points = predict_horizon(state, fixtures_from(history, week, end))
+        points = points.reindex(columns=range(week, end + 1), fill_value=0.0)
+
+        if squad is None:
+            initial = solve_squad(state.assign(predicted_score=points[week].to_numpy()))
+            squad = initial["id"].tolist()
+            bank = round(BUDGET - initial["now_cost"].sum(), 1)
+
+        if strategy != "hold":
+            started = time.perf_counter()
+            result = plan_transfers(state, points, squad, bank=bank, free_transfers=free,
+                                    horizon=1 if strategy == "one-week" else horizon)
+            plan_seconds.append(time.perf_counter() - started)
+            first = result["plan"].iloc[0]
+            squad, bank = result["squads"][0], first["bank"]
+            n = len(first["transfers_in"])
+            hits += first["hits"]
+            realized -= HIT_COST * first["hits"]
+            predicted -= HIT_COST * first["hits"]
+            free = min(max(free - n, 0) + 1, MAX_FREE_TRANSFERS)
+
+        # Squad in position blocks, XI and captain picked by prediction
+        ordered = state.set_index("id").loc[squad].sort_values("position", kind="stable").index
+        expected = points.loc[ordered, week].to_numpy()
+        starters, captain = starting_xi(expected)
+        scored = actual_points(history, week).reindex(ordered, fill_value=0).to_numpy()
+        realized += scored[starters].sum() + scored[captain]
+        predicted += expected[starters].sum() + expected[captain]
+
+    return {
+        "strategy": strategy,
+        "predicted_points": predicted,
+        "realized_points": realized,
+        "hits": hits,
+        "mean_plan_ms": 1000 * np.mean(plan_seconds) if plan_seconds else 0.0,
+        "max_plan_ms": 1000 * np.max(plan_seconds) if plan_seconds else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--start", type=int, default=6, help="first gameweek played")
+    parser.add_argument("--weeks", type=int, default=8, help="gameweeks played")
+    parser.add_argument("--horizon", type=int, default=8)
+    args = parser.parse_args()
+
+    history = pd.read_csv(RAW_HISTORY_CSV)
+    cost = prices(history, args.start)
+
+    rows = [
+        backtest(history, cost, args.start, args.weeks, args.horizon, strategy)
+        for strategy in ("hold", "one-week", f"{args.horizon}-week")
+    ]
+    print(f"Gameweeks {args.start}-{args.start + args.weeks - 1}, planning horizon {args.horizon}\n")
+    print(pd.DataFrame(rows).set_index("strategy").round(1).to_string())
+
+
+if __name__ == "__main__":
+    main()
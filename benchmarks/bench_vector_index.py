@@ -0,0 +1,132 @@
+# benchmarks/bench_vector_index.py
+#
+# In-process VectorIndex (float32 and int8) vs Chroma on a synthetic
+# clustered corpus of unit vectors: open time, k=3 query latency,
+# vector memory and recall@k against exact float32 search. Embeddings
+# are precomputed, so neither side pays for the embedding model.
+# Chroma is skipped if chromadb is not installed.
+# Deterministic; run from the repo root: python -m benchmarks.bench_vector_index
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from rag.vector_index import VectorIndex
+
+
+def synthetic_corpus(n, dim, clusters=64, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(0, clusters, size=n)] + 0.5 * rng.normal(size=(n, dim))
+    return vectors.astype(np.float32)
+
+
+def rss_mb():
+    """Resident memory of this process in MB (Linux), or nan."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return float("nan")
+
+
+def latency_ms(search, queries):
+    times = []
+    for q in queries:
+        start = time.perf_counter()
+        search(q)
+        times.append(time.perf_counter() - start)
+    return 1000 * float(np.median(times)), 1000 * float(np.percentile(times, 95))
+
+
+def bench_index(vectors, queries, truth, k, quantize_int8, directory):
+    texts = [f"chunk {i}" for i in range(len(vectors))]
+    VectorIndex.from_vectors(vectors, texts, quantize_int8=quantize_int8).save(directory)
+
+    before = rss_mb()
+    start = time.perf_counter()
+    index = VectorIndex.load(directory)
+    open_s = time.perf_counter() - start
+
+    p50, p95 = latency_ms(lambda q: index.search(q, k), queries)
+    hits = [{i for i, _ in index.search(q, k)} for q in queries]
+    return {
+        "backend": "index int8" if quantize_int8 else "index float32",
+        "open_ms": 1000 * open_s,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "vector_mb": index.nbytes / 2**20,
+        "rss_delta_mb": rss_mb() - before,
+        "recall": np.mean([len(h & t) / k for h, t in zip(hits, truth)]),
+    }
+
+
+def bench_chroma(vectors, queries, truth, k, directory, batch=5000):
+    try:
+        import chromadb
+    except ImportError:
+        return None
+
+    client = chromadb.PersistentClient(path=directory)
+    collection = client.create_collection("bench", metadata={"hnsw:space": "cosine"})
+    for start in range(0, len(vectors), batch):
+        rows = range(start, min(start + batch, len(vectors)))
+        collection.add(ids=[str(i) for i in rows], embeddings=vectors[rows.start:rows.stop].tolist(),
+                       documents=[f"chunk {i}" for i in rows])
+    del collection, client
+
+    before = rss_mb()
+    start = time.perf_counter()
+    collection = chromadb.PersistentClient(path=directory).get_collection("bench")
+    collection.query(query_embeddings=[queries[0].tolist()], n_results=k)  # loads the HNSW index
+    open_s = time.perf_counter() - start
+
+    search = lambda q: collection.query(query_embeddings=[q.tolist()], n_results=k)  # noqa: E731
+    p50, p95 = latency_ms(search, queries)
+    hits = [{int(i) for i in search(q)["ids"][0]} for q in queries]
+    return {
+        "backend": "chroma",
+        "open_ms": 1000 * open_s,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "vector_mb": vectors.nbytes / 2**20,
+        "rss_delta_mb": rss_mb() - before,
+        "recall": np.mean([len(h & t) / k for h, t in zip(hits, truth)]),
+    }
+
+
+def main():
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Benchmark the in-process vector index against Chroma.")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=384, help="all-MiniLM-L6-v2 dimension")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        vectors = synthetic_corpus(n, args.dim)
+        queries = synthetic_corpus(args.queries, args.dim, seed=1)
+        exact = VectorIndex.from_vectors(vectors, [""] * n)
+        truth = [{i for i, _ in exact.search(q, args.k)} for q in queries]
+
+        rows = []
+        with tempfile.TemporaryDirectory() as directory:
+            for quantize_int8 in (False, True):
+                rows.append(bench_index(vectors, queries, truth, args.k, quantize_int8,
+                                        os.path.join(directory, f"index-{quantize_int8}")))
+            chroma = bench_chroma(vectors, queries, truth, args.k, os.path.join(directory, "chroma"))
+        if chroma is not None:
+            rows.append(chroma)
+
+        print(f"\n{n} vectors, dim {args.dim}, k={args.k}"
+              + ("" if chroma is not None else " (chromadb not installed, Chroma skipped)"))
+        print(pd.DataFrame(rows).set_index("backend").round(3).to_string())
+
+
+if __name__ == "__main__":
+    main()
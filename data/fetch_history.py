@@ -1,39 +1,371 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+from pathlib import Path
+
+import aiohttp
 import pandas as pd
-import requests
 
-def load_fpl_history():
+from data.storage import (
+    DEFAULT_SEASON,
+    RAW_HISTORY_DIR,
+    RAW_HISTORY_DTYPES,
+    has_store,
+    pyarrow_available,
+    season_from_bootstrap,
+    write_partitioned,
+)
+
+API_URL = "https://fantasy.premierleague.com/api"
+
+DATA_DIR = Path(__file__).resolve().parent
+RAW_HISTORY_PATH = DATA_DIR / "fpl_raw_history.csv"
+CHECKPOINT_PATH = DATA_DIR / "fpl_raw_history.checkpoint.jsonl"
+
+# Status codes worth retrying (rate limiting + transient server errors)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def history_rows(p, history):
+    """
+    Flattens one player's element-summary history into training rows.
+    """
+    rows = []
+    for gw in history:
+        rows.append({
+            "player_id": p["id"],
+            "web_name": p["web_name"],
+            "position": p["element_type"],
+            "team": p["team"],
+            "round": gw["round"],
+            "total_points": gw["total_points"],         # LABEL
+            "minutes": gw["minutes"],
+            "xG": gw.get("expected_goals", 0),
+            "xA": gw.get("expected_assists", 0),
+            "xGI": gw.get("expected_goal_involvements", 0),
+            "ict_index": gw["ict_index"],
+            "was_home": gw["was_home"],
+            "opponent_team": gw["opponent_team"],
+            "team_strength": p["team"],
+        })
+    return rows
+
+
+async def fetch_json(session, url, retries=3, backoff=0.5):
+    """
+    GET a JSON payload, retrying transient failures with exponential
+    backoff (plus jitter). Non-retryable HTTP errors are raised at once.
+    """
+    for attempt in range(retries + 1):
+        try:
+            async with session.get(url) as resp:
+                if resp.status in RETRY_STATUSES and attempt < retries:
+                    raise aiohttp.ClientResponseError(
+                        resp.request_info, resp.history, status=resp.status
+                    )
+                resp.raise_for_status()
+                return await resp.json(content_type=None)
+
+        except aiohttp.ClientResponseError as e:
+            if e.status not in RETRY_STATUSES or attempt == retries:
+                raise
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if attempt == retries:
+                raise
+
+        await asyncio.sleep(backoff * (2 ** attempt) * (1 + random.random()))
+
+
+def load_checkpoint(path, key=None):
+    """
+    Rows already fetched by an interrupted run, keyed by player id.
+    The checkpoint's first line records the `key` (season and last
+    finished round) it was written for; a checkpoint for another key
+    is stale and ignored.
+    """
+    done = {}
+    if path is None or not os.path.exists(path):
+        return done
+
+    stored_key = None
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Partially written last line from a killed run
+                continue
+            if "player_id" not in entry:
+                stored_key = entry.get("key")
+                continue
+            done[entry["player_id"]] = entry["rows"]
+    return done if stored_key == key else {}
+
+
+async def fetch_histories_async(
+    players,
+    base_url=API_URL,
+    concurrency=16,
+    retries=3,
+    backoff=0.5,
+    checkpoint_path=CHECKPOINT_PATH,
+    timeout=30,
+    checkpoint_key=None,
+):
+    """
+    Fetches element-summary history for `players` over one shared
+    connection pool, at most `concurrency` requests in flight.
+    Each finished player is appended to the checkpoint file, so a
+    rerun after an interruption (with the same `checkpoint_key`) only
+    fetches the missing players.
+    Returns {player_id: rows}.
+    """
+    results = load_checkpoint(checkpoint_path, checkpoint_key)
+    pending = [p for p in players if p["id"] not in results]
+
+    if not pending:
+        return results
+
+    sem = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+    checkpoint = None
+    if checkpoint_path is not None:
+        # Nothing reusable: start over, replacing any stale checkpoint
+        checkpoint = open(checkpoint_path, "a" if results else "w")
+        if not results:
+            checkpoint.write(json.dumps({"key": checkpoint_key}) + "\n")
+    try:
+        async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+
+            async def one(p):
+                async with sem:
+                    summary = await fetch_json(
+                        session,
+                        f"{base_url}/element-summary/{p['id']}/",
+                        retries=retries,
+                        backoff=backoff,
+                    )
+
+                rows = history_rows(p, summary.get("history", []))
+                results[p["id"]] = rows
+
+                if checkpoint is not None:
+                    checkpoint.write(json.dumps({"player_id": p["id"], "rows": rows}) + "\n")
+                    checkpoint.flush()
+
+            # Let every player finish (or fail) so successes are checkpointed
+            outcomes = await asyncio.gather(
+                *(one(p) for p in pending), return_exceptions=True
+            )
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+
+    errors = [o for o in outcomes if isinstance(o, BaseException)]
+    if errors:
+        raise RuntimeError(
+            f"{len(errors)} of {len(pending)} players failed; rerun to resume"
+        ) from errors[0]
+
+    return results
+
+
+async def fetch_bootstrap_async(base_url=API_URL, retries=3, backoff=0.5, timeout=30):
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    async with aiohttp.ClientSession(timeout=client_timeout) as session:
+        return await fetch_json(
+            session, f"{base_url}/bootstrap-static/", retries=retries, backoff=backoff
+        )
+
+
+def load_fpl_history(
+    output_path=RAW_HISTORY_PATH,
+    base_url=API_URL,
+    concurrency=16,
+    retries=3,
+    backoff=0.5,
+    checkpoint_path=CHECKPOINT_PATH,
+    store_dir=RAW_HISTORY_DIR,
+):
     """
     Downloads all available FPL history for every player from the official API.
-    Produces a clean training dataset ready for ML.
+    Produces a clean training dataset ready for ML: a season/round
+    partitioned columnar store (if pyarrow is installed) plus a CSV export.
+    Only finished gameweeks are stored, as in update_fpl_history.
     """
-    bootstrap = requests.get("https://fantasy.premierleague.com/api/bootstrap-static/").json()
+    bootstrap = asyncio.run(
+        fetch_bootstrap_async(base_url, retries=retries, backoff=backoff)
+    )
     players = bootstrap["elements"]
+    season = season_from_bootstrap(bootstrap)
+    finished = last_finished_round(bootstrap)
 
-    rows = []
+    results = asyncio.run(fetch_histories_async(
+        players,
+        base_url=base_url,
+        concurrency=concurrency,
+        retries=retries,
+        backoff=backoff,
+        checkpoint_path=checkpoint_path,
+        checkpoint_key=checkpoint_key(season, finished),
+    ))
 
-    for p in players:
-        history = requests.get(f"https://fantasy.premierleague.com/api/element-summary/{p['id']}/").json()["history"]
-
-        for gw in history:
-            rows.append({
-                "player_id": p["id"],
-                "web_name": p["web_name"],
-                "position": p["element_type"],
-                "team": p["team"],
-                "round": gw["round"],
-                "total_points": gw["total_points"],         # LABEL
-                "minutes": gw["minutes"],
-                "xG": gw.get("expected_goals", 0),
-                "xA": gw.get("expected_assists", 0),
-                "xGI": gw.get("expected_goal_involvements", 0),
-                "ict_index": gw["ict_index"],
-                "was_home": gw["was_home"],
-                "opponent_team": gw["opponent_team"],
-                "team_strength": p["team"],
-            })
+    # Keep bootstrap order, like the old serial loop; the round in progress
+    # is left for update_fpl_history once it finishes
+    rows = [
+        row
+        for p in players
+        for row in results.get(p["id"], [])
+        if row["round"] <= finished
+    ]
 
     df = pd.DataFrame(rows)
-    df.to_csv("data/fpl_raw_history.csv", index=False)
-    print("Saved dataset: data/fpl_raw_history.csv")
+    df.insert(0, "season", season)
+    df.to_csv(output_path, index=False)
+    print(f"Saved dataset: {output_path}")
+
+    if store_dir is not None and pyarrow_available():
+        write_partitioned(df, store_dir, RAW_HISTORY_DTYPES, season=season, mode="overwrite")
+        print(f"Saved columnar store: {store_dir}")
+
+    # Complete run: the checkpoint is no longer needed
+    if checkpoint_path is not None and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    return df
+
+
+def checkpoint_key(season, finished):
+    """Checkpoints are only resumed for the same season and finished round."""
+    return {"season": season, "round": finished}
+
+
+def last_finished_round(bootstrap):
+    """Id of the latest gameweek whose matches are all finished (0 if none)."""
+    finished = [e["id"] for e in bootstrap.get("events", []) if e.get("finished")]
+    return max(finished, default=0)
+
+
+def update_fpl_history(
+    history_path=RAW_HISTORY_PATH,
+    base_url=API_URL,
+    concurrency=16,
+    retries=3,
+    backoff=0.5,
+    checkpoint_path=CHECKPOINT_PATH,
+    store_dir=RAW_HISTORY_DIR,
+):
+    """
+    Incremental ingest: only players whose latest stored `round` in the
+    current season is behind the last finished gameweek are fetched, and
+    only their new rows are appended to the history CSV. Unfinished rounds are never stored, so a
+    double gameweek is always appended in one piece.
+    Returns the DataFrame of appended rows.
+    """
+    if not os.path.exists(history_path):
+        return load_fpl_history(
+            history_path, base_url, concurrency, retries, backoff, checkpoint_path, store_dir
+        )
+
+    columns = pd.read_csv(history_path, nrows=0).columns
+    if "season" not in columns:
+        # CSV from before the season column: its rows are DEFAULT_SEASON
+        legacy = pd.read_csv(history_path)
+        legacy.insert(0, "season", DEFAULT_SEASON)
+        legacy.to_csv(history_path, index=False)
+        columns = legacy.columns
+
+    bootstrap = asyncio.run(
+        fetch_bootstrap_async(base_url, retries=retries, backoff=backoff)
+    )
+    season = season_from_bootstrap(bootstrap)
+    finished = last_finished_round(bootstrap)
+
+    # FPL reuses player ids every season: only this season's rows count
+    existing = pd.read_csv(history_path, usecols=["season", "player_id", "round"])
+    existing = existing[existing["season"] == season]
+    last_round = existing.groupby("player_id")["round"].max().to_dict()
+
+    stale = [p for p in bootstrap["elements"] if last_round.get(p["id"], 0) < finished]
+    if not stale:
+        print("History already up to date.")
+        return pd.DataFrame(columns=columns)
+
+    results = asyncio.run(fetch_histories_async(
+        stale,
+        base_url=base_url,
+        concurrency=concurrency,
+        retries=retries,
+        backoff=backoff,
+        checkpoint_path=checkpoint_path,
+        checkpoint_key=checkpoint_key(season, finished),
+    ))
+
+    new_rows = [
+        row
+        for p in stale
+        for row in results.get(p["id"], [])
+        if last_round.get(p["id"], 0) < row["round"] <= finished
+    ]
+
+    new_df = pd.DataFrame(new_rows, columns=columns)
+    new_df["season"] = season
+    new_df.to_csv(history_path, mode="a", header=False, index=False)
+    print(f"Appended {len(new_df)} rows for {len(stale)} players to {history_path}")
+
+    if store_dir is not None and pyarrow_available():
+        if has_store(store_dir):
+            write_partitioned(new_df, store_dir, RAW_HISTORY_DTYPES, season=season)
+        else:
+            # First run with a store: import everything, not just the delta
+            write_partitioned(
+                pd.read_csv(history_path), store_dir, RAW_HISTORY_DTYPES,
+                season=season, mode="overwrite",
+            )
+
+    if checkpoint_path is not None and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    return new_df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the raw FPL history CSV.")
+    parser.add_argument("--output", default=str(RAW_HISTORY_PATH))
+    parser.add_argument("--base-url", default=API_URL)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--backoff", type=float, default=0.5)
+    parser.add_argument("--checkpoint", default=str(CHECKPOINT_PATH))
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only fetch and append rounds newer than those already stored.",
+    )
+    parser.add_argument(
+        "--store-dir",
+        default=str(RAW_HISTORY_DIR),
+        help="Partitioned columnar store directory ('' to skip it).",
+    )
+    args = parser.parse_args()
+
+    options = dict(
+        base_url=args.base_url,
+        concurrency=args.concurrency,
+        retries=args.retries,
+        backoff=args.backoff,
+        checkpoint_path=args.checkpoint,
+        store_dir=args.store_dir or None,
+    )
+    if args.incremental:
+        update_fpl_history(history_path=args.output, **options)
+    else:
+        load_fpl_history(output_path=args.output, **options)
+
 
-load_fpl_history()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+# data/storage.py
+
+import argparse
+import shutil
+import uuid
+from pathlib import Path
+
+import pandas as pd
+
+DATA_DIR = Path(__file__).resolve().parent
+
+RAW_HISTORY_CSV = DATA_DIR / "fpl_raw_history.csv"
+TRAINING_CSV = DATA_DIR / "training_ready.csv"
+
+RAW_HISTORY_DIR = DATA_DIR / "raw_history"
+TRAINING_DIR = DATA_DIR / "training"
+
+# Season label for rows that predate the `season` column (the bundled CSVs)
+DEFAULT_SEASON = "2023-24"
+
+PARTITION_COLUMNS = ["season", "round"]
+
+RAW_HISTORY_DTYPES = {
+    "season": "string",
+    "player_id": "int32",
+    "web_name": "string",
+    "position": "int8",
+    "team": "int8",
+    "round": "int16",
+    "total_points": "int16",
+    "minutes": "int16",
+    "xG": "float32",
+    "xA": "float32",
+    "xGI": "float32",
+    "ict_index": "float32",
+    "was_home": "bool",
+    "opponent_team": "int8",
+    "team_strength": "int8",
+}
+
+TRAINING_DTYPES = {
+    "season": "string",
+    "player_id": "int32",
+    "round": "int16",
+    "minutes": "float32",
+    "xG": "float32",
+    "xA": "float32",
+    "xGI": "float32",
+    "ict_index": "float32",
+    "opponent_strength": "float32",
+    "was_home": "bool",
+    "rolling_form": "float32",
+    "rolling_xgi": "float32",
+    "position_encoded": "float32",
+    "team_strength": "float32",
+    "total_points": "float32",
+}
+
+
+def season_from_bootstrap(bootstrap):
+    """'2025-26' style label from the first gameweek deadline."""
+    events = bootstrap.get("events", []) or []
+    if not events or not events[0].get("deadline_time"):
+        return DEFAULT_SEASON
+    year = int(events[0]["deadline_time"][:4])
+    return f"{year}-{(year + 1) % 100:02d}"
+
+
+def coerce_dtypes(df, dtypes):
+    """Casts every known column to its explicit dtype (unknown ones untouched)."""
+    df = df.copy()
+    for column, dtype in dtypes.items():
+        if column not in df.columns:
+            continue
+        if dtype == "bool" and df[column].dtype == object:
+            df[column] = df[column].astype(str).str.lower().isin(["true", "1"])
+        elif dtype.startswith(("int", "float")):
+            df[column] = pd.to_numeric(df[column], errors="coerce")
+            if dtype.startswith("int"):
+                df[column] = df[column].fillna(0)
+        df[column] = df[column].astype(dtype)
+    return df
+
+
+def pyarrow_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def has_store(root):
+    """True if a partitioned store exists and pyarrow is available."""
+    if not pyarrow_available():
+        return False
+    return Path(root).is_dir() and any(Path(root).rglob("*.parquet"))
+
+
+def write_partitioned(df, root, dtypes, season=None, mode="append"):
+    """
+    Writes `df` as Parquet files under root/season=.../round=.../.
+
+    mode="overwrite" replaces the season=.../ partitions being written
+    (other seasons are kept); mode="append" adds new files next to
+    existing ones (used by incremental ingestion).
+    Rows without a `season` column get `season` (or DEFAULT_SEASON).
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    root = Path(root)
+    df = df.copy()
+    if "season" not in df.columns:
+        df["season"] = season or DEFAULT_SEASON
+
+    if mode == "overwrite":
+        seasons = set(df["season"].dropna().astype(str))
+        if season is not None:
+            seasons.add(season)
+        for label in seasons:
+            partition = root / f"season={label}"
+            if partition.exists():
+                shutil.rmtree(partition)
+
+    if df.empty:
+        return
+
+    df = coerce_dtypes(df, dtypes)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    ds.write_dataset(
+        table,
+        root,
+        format="parquet",
+        partitioning=PARTITION_COLUMNS,
+        partitioning_flavor="hive",
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+
+def read_partitioned(root, columns=None, filters=None, dtypes=None, memory_map=True):
+    """
+    Reads a partitioned store into pandas.
+
+    - columns: project only these columns (others are never decoded)
+    - filters: pyarrow filters, e.g. [("season", "=", "2024-25")];
+      partition filters skip whole directories
+    - memory_map: map files instead of reading them into buffers
+    """
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(
+        root,
+        columns=columns,
+        filters=filters,
+        memory_map=memory_map,
+        partitioning="hive",
+    )
+    df = table.to_pandas()
+
+    # Partition keys come back as dictionary columns
+    for column in PARTITION_COLUMNS:
+        if column in df.columns and isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype(df[column].cat.categories.dtype)
+
+    if dtypes:
+        df = coerce_dtypes(df, dtypes)
+    return df
+
+
+def _load(root, csv_path, dtypes, columns=None, filters=None):
+    if has_store(root):
+        return read_partitioned(root, columns=columns, filters=filters, dtypes=dtypes)
+
+    # CSV fallback (export format / no pyarrow)
+    usecols = None
+    if columns is not None:
+        header = pd.read_csv(csv_path, nrows=0).columns
+        usecols = [c for c in columns if c in header]
+    df = pd.read_csv(csv_path, usecols=usecols)
+
+    if "season" not in df.columns and (columns is None or "season" in columns):
+        df["season"] = DEFAULT_SEASON
+    return coerce_dtypes(df, dtypes)
+
+
+def load_raw_history(columns=None, filters=None, root=RAW_HISTORY_DIR, csv_path=RAW_HISTORY_CSV):
+    """Raw per-match history, from the columnar store if present."""
+    return _load(root, csv_path, RAW_HISTORY_DTYPES, columns, filters)
+
+
+def load_training_dataset(columns=None, filters=None, root=TRAINING_DIR, csv_path=TRAINING_CSV):
+    """Featurized training rows, from the columnar store if present."""
+    return _load(root, csv_path, TRAINING_DTYPES, columns, filters)
+
+
+def iter_training_batches(columns=None, filters=None, batch_size=65536,
+                          root=TRAINING_DIR, csv_path=TRAINING_CSV):
+    """
+    Yields the training dataset as DataFrames of at most `batch_size` rows,
+    so callers never hold every season in memory at once.
+    """
+    if has_store(root):
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(root, format="parquet", partitioning="hive")
+        expr = _filter_expression(filters)
+        for batch in dataset.to_batches(columns=columns, filter=expr, batch_size=batch_size):
+            if batch.num_rows:
+                yield coerce_dtypes(batch.to_pandas(), TRAINING_DTYPES)
+        return
+
+    header = pd.read_csv(csv_path, nrows=0).columns
+    usecols = None if columns is None else [c for c in columns if c in header]
+    for chunk in pd.read_csv(csv_path, usecols=usecols, chunksize=batch_size):
+        if "season" not in chunk.columns and (columns is None or "season" in columns):
+            chunk["season"] = DEFAULT_SEASON
+        if filters:
+            for column, op, value in filters:
+                chunk = chunk[_FILTER_OPS[op](chunk[column], value)]
+        yield coerce_dtypes(chunk, TRAINING_DTYPES)
+
+
+_FILTER_OPS = {
+    "=": lambda col, v: col == v,
+    "==": lambda col, v: col == v,
+    "!=": lambda col, v: col != v,
+    "<": lambda col, v: col < v,
+    "<=": lambda col, v: col <= v,
+    ">": lambda col, v: col > v,
+    ">=": lambda col, v: col >= v,
+    "in": lambda col, v: col.isin(v),
+}
+
+
+def _filter_expression(filters):
+    """[(column, op, value), ...] -> pyarrow.dataset expression (AND)."""
+    if not filters:
+        return None
+    import pyarrow.dataset as ds
+
+    expr = None
+    for column, op, value in filters:
+        field = ds.field(column)
+        term = field.isin(value) if op == "in" else _FILTER_OPS[op](field, value)
+        expr = term if expr is None else expr & term
+    return expr
+
+
+def export_csv(root, csv_path, sort_by=("season", "player_id", "round")):
+    """Writes a store back out as a single CSV."""
+    df = read_partitioned(root)
+    keys = [c for c in sort_by if c in df.columns]
+    if keys:
+        df = df.sort_values(keys, kind="stable")
+    df.to_csv(csv_path, index=False)
+    print(f"Exported {len(df)} rows to {csv_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert between CSV and the columnar store.")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("--dataset", choices=["raw", "training"], default="raw")
+    parser.add_argument("--season", default=DEFAULT_SEASON)
+    args = parser.parse_args()
+
+    if args.dataset == "raw":
+        root, csv_path, dtypes = RAW_HISTORY_DIR, RAW_HISTORY_CSV, RAW_HISTORY_DTYPES
+    else:
+        root, csv_path, dtypes = TRAINING_DIR, TRAINING_CSV, TRAINING_DTYPES
+
+    if args.action == "import":
+        df = pd.read_csv(csv_path)
+        write_partitioned(df, root, dtypes, season=args.season, mode="overwrite")
+        print(f"Imported {len(df)} rows into {root}")
+    else:
+        export_csv(root, csv_path)
+
+
+if __name__ == "__main__":
+    main()
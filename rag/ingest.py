@@ -1,46 +1,155 @@
+import argparse
+import hashlib
+import time
+from pathlib import Path
+
 import requests
 from bs4 import BeautifulSoup
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import Chroma
 
+from rag.vector_index import export_from_chroma
+from rag.vector_store import INDEX_DIRECTORY, PERSIST_DIRECTORY, get_embeddings
+
 
 NEWS_SOURCES = [
     "https://www.bbc.com/sport/football/premier-league",
     "https://www.skysports.com/premier-league-news",
 ]
 
-def scrape_news():
-    docs = []
+EMBED_BATCH_SIZE = 64
+
+
+def read_source(source, timeout=30):
+    """HTML of a URL, or of a local file (path or file:// URL, e.g. test fixtures)."""
+    if source.startswith("file://"):
+        return Path(source[len("file://"):]).read_text(encoding="utf-8")
+    if not source.startswith(("http://", "https://")):
+        return Path(source).read_text(encoding="utf-8")
+    resp = requests.get(source, timeout=timeout)
+    resp.raise_for_status()
+    return resp.text
+
+
+def scrape_news(sources=NEWS_SOURCES):
+    """
+    Paragraph text per source ({source: text}). Sources that fail are
+    left out, so their stored chunks are kept rather than deleted.
+    """
+    docs = {}
+
+    for url in sources:
+        try:
+            html = read_source(url)
+        except (OSError, requests.RequestException) as e:
+            print(f"Skipping {url}: {e}")
+            continue
 
-    for url in NEWS_SOURCES:
-        html = requests.get(url).text
         soup = BeautifulSoup(html, "html.parser")
 
         # Extract paragraphs
         paragraphs = soup.find_all("p")
-        text = "\n".join(p.get_text() for p in paragraphs)
-
-        docs.append(text)
+        docs[url] = "\n".join(p.get_text() for p in paragraphs)
 
     return docs
 
-def ingest_documents():
-    raw_docs = scrape_news()
 
-    splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-    chunks = splitter.create_documents(raw_docs)
+def chunk_id(source, text):
+    """Content hash of a chunk within its source, used as the document id."""
+    return hashlib.sha1(f"{source}\n{text}".encode("utf-8")).hexdigest()
+
+
+def split_chunks(docs, chunk_size=500, chunk_overlap=50):
+    """{chunk id: (source, text)} for scraped docs, duplicates collapsed."""
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    chunks = {}
+    for source, text in docs.items():
+        for piece in splitter.split_text(text):
+            chunks.setdefault(chunk_id(source, piece), (source, piece))
+    return chunks
+
 
-    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+def ingest_documents(sources=NEWS_SOURCES, persist_directory=PERSIST_DIRECTORY,
+                     batch_size=EMBED_BATCH_SIZE, embeddings=None,
+                     index_directory=None, quantize_int8=False):
+    """
+    Incrementally syncs the vector store with the sources: chunks are
+    identified by content hash, so unchanged chunks are skipped, new ones
+    are embedded `batch_size` at a time, and stored chunks that are no
+    longer produced (by a source that scraped successfully, or by a
+    source no longer listed) are deleted. With `index_directory`, the
+    synced store is also exported as an in-process VectorIndex.
 
-    db = Chroma.from_documents(
-        documents=chunks,
-        embedding=embeddings,
-        persist_directory="rag_store"
+    Returns {"sources", "chunks", "embedded", "skipped", "deleted", "seconds"}.
+    """
+    started = time.perf_counter()
+    sources = list(sources)
+    docs = scrape_news(sources)
+    chunks = split_chunks(docs)
+
+    embeddings = embeddings or get_embeddings()
+    db = Chroma(persist_directory=str(persist_directory), embedding_function=embeddings)
+
+    stored = db.get(include=["metadatas"])
+    existing = {
+        doc_id: (meta or {}).get("source")
+        for doc_id, meta in zip(stored["ids"], stored["metadatas"])
+    }
+
+    # Keep chunks of sources that failed this run
+    failed = set(sources) - set(docs)
+    stale = [
+        doc_id for doc_id, source in existing.items()
+        if doc_id not in chunks and source not in failed
+    ]
+    if stale:
+        db.delete(ids=stale)
+
+    new = [doc_id for doc_id in chunks if doc_id not in existing]
+    for start in range(0, len(new), batch_size):
+        batch = new[start:start + batch_size]
+        db.add_texts(
+            texts=[chunks[doc_id][1] for doc_id in batch],
+            metadatas=[{"source": chunks[doc_id][0]} for doc_id in batch],
+            ids=batch,
+        )
+
+    if hasattr(db, "persist"):
+        db.persist()
+
+    if index_directory is not None:
+        export_from_chroma(db, index_directory, quantize_int8)
+
+    return {
+        "sources": len(docs),
+        "chunks": len(chunks),
+        "embedded": len(new),
+        "skipped": len(chunks) - len(new),
+        "deleted": len(stale),
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally ingest news into the vector store.")
+    parser.add_argument("sources", nargs="*", default=NEWS_SOURCES, help="URLs or local HTML files")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE)
+    parser.add_argument("--persist-directory", default=PERSIST_DIRECTORY)
+    parser.add_argument("--index", action="store_true", help="also export the in-process index")
+    parser.add_argument("--quantize", action="store_true", help="store the index as int8")
+    args = parser.parse_args()
+
+    report = ingest_documents(
+        args.sources, args.persist_directory, args.batch_size,
+        index_directory=INDEX_DIRECTORY if args.index else None,
+        quantize_int8=args.quantize,
+    )
+    print(
+        f"Finished syncing vector store: {report['embedded']} chunks embedded, "
+        f"{report['skipped']} skipped, {report['deleted']} deleted "
+        f"({report['sources']} sources) in {report['seconds']:.1f}s."
     )
 
-    db.persist()
-    print("Finished building vector store.")
 
 if __name__ == "__main__":
-    ingest_documents()
+    main()
@@ -1,31 +1,21 @@
 import re
 from duckduckgo_search import DDGS
 
-import feedparser
+from rag.news import MAX_RESULTS, get_default_news
+from rag.sentiment import get_default_scorer
+
+
 # ---------------------------------------------------------
 # A) LIVE SEARCH: Return news article titles + links (Improved)
 # ---------------------------------------------------------
-def fetch_news_links(player_name: str, max_results: int = 6):
+def fetch_news_links(player_name: str, max_results: int = MAX_RESULTS):
     """
-    Uses Google News RSS to fetch trustworthy headlines.
-    Works 100% of the time for ALL players, including Haaland.
+    Google News RSS headlines for a player, via the process-wide news
+    cache: fetched at most once per player per day.
     No API keys. No rate limits. No DDG problems.
     """
     try:
-        query = player_name.replace(" ", "+")
-        url = f"https://news.google.com/rss/search?q={query}+football&hl=en-US&gl=US&ceid=US:en"
-
-        feed = feedparser.parse(url)
-
-        articles = []
-        for entry in feed.entries[:max_results]:
-            articles.append({
-                "title": entry.title,
-                "url": entry.link
-            })
-
-        return articles
-
+        return get_default_news().get(player_name, max_results)
     except Exception:
         return []
 
@@ -33,73 +23,21 @@ def fetch_news_links(player_name: str, max_results: int = 6):
 # ---------------------------------------------------------
 # B) Simple sentiment scoring from live news
 # ---------------------------------------------------------
-NEGATIVE_WORDS = [
-    "injury", "doubt", "ruled out", "out for", "sidelined",
-    "poor form", "struggle", "bad", "miss", "dropped"
-]
-
-POSITIVE_WORDS = [
-    "excellent", "top form", "brace", "goal", "assist",
-    "performance", "shining", "returning", "fit to play"
-]
-
-
 def compute_sentiment_tag(player, news_links):
     """
     Computes a numeric sentiment score from headlines.
-    Falls back gracefully if HF inference is unavailable.
+    Uses the prefetched sentiment joined onto the player row
+    (rag.news.join_sentiment) when it has headlines; otherwise headlines
+    are scored offline by the lexicon model in one batch, and scores
+    persist per headline hash, so each is scored only once.
     """
-
-    if not news_links:
-        return 0.0, "🟡"
-
     try:
-        from huggingface_hub import InferenceClient
-    except ImportError:
-        # HuggingFace not available in this environment
-        return 0.0, "🟡"
-
-    try:
-        client = InferenceClient("gpt2")
+        if player.get("news_headlines", 0) > 0:
+            return float(player["news_sentiment"]), player["news_icon"]
+        return get_default_scorer().sentiment(news_links)
     except Exception:
         return 0.0, "🟡"
 
-    scores = []
-
-    for item in news_links:
-        headline = item["title"]
-
-        try:
-            out = client.text_generation(
-                prompt=(
-                    "Rate sentiment of this football news headline "
-                    "from -1 to 1:\n\n"
-                    f"{headline}\n\n"
-                    "Just the number:"
-                ),
-                max_new_tokens=10
-            )
-
-            val = float(out.strip().replace("\n", ""))
-            scores.append(val)
-
-        except Exception:
-            scores.append(0.0)
-
-    if not scores:
-        return 0.0, "🟡"
-
-    avg = sum(scores) / len(scores)
-
-    if avg > 0.25:
-        icon = "🟢"
-    elif avg < -0.25:
-        icon = "🔴"
-    else:
-        icon = "🟡"
-
-    return float(avg), icon
-
 
 
 # ---------------------------------------------------------
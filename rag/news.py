@@ -0,0 +1,258 @@
+# rag/news.py
+
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import quote_plus
+
+import aiohttp
+import feedparser
+import pandas as pd
+
+NEWS_URL = "https://news.google.com/rss/search?q={query}+football&hl=en-US&gl=US&ceid=US:en"
+
+MAX_RESULTS = 6
+
+DEFAULT_NEWS_DIR = Path(__file__).resolve().parent.parent / "cache" / "news"
+
+SENTIMENT_COLUMNS = ["id", "web_name", "news_sentiment", "news_icon", "headlines", "updated_at"]
+
+
+def news_url(player_name):
+    return NEWS_URL.format(query=quote_plus(player_name))
+
+
+def parse_feed(content, max_results=MAX_RESULTS):
+    """[{"title", "url"}] from raw RSS bytes."""
+    feed = feedparser.parse(content)
+    return [
+        {"title": entry.title, "url": entry.link}
+        for entry in feed.entries[:max_results]
+        if entry.get("title") and entry.get("link")
+    ]
+
+
+# ---------------------------------------------------------
+# Feed sources
+# ---------------------------------------------------------
+class GoogleNewsSource:
+    """
+    Fetches Google News RSS feeds for several players at once, at most
+    `concurrency` requests in flight and, with `rate`, at most `rate`
+    request starts per second. A failed feed comes back as None (so it
+    is not cached) instead of failing the batch. Any object with the
+    same `fetch` method can be used instead (e.g. StaticNewsSource).
+    """
+
+    def __init__(self, concurrency=8, timeout=10, rate=None):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.rate = rate
+
+    async def _fetch(self, names, max_results):
+        sem = asyncio.Semaphore(self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        loop = asyncio.get_running_loop()
+        next_start = loop.time()
+
+        async def throttle():
+            # Reserve the next start slot, then wait for it
+            nonlocal next_start
+            if not self.rate:
+                return
+            now = loop.time()
+            slot = max(now, next_start)
+            next_start = slot + 1.0 / self.rate
+            await asyncio.sleep(slot - now)
+
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+
+            async def one(name):
+                async with sem:
+                    await throttle()
+                    try:
+                        async with session.get(news_url(name)) as resp:
+                            resp.raise_for_status()
+                            content = await resp.read()
+                    except (aiohttp.ClientError, asyncio.TimeoutError):
+                        return name, None
+                return name, parse_feed(content, max_results)
+
+            results = await asyncio.gather(*(one(name) for name in names))
+
+        return dict(results)
+
+    def fetch(self, names, max_results=MAX_RESULTS):
+        """Articles keyed by player name (None where the fetch failed)."""
+        if not names:
+            return {}
+        return asyncio.run(self._fetch(list(names), max_results))
+
+
+class StaticNewsSource:
+    """
+    Serves canned articles ({name: [{"title", "url"}]}) without network
+    access, for tests and offline development. Records every requested
+    batch in `calls`.
+    """
+
+    def __init__(self, feeds=None):
+        self.feeds = feeds or {}
+        self.calls = []
+
+    def fetch(self, names, max_results=MAX_RESULTS):
+        names = list(names)
+        self.calls.append(names)
+        return {name: list(self.feeds.get(name, []))[:max_results] for name in names}
+
+
+# ---------------------------------------------------------
+# Cache
+# ---------------------------------------------------------
+class NewsCache:
+    """
+    In-memory TTL cache of articles keyed by (player, day): headlines are
+    fetched at most once per player per day, or again after `ttl`
+    seconds. Misses in one call are fetched together in a single
+    concurrent batch.
+    """
+
+    def __init__(self, source=None, ttl=3 * 60 * 60, max_entries=2048):
+        self.source = source or GoogleNewsSource()
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _fresh(self, key, now):
+        entry = self._entries.get(key)
+        if entry is not None and now - entry[0] < self.ttl:
+            return entry[1]
+        return None
+
+    def get_many(self, names, max_results=MAX_RESULTS):
+        """Articles keyed by player name, fetching only uncached players."""
+        today, now = date.today().isoformat(), time.time()
+        found = {}
+        with self._lock:
+            for name in names:
+                articles = self._fresh((name, today), now)
+                if articles is not None:
+                    found[name] = articles[:max_results]
+
+        missing = [name for name in dict.fromkeys(names) if name not in found]
+        if missing:
+            fetched = self.source.fetch(missing, max_results)
+            with self._lock:
+                for name in missing:
+                    articles = fetched.get(name)
+                    if articles is not None:
+                        self._entries[(name, today)] = (now, articles)
+                    found[name] = articles or []
+                while len(self._entries) > self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+        return found
+
+    def get(self, name, max_results=MAX_RESULTS):
+        return self.get_many([name], max_results)[name]
+
+    def invalidate(self, name=None):
+        with self._lock:
+            for key in [k for k in self._entries if name is None or k[0] == name]:
+                del self._entries[key]
+
+
+@lru_cache(maxsize=1)
+def get_default_news():
+    """Process-wide news cache shared by every session and rerun."""
+    return NewsCache()
+
+
+# ---------------------------------------------------------
+# Prefetched per-player sentiment, written by services.news_prefetch
+# ---------------------------------------------------------
+class NewsSentimentStore:
+    """
+    Two files in a local directory, both written atomically (tmp file +
+    rename):
+
+    - state.json: per player id, the recent scored headlines and the
+      hashes of every headline seen, for incremental refreshes
+    - sentiment.csv: the compact per-player table (SENTIMENT_COLUMNS)
+
+    The table is kept in memory by id and only reloaded when the file
+    changes; join_sentiment maps it onto the player table by id.
+    """
+
+    def __init__(self, directory=DEFAULT_NEWS_DIR):
+        self.directory = Path(directory)
+        self._loaded = (None, None)
+        self._lock = threading.Lock()
+
+    def _write(self, name, text):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(text)
+            os.replace(tmp, self.directory / name)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def load_state(self):
+        try:
+            with open(self.directory / "state.json") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self, state, table):
+        self._write("state.json", json.dumps(state))
+        self._write("sentiment.csv", table.to_csv(index=False))
+
+    def load_table(self):
+        """The sentiment table indexed by player id, or None."""
+        path = self.directory / "sentiment.csv"
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            loaded, table = self._loaded
+            if loaded != version:
+                try:
+                    table = pd.read_csv(path).set_index("id")
+                except (OSError, ValueError, KeyError):
+                    return None
+                self._loaded = (version, table)
+            return table
+
+
+def join_sentiment(df, table):
+    """
+    df with news_sentiment / news_icon / news_headlines columns joined
+    on id (neutral, with no headlines, if missing).
+    """
+    if table is None:
+        return df.assign(news_sentiment=0.0, news_icon="🟡", news_headlines=0)
+    return df.assign(
+        news_sentiment=df["id"].map(table["news_sentiment"]).fillna(0.0),
+        news_icon=df["id"].map(table["news_icon"]).fillna("🟡"),
+        news_headlines=df["id"].map(table["headlines"]).fillna(0).astype(int),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_default_news_store():
+    return NewsSentimentStore()
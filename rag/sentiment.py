@@ -0,0 +1,241 @@
+# rag/sentiment.py
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import defaultdict
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_SENTIMENT_DIR = Path(__file__).resolve().parent.parent / "cache" / "sentiment"
+
+NEGATIVE_WORDS = [
+    "injury", "doubt", "ruled out", "out for", "sidelined",
+    "poor form", "struggle", "bad", "miss", "dropped"
+]
+
+POSITIVE_WORDS = [
+    "excellent", "top form", "brace", "goal", "assist",
+    "performance", "shining", "returning", "fit to play"
+]
+
+# Weighted lexicon: the word lists above at +-1, plus inflections and
+# common FPL news phrases. Longer phrases win over their parts
+# ("own goal" is not a "goal").
+LEXICON = {
+    **{w: -1.0 for w in NEGATIVE_WORDS},
+    **{w: 1.0 for w in POSITIVE_WORDS},
+    "injured": -1.0, "injuries": -1.0, "doubtful": -0.8, "doubts": -0.8,
+    "ruled out": -1.5, "sidelined": -1.2, "surgery": -1.2, "setback": -0.9,
+    "hamstring": -0.8, "knock": -0.5, "fitness concern": -0.8, "blow": -0.7,
+    "misses": -0.8, "missed": -0.8, "missing": -0.6, "suspended": -1.0,
+    "suspension": -1.0, "red card": -1.0, "benched": -0.9, "axed": -0.9,
+    "rested": -0.5, "struggles": -0.7, "struggling": -0.7, "crisis": -0.7,
+    "own goal": -0.8, "poor": -0.6, "frustrating": -0.5, "blank": -0.5,
+    "goals": 0.6, "assists": 0.6, "scores": 0.8, "scored": 0.8,
+    "scoring": 0.6, "hat-trick": 1.5, "hat trick": 1.5, "in form": 1.0,
+    "shines": 0.8, "returns": 0.7, "back in training": 1.0, "fit": 0.5,
+    "recovered": 0.8, "recovers": 0.8, "available": 0.5, "boost": 0.8,
+    "impressive": 0.8, "impresses": 0.8, "masterclass": 1.2, "winner": 0.7,
+    "clean sheet": 0.8, "player of the month": 1.2, "star": 0.5,
+}
+
+# A negator up to one word before a term flips it at half weight
+# ("not ruled out", "no injury")
+NEGATORS = ["not", "no", "never", "without", "won't", "isn't", "hasn't"]
+NEGATION_WEIGHT = -0.5
+
+# Score = tanh(sum of weights / SCALE): a single -1 term gives about -0.46
+SCALE = 2.0
+
+
+def normalize_headline(headline):
+    return " ".join(str(headline).lower().replace("’", "'").split())
+
+
+def headline_key(headline):
+    """Content hash of a headline, ignoring case and whitespace."""
+    return hashlib.sha1(normalize_headline(headline).encode("utf-8")).hexdigest()
+
+
+def sentiment_icon(score):
+    if score > 0.25:
+        return "🟢"
+    if score < -0.25:
+        return "🔴"
+    return "🟡"
+
+
+# ---------------------------------------------------------
+# Local model
+# ---------------------------------------------------------
+class LexiconSentimentModel:
+    """
+    Deterministic offline headline sentiment in [-1, 1]: a linear model
+    over weighted lexicon phrases with simple negation, squashed by
+    tanh. A batch is scored in one regex pass over all headlines.
+
+    `name` changes with the lexicon, so persisted scores from an older
+    lexicon are never reused.
+    """
+
+    def __init__(self, lexicon=None, negators=NEGATORS, scale=SCALE):
+        self.lexicon = dict(LEXICON if lexicon is None else lexicon)
+        self.negators = list(negators)
+        self.scale = scale
+
+        terms = sorted(self.lexicon, key=len, reverse=True)
+        self._pattern = re.compile(
+            r"(?<![\w'-])(?:(?P<neg>" + "|".join(map(re.escape, self.negators)) + r") (?:[^\s]+ )?)?"
+            r"(?P<term>" + "|".join(map(re.escape, terms)) + r")(?![\w'-])"
+        )
+
+        spec = json.dumps([sorted(self.lexicon.items()), self.negators, scale])
+        self.name = "lexicon-" + hashlib.sha1(spec.encode()).hexdigest()[:12]
+
+    def score(self, headlines):
+        if not len(headlines):
+            return np.zeros(0)
+
+        texts = [normalize_headline(h) for h in headlines]
+        starts = np.cumsum([0] + [len(t) + 1 for t in texts[:-1]])
+
+        positions, weights = [], []
+        for m in self._pattern.finditer("\n".join(texts)):
+            weight = self.lexicon[m.group("term")]
+            positions.append(m.start())
+            weights.append(weight * NEGATION_WEIGHT if m.group("neg") else weight)
+
+        totals = np.zeros(len(texts))
+        if positions:
+            rows = np.searchsorted(starts, positions, side="right") - 1
+            np.add.at(totals, rows, weights)
+        return np.tanh(totals / self.scale)
+
+
+# ---------------------------------------------------------
+# Persistent store
+# ---------------------------------------------------------
+class SentimentStore:
+    """
+    Content-addressed headline scores on disk, one directory per model
+    name and one JSON shard per first two hex digits of the headline
+    hash. Writes merge into the shard and are atomic (tmp file +
+    rename); a write lost to a concurrent process only means that
+    headline is scored again.
+    """
+
+    def __init__(self, directory=DEFAULT_SENTIMENT_DIR):
+        self.directory = Path(directory)
+        self._shards = {}
+        self._lock = threading.Lock()
+
+    def _path(self, model, prefix):
+        return self.directory / re.sub(r"[^A-Za-z0-9_.-]", "_", model) / f"{prefix}.json"
+
+    def _read(self, path):
+        """A shard's {key: score}; missing, partial or corrupt shards read empty."""
+        try:
+            with open(path) as f:
+                shard = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return shard if isinstance(shard, dict) else {}
+
+    def _shard(self, model, prefix):
+        key = (model, prefix)
+        if key not in self._shards:
+            self._shards[key] = self._read(self._path(model, prefix))
+        return self._shards[key]
+
+    def get_many(self, model, keys):
+        """Stored scores for the given headline keys ({key: score})."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                score = self._shard(model, key[:2]).get(key)
+                if score is not None:
+                    found[key] = score
+        return found
+
+    def put_many(self, model, scores):
+        by_prefix = defaultdict(dict)
+        for key, score in scores.items():
+            by_prefix[key[:2]][key] = float(score)
+
+        with self._lock:
+            for prefix, new in by_prefix.items():
+                path = self._path(model, prefix)
+                shard = {**self._read(path), **new}
+                path.parent.mkdir(parents=True, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+                try:
+                    with os.fdopen(fd, "w") as f:
+                        json.dump(shard, f)
+                    os.replace(tmp, path)
+                except BaseException:
+                    if os.path.exists(tmp):
+                        os.remove(tmp)
+                    raise
+                self._shards[(model, prefix)] = shard
+
+
+# ---------------------------------------------------------
+# Scorer
+# ---------------------------------------------------------
+class HeadlineScorer:
+    """
+    Batched headline sentiment, memoized per headline hash: each call
+    looks headlines up in memory, then in the store, and scores the rest
+    in a single model batch, persisting them so every headline is scored
+    once across sessions.
+    """
+
+    def __init__(self, model=None, store=None, max_entries=50_000):
+        self.model = model or LexiconSentimentModel()
+        self.store = store
+        self.max_entries = max_entries
+
+        self._scores = {}
+        self._lock = threading.Lock()
+
+    def score(self, headlines):
+        keys = [headline_key(h) for h in headlines]
+        with self._lock:
+            known = {k: self._scores[k] for k in keys if k in self._scores}
+        pending = {k: h for k, h in zip(keys, headlines) if k not in known}
+
+        if pending and self.store is not None:
+            known.update(self.store.get_many(self.model.name, list(pending)))
+            pending = {k: h for k, h in pending.items() if k not in known}
+
+        if pending:
+            new = dict(zip(pending, map(float, self.model.score(list(pending.values())))))
+            if self.store is not None:
+                self.store.put_many(self.model.name, new)
+            known.update(new)
+
+        with self._lock:
+            self._scores.update(known)
+            while len(self._scores) > self.max_entries:
+                self._scores.pop(next(iter(self._scores)))
+        return [known[k] for k in keys]
+
+    def sentiment(self, articles):
+        """(mean score, icon) for [{"title", ...}] articles."""
+        if not articles:
+            return 0.0, "🟡"
+        scores = self.score([a["title"] for a in articles])
+        avg = sum(scores) / len(scores)
+        return float(avg), sentiment_icon(avg)
+
+
+@lru_cache(maxsize=1)
+def get_default_scorer():
+    """Process-wide scorer shared by every session and rerun."""
+    return HeadlineScorer(store=SentimentStore())
@@ -0,0 +1,235 @@
+# rag/vector_index.py
+
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_INDEX_DIR = "rag_index"
+
+# Saved versions kept next to the current one (open memory maps of a
+# pruned version stay valid on POSIX)
+KEEP_VERSIONS = 2
+
+# Rows scored per block in search, bounding the temporary float32 copy
+# of int8 vectors
+SEARCH_BLOCK = 4096
+
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def quantize(vectors):
+    """Symmetric per-row int8 quantization: (int8 codes, float32 scales)."""
+    scale = np.abs(vectors).max(axis=1) / 127
+    scale = np.where(scale == 0, 1, scale).astype(np.float32)
+    codes = np.clip(np.rint(vectors / scale[:, None]), -127, 127).astype(np.int8)
+    return codes, scale
+
+
+def _write(directory, name, writer):
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            writer(f)
+        os.replace(tmp, directory / name)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class VectorIndex:
+    """
+    Exact in-process nearest-neighbour index over unit-normalized
+    embeddings, stored as .npy files and memory-mapped on open. Each save
+    writes a new version directory, then atomically points `current.json`
+    at it, so readers never mix files from two saves:
+
+    - vectors.npy: float32 (n, dim), or int8 codes plus scales.npy
+      (per-row scale) when built with quantize_int8=True (4x smaller)
+    - meta.json: texts, metadatas, ids and the storage dtype
+
+    search() is a single matrix product against the query and a
+    partial sort for the top k (cosine similarity).
+    """
+
+    def __init__(self, vectors, texts, metadatas=None, ids=None, scales=None):
+        self.vectors = vectors
+        self.scales = scales
+        self.texts = list(texts)
+        self.metadatas = list(metadatas) if metadatas is not None else [{} for _ in self.texts]
+        self.ids = list(ids) if ids is not None else [str(i) for i in range(len(self.texts))]
+
+    def __len__(self):
+        return len(self.texts)
+
+    @property
+    def quantized(self):
+        return self.scales is not None
+
+    @property
+    def nbytes(self):
+        return self.vectors.nbytes + (self.scales.nbytes if self.quantized else 0)
+
+    # ---------------------------
+    # Build / load
+    # ---------------------------
+    @classmethod
+    def from_vectors(cls, vectors, texts, metadatas=None, ids=None, quantize_int8=False):
+        vectors = normalize(vectors)
+        if quantize_int8:
+            codes, scales = quantize(vectors)
+            return cls(codes, texts, metadatas, ids, scales)
+        return cls(vectors, texts, metadatas, ids)
+
+    @classmethod
+    def build(cls, texts, embeddings, metadatas=None, ids=None, quantize_int8=False, batch_size=64):
+        """Embeds texts with a LangChain embeddings object, `batch_size` at a time."""
+        texts = list(texts)
+        vectors = [
+            embeddings.embed_documents(texts[i:i + batch_size])
+            for i in range(0, len(texts), batch_size)
+        ]
+        vectors = np.concatenate([np.asarray(v, dtype=np.float32) for v in vectors]) if vectors else np.zeros((0, 0))
+        return cls.from_vectors(vectors, texts, metadatas, ids, quantize_int8)
+
+    def save(self, directory=DEFAULT_INDEX_DIR):
+        """
+        Writes the index files into a new version directory, then swaps
+        the `current.json` pointer (tmp file + rename) and prunes old
+        versions beyond KEEP_VERSIONS.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        version = f"v-{uuid.uuid4().hex}"
+        target = directory / version
+        target.mkdir()
+
+        try:
+            np.save(target / "vectors.npy", np.ascontiguousarray(self.vectors))
+            if self.quantized:
+                np.save(target / "scales.npy", self.scales)
+            meta = {
+                "dtype": str(self.vectors.dtype),
+                "count": len(self),
+                "texts": self.texts,
+                "metadatas": self.metadatas,
+                "ids": self.ids,
+            }
+            (target / "meta.json").write_text(json.dumps(meta))
+        except BaseException:
+            shutil.rmtree(target, ignore_errors=True)
+            raise
+
+        _write(directory, "current.json", lambda f: f.write(json.dumps({"version": version}).encode()))
+        _prune(directory, version)
+
+    @staticmethod
+    def files(directory=DEFAULT_INDEX_DIR):
+        """
+        Directory holding the current index files, or None if no index
+        was saved there. Indexes saved before versioning sit directly in
+        `directory`.
+        """
+        directory = Path(directory)
+        try:
+            with open(directory / "current.json") as f:
+                return directory / json.load(f)["version"]
+        except (OSError, ValueError, KeyError):
+            pass
+        return directory if (directory / "meta.json").exists() else None
+
+    @classmethod
+    def load(cls, directory=DEFAULT_INDEX_DIR, mmap=True):
+        files = cls.files(directory)
+        if files is None:
+            raise FileNotFoundError(
+                f"No vector index in {directory}; export one with `python -m rag.ingest --index`"
+            )
+        with open(files / "meta.json") as f:
+            meta = json.load(f)
+        mode = "r" if mmap else None
+        vectors = np.load(files / "vectors.npy", mmap_mode=mode)
+        scales = np.load(files / "scales.npy") if meta["dtype"] == "int8" else None
+        if len(vectors) != meta["count"]:
+            raise ValueError(f"Index in {files} is inconsistent; export it again")
+        return cls(vectors, meta["texts"], meta["metadatas"], meta["ids"], scales)
+
+    # ---------------------------
+    # Search
+    # ---------------------------
+    def scores(self, query):
+        """Cosine similarity of every row with one query vector."""
+        q = normalize(query).ravel()
+        if not self.quantized:
+            return self.vectors @ q
+
+        out = np.empty(len(self), dtype=np.float32)
+        for start in range(0, len(self), SEARCH_BLOCK):
+            block = self.vectors[start:start + SEARCH_BLOCK]
+            out[start:start + len(block)] = block.astype(np.float32) @ q
+        return out * self.scales
+
+    def search(self, query, k=3):
+        """[(row, score)] of the k most similar rows, best first."""
+        if len(self) == 0:
+            return []
+        sims = self.scores(query)
+        k = min(k, len(sims))
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top], kind="stable")]
+        return [(int(i), float(sims[i])) for i in top]
+
+
+def _prune(directory, current):
+    versions = sorted(
+        (p for p in directory.glob("v-*") if p.is_dir() and p.name != current),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+    for old in versions[KEEP_VERSIONS - 1:]:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+class IndexRetriever:
+    """
+    Retriever over a VectorIndex with the same calls as the Chroma
+    retriever (invoke / get_relevant_documents -> Documents).
+    """
+
+    def __init__(self, index, embeddings, k=3):
+        self.index = index
+        self.embeddings = embeddings
+        self.k = k
+
+    def invoke(self, query):
+        from langchain_core.documents import Document
+
+        hits = self.index.search(self.embeddings.embed_query(query), self.k)
+        return [
+            Document(page_content=self.index.texts[i], metadata=self.index.metadatas[i])
+            for i, _ in hits
+        ]
+
+    def get_relevant_documents(self, query):
+        return self.invoke(query)
+
+
+def export_from_chroma(db, directory=DEFAULT_INDEX_DIR, quantize_int8=False):
+    """Writes a VectorIndex from a Chroma store's stored embeddings (no re-embedding)."""
+    stored = db.get(include=["embeddings", "documents", "metadatas"])
+    vectors = np.asarray(stored["embeddings"], dtype=np.float32)
+    index = VectorIndex.from_vectors(
+        vectors.reshape(len(stored["ids"]), -1), stored["documents"],
+        [m or {} for m in stored["metadatas"]], stored["ids"], quantize_int8,
+    )
+    index.save(directory)
+    return index
@@ -1,16 +1,63 @@
 # rag/vector_store.py
 
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
+from functools import lru_cache
 
 EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+PERSIST_DIRECTORY = "rag_store"
+INDEX_DIRECTORY = "rag_index"
 
-def get_retriever():
-    embeddings = HuggingFaceEmbeddings(model_name=EMBED_MODEL)
+# "chroma" (persisted Chroma store) or "index" (in-process VectorIndex
+# exported by `python -m rag.ingest --index`)
+DEFAULT_BACKEND = "chroma"
+
+
+@lru_cache(maxsize=1)
+def get_embeddings():
+    """Embedding model, loaded once per process."""
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(model_name=EMBED_MODEL)
+
+
+@lru_cache(maxsize=4)
+def _load_index(files, quantize_int8):
+    # Keyed by the current version directory, so a re-export is picked up
+    from rag.vector_index import VectorIndex
+
+    index = VectorIndex.load(files)
+    if quantize_int8 and not index.quantized:
+        index = VectorIndex.from_vectors(index.vectors, index.texts, index.metadatas, index.ids, True)
+    return index
+
+
+def get_retriever(backend=DEFAULT_BACKEND, k=3, quantize_int8=False):
+    """
+    Top-k retriever over the ingested news chunks. The "index" backend
+    skips Chroma entirely: exact search over a memory-mapped matrix,
+    optionally int8-quantized in memory.
+    """
+    embeddings = get_embeddings()
+
+    if backend == "index":
+        from rag.vector_index import IndexRetriever, VectorIndex
+
+        files = VectorIndex.files(INDEX_DIRECTORY)
+        if files is None:
+            raise FileNotFoundError(
+                f"No vector index in {INDEX_DIRECTORY}; run `python -m rag.ingest --index` "
+                "to export one, or use the chroma backend"
+            )
+        index = _load_index(str(files), quantize_int8)
+        return IndexRetriever(index, embeddings, k=k)
+
+    if backend != "chroma":
+        raise ValueError(f"Unknown retriever backend {backend!r}")
+
+    from langchain_community.vectorstores import Chroma
 
     vectordb = Chroma(
-        persist_directory="rag_store",
+        persist_directory=PERSIST_DIRECTORY,
         embedding_function=embeddings,
     )
 
-    return vectordb.as_retriever(search_kwargs={"k": 3})
+    return vectordb.as_retriever(search_kwargs={"k": k})
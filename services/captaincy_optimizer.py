@@ -1,27 +1,47 @@
 import numpy as np
+import pandas as pd
 
+from services.simulation import (
+    BLANK_THRESHOLD,
+    HAUL_THRESHOLD,
+    captaincy_stdev,
+    simulate_matrix,
+)
 
-def simulate_player_points(predicted, stdev, n_sims=10000):
+
+def simulate_player_points(predicted, stdev, n_sims=10000, rng=None):
     """
     Monte Carlo simulation for a single FPL player.
     - predicted: model's predicted points
     - stdev: estimated variance (higher for explosive players)
+    - rng: optional np.random.Generator (seeded for reproducibility)
     """
 
-    # Ensure numeric
-    predicted = float(predicted)
-    stdev = float(stdev)
+    # Sample from a normal distribution, clamped at 0 (rare but possible)
+    return simulate_matrix([float(predicted)], [float(stdev)], n_sims, rng)[0]
 
-    # Sample from a normal distribution
-    sims = np.random.normal(loc=predicted, scale=stdev, size=n_sims)
 
-    # Clamp negative scores to 0 (rare but possible)
-    sims = np.clip(sims, 0, None)
+def _report(player, predicted, stdev, raw_sims, keep_distribution=True):
+    captain_sims = raw_sims * 2  # Doubled score
 
-    return sims
+    report = {
+        "player": player["web_name"],
+        "predicted": predicted,
+        "stdev": round(stdev, 2),
+        "expected_points": round(raw_sims.mean(), 2),
+        "expected_captain_points": round(captain_sims.mean(), 2),
+        "haul_probability": (round((raw_sims >= HAUL_THRESHOLD).mean(), 3)),
+        "blank_probability": round((raw_sims <= BLANK_THRESHOLD).mean(), 3),
+    }
+
+    # The raw draws are n_sims floats per player; only keep them on request
+    if keep_distribution:
+        report["distribution"] = raw_sims
+
+    return report
 
 
-def captaincy_report(player, n_sims=10000):
+def captaincy_report(player, n_sims=10000, rng=None, keep_distribution=True):
     """
     Generates a captaincy profile for a single player:
     - expected points
@@ -32,56 +52,41 @@ def captaincy_report(player, n_sims=10000):
     """
 
     predicted = float(player["predicted_score"])
-    form = float(player.get("form", 0))
-    xgi = float(player.get("xGI", 0))
 
     # Estimate variance:
     # High xGI → higher variance (more explosive player)
-    pos = player.get("pos")
+    stdev = float(captaincy_stdev([player.get("pos")], [player.get("xGI", 0)])[0])
 
-    if pos == "GK":
-        base_stdev = 1.2
-    elif pos == "DEF":
-        base_stdev = 1.6
-    elif pos == "MID":
-        base_stdev = 2.3
-    else:  # FWD
-        base_stdev = 3.0
+    raw_sims = simulate_player_points(predicted, stdev, n_sims, rng)
 
-    # Add explosiveness from attacking involvement
-    explosiveness = xgi * 0.4
+    return _report(player, predicted, stdev, raw_sims, keep_distribution)
 
-    stdev = max(base_stdev, base_stdev + explosiveness)
-
-    raw_sims = simulate_player_points(predicted, stdev, n_sims)
-
-    captain_sims = raw_sims * 2  # Doubled score
 
-    report = {
-        "player": player["web_name"],
-        "predicted": predicted,
-        "stdev": round(stdev, 2),
-        "expected_points": round(raw_sims.mean(), 2),
-        "expected_captain_points": round(captain_sims.mean(), 2),
-        "haul_probability": (round((raw_sims >= 12).mean(), 3)),
-        "blank_probability": round((raw_sims <= 2).mean(), 3),
-        "distribution": raw_sims
-    }
-
-    return report
-
-
-def compare_captains(players, n_sims=10000):
+def compare_captains(players, n_sims=10000, seed=None, keep_distribution=True):
     """
     Compare multiple captaincy options head-to-head.
 
     players: list of player dictionaries
     returns a sorted list from best → worst captain choice.
+    All players are simulated in one (players × n_sims) draw.
     """
 
-    outputs = []
-    for p in players:
-        outputs.append(captaincy_report(p, n_sims=n_sims))
+    if not players:
+        return []
+
+    frame = pd.DataFrame(players)
+    predicted = frame["predicted_score"].astype(float).to_numpy()
+    stdev = captaincy_stdev(
+        frame["pos"].to_numpy() if "pos" in frame else [None] * len(frame),
+        frame["xGI"].to_numpy() if "xGI" in frame else np.zeros(len(frame)),
+    )
+
+    sims = simulate_matrix(predicted, stdev, n_sims, np.random.default_rng(seed))
+
+    outputs = [
+        _report(p, float(predicted[i]), float(stdev[i]), sims[i], keep_distribution)
+        for i, p in enumerate(players)
+    ]
 
     # Sort by expected captain return
     outputs.sort(key=lambda x: x["expected_captain_points"], reverse=True)
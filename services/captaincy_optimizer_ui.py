@@ -3,9 +3,11 @@ import pandas as pd
 from services.captaincy_optimizer import compare_captains
 
 
-def display_captaincy_optimizer(df):
+def display_captaincy_optimizer(df, sim_table=None):
     """
     df: Pandas DataFrame of all FPL players, with predicted_score already added.
+    sim_table: optional precomputed services.simulation table (indexed by id);
+    when given, selections are looked up instead of simulated per click.
     """
 
     st.title("📊 Captaincy Optimizer")
@@ -28,14 +30,21 @@ def display_captaincy_optimizer(df):
     # Extract only selected players
     selected_df = df[df["web_name"].isin(selected_names)]
 
-    # Convert to dict format for simulations
-    selected_players = selected_df.to_dict("records")
-
-    # Run the simulation
-    results = compare_captains(selected_players, n_sims=8000)
-
-    # Convert results to DataFrame for clean display
-    results_df = pd.DataFrame(results)
+    if sim_table is not None:
+        results_df = (
+            sim_table.loc[selected_df["id"]]
+            .sort_values("expected_captain_points", ascending=False)
+            .reset_index(drop=True)
+        )
+    else:
+        # Convert to dict format for simulations
+        selected_players = selected_df.to_dict("records")
+
+        # Run the simulation
+        results = compare_captains(selected_players, n_sims=8000, keep_distribution=False)
+
+        # Convert results to DataFrame for clean display
+        results_df = pd.DataFrame(results)
 
     # Identify the best captain
     best_pick = results_df.loc[results_df["expected_captain_points"].idxmax()]
@@ -0,0 +1,320 @@
+# services/fpl_cache.py
+
+import asyncio
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+import aiohttp
+
+API_URL = "https://fantasy.premierleague.com/api"
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / "cache" / "fpl"
+
+# Bootstrap fields that change whenever a player's match history changes.
+# Summaries are only re-fetched for players whose signature moved.
+SUMMARY_SIGNATURE_FIELDS = ("total_points", "minutes", "event_points", "form")
+
+
+# ---------------------------------------------------------
+# Data sources
+# ---------------------------------------------------------
+class FPLApiSource:
+    """
+    Fetches raw payloads from the official FPL API.
+    Any object with the same two methods can be used instead
+    (e.g. a local stand-in for tests or offline development).
+    """
+
+    def __init__(self, concurrency=20, timeout=30):
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+    async def _get_json(self, session, url):
+        async with session.get(url) as resp:
+            resp.raise_for_status()
+            return await resp.json()
+
+    async def _fetch_bootstrap(self):
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            return await self._get_json(session, f"{API_URL}/bootstrap-static/")
+
+    async def _fetch_summaries(self, player_ids):
+        sem = asyncio.Semaphore(self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+
+            async def one(pid):
+                async with sem:
+                    return pid, await self._get_json(
+                        session, f"{API_URL}/element-summary/{pid}/"
+                    )
+
+            results = await asyncio.gather(*(one(pid) for pid in player_ids))
+
+        return dict(results)
+
+    def fetch_bootstrap(self):
+        """Raw bootstrap-static payload."""
+        return asyncio.run(self._fetch_bootstrap())
+
+    def fetch_summaries(self, player_ids):
+        """Raw element-summary payloads keyed by player id."""
+        if not player_ids:
+            return {}
+        return asyncio.run(self._fetch_summaries(list(player_ids)))
+
+
+# ---------------------------------------------------------
+# Storage backends
+# ---------------------------------------------------------
+class FileCacheStore:
+    """
+    Stores one JSON snapshot per gameweek key in a local directory,
+    plus a `latest.json` pointer. Writes are atomic (tmp file + rename).
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, keep=3):
+        self.directory = Path(directory)
+        self.keep = keep
+
+    def _path(self, key):
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", key)
+        return self.directory / f"snapshot-{safe}.json"
+
+    def _write_json(self, path, payload):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(payload, f)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def modified_at(self):
+        """mtime of the `latest.json` pointer, or None if there is none."""
+        try:
+            return (self.directory / "latest.json").stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def load_latest(self):
+        pointer = self.directory / "latest.json"
+        try:
+            with open(pointer) as f:
+                key = json.load(f)["key"]
+            with open(self._path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, snapshot):
+        self._write_json(self._path(snapshot["key"]), snapshot)
+        self._write_json(self.directory / "latest.json", {"key": snapshot["key"]})
+        self._prune()
+
+    def _prune(self):
+        files = sorted(
+            self.directory.glob("snapshot-*.json"),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+        for old in files[self.keep:]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+
+def gameweek_key(bootstrap):
+    """
+    Cache key for a bootstrap payload: the next (or current) gameweek id
+    plus its deadline, so a new deadline always gets a fresh snapshot.
+    """
+    events = bootstrap.get("events", []) or []
+    event = next((e for e in events if e.get("is_next")), None)
+    if event is None:
+        event = next((e for e in events if e.get("is_current")), None)
+    if event is None:
+        return "gw0"
+    return f"gw{event.get('id')}-{event.get('deadline_time')}"
+
+
+def key_deadline(key):
+    """Deadline (epoch seconds) encoded in a gameweek_key, or None."""
+    match = re.fullmatch(r"gw\d+-(.+)", str(key))
+    if match is None:
+        return None
+    try:
+        return datetime.fromisoformat(match.group(1).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def players_from_snapshot(snapshot):
+    """Merges each bootstrap element with its element-summary payload."""
+    summaries = snapshot["summaries"]
+    return [
+        {**p, **summaries.get(str(p["id"]), {})}
+        for p in snapshot["bootstrap"].get("elements", [])
+    ]
+
+
+def _signature(element):
+    return [element.get(f) for f in SUMMARY_SIGNATURE_FIELDS]
+
+
+# ---------------------------------------------------------
+# Cache
+# ---------------------------------------------------------
+class FPLCache:
+    """
+    TTL cache for the bootstrap + element-summary payloads behind
+    FPLClient.
+
+    - Fresh snapshots (younger than `ttl` seconds) are served directly.
+    - With `stale_while_revalidate`, stale snapshots are served immediately
+      while a single background thread refreshes them.
+    - Refreshes are conditional: summaries are only re-fetched for players
+      whose bootstrap signature changed, unless the gameweek key moved.
+    - Before refreshing, a newer snapshot saved to the store by another
+      process (e.g. the prewarm worker) is reused instead.
+    """
+
+    def __init__(self, source=None, store=None, ttl=15 * 60, stale_while_revalidate=True):
+        self.source = source or FPLApiSource()
+        self.store = store or FileCacheStore()
+        self.ttl = ttl
+        self.stale_while_revalidate = stale_while_revalidate
+
+        self._snapshot = None
+        self._store_version = None
+        self._lock = threading.Lock()
+        self._refresh_thread = None
+
+    # ---------------------------
+    # Snapshot access
+    # ---------------------------
+    def _current(self):
+        if self._snapshot is None:
+            self._store_version = self.store.modified_at()
+            self._snapshot = self.store.load_latest()
+        return self._snapshot
+
+    def _reload(self):
+        """
+        Picks up a newer snapshot that another process (e.g. the prewarm
+        worker) saved to the shared store since this one was loaded.
+        """
+        version = self.store.modified_at()
+        if version is None or version == self._store_version:
+            return
+        self._store_version = version
+        stored = self.store.load_latest()
+        current = self._snapshot
+        if stored is not None and (current is None or stored["fetched_at"] > current["fetched_at"]):
+            self._snapshot = stored
+
+    def is_fresh(self, snapshot):
+        return snapshot is not None and time.time() - snapshot["fetched_at"] < self.ttl
+
+    def get_snapshot(self):
+        """
+        Returns the cached snapshot dict:
+        {"key", "fetched_at", "bootstrap", "summaries"}.
+        """
+        snapshot = self._current()
+
+        if not self.is_fresh(snapshot):
+            self._reload()
+            snapshot = self._snapshot
+
+        if self.is_fresh(snapshot):
+            return snapshot
+
+        if snapshot is not None and self.stale_while_revalidate:
+            self.refresh_async()
+            return snapshot
+
+        return self.refresh()
+
+    def get_players(self):
+        """
+        Bootstrap elements merged with their element-summary payload,
+        the same shape fpl's `get_players(include_summary=True)` returns.
+        """
+        return players_from_snapshot(self.get_snapshot())
+
+    # ---------------------------
+    # Refresh
+    # ---------------------------
+    def refresh(self):
+        """Fetches a new snapshot synchronously and persists it."""
+        with self._lock:
+            previous = self._current()
+            bootstrap = self.source.fetch_bootstrap()
+            key = gameweek_key(bootstrap)
+
+            elements = bootstrap.get("elements", [])
+            summaries = {}
+
+            if previous is not None and previous["key"] == key:
+                old_signatures = {
+                    p["id"]: _signature(p)
+                    for p in previous["bootstrap"].get("elements", [])
+                }
+                summaries = {
+                    str(p["id"]): previous["summaries"][str(p["id"])]
+                    for p in elements
+                    if str(p["id"]) in previous["summaries"]
+                    and old_signatures.get(p["id"]) == _signature(p)
+                }
+
+            to_fetch = [p["id"] for p in elements if str(p["id"]) not in summaries]
+
+            fetched = self.source.fetch_summaries(to_fetch)
+            summaries.update({str(pid): s for pid, s in fetched.items()})
+
+            snapshot = {
+                "key": key,
+                "fetched_at": time.time(),
+                "bootstrap": bootstrap,
+                "summaries": summaries,
+            }
+            self.store.save(snapshot)
+            self._snapshot = snapshot
+            self._store_version = self.store.modified_at()
+            return snapshot
+
+    def refresh_async(self):
+        """Starts a background refresh unless one is already running."""
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return self._refresh_thread
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the stale snapshot; next call retries
+                print(f"FPL cache refresh failed: {e}")
+
+        self._refresh_thread = threading.Thread(target=run, daemon=True)
+        self._refresh_thread.start()
+        return self._refresh_thread
+
+
+@lru_cache(maxsize=1)
+def get_default_cache():
+    """Process-wide cache shared by every FPLClient (and Streamlit rerun)."""
+    return FPLCache()
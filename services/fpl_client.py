@@ -1,38 +1,59 @@
 # services/fpl_client.py
 
-import asyncio
-import aiohttp
-from fpl import FPL
 import pandas as pd
 
-async def fetch_players_async():
+from services.fpl_cache import get_default_cache, players_from_snapshot
+from services.match_history import MatchHistory
+
+
+class FPLClient:
     """
-    Fetch players using the FPL API.
-    `include_summary=True` gives full metadata,
-    `return_json=True` returns raw JSON (easier to extract fields).
+    Sync wrapper for FPL fetching (Streamlit compatible).
+    Raw payloads come from an FPLCache, so reruns reuse the last snapshot
+    instead of requesting every element summary again.
     """
-    async with aiohttp.ClientSession() as session:
-        fpl = FPL(session)
-        players = await fpl.get_players(include_summary=True, return_json=True)
-        return players
 
+    def __init__(self, cache=None):
+        self.cache = cache or get_default_cache()
 
-class FPLClient:
-    """Sync wrapper for async FPL fetching (Streamlit compatible)."""
+        # Columnar per-match history and gameweek key
+        # from the last get_players_df call
+        self.match_history = None
+        self.gameweek = None
+
+        # Upcoming fixtures (id, event, opponent, is_home),
+        # one row per fixture, for multi-gameweek predictions
+        self.fixtures = None
 
     def get_players_df(self):
-        # Fetch raw data
-        data = asyncio.run(fetch_players_async())
+        # Fetch raw data (cached bootstrap + element summaries)
+        snapshot = self.cache.get_snapshot()
+        data = players_from_snapshot(snapshot)
+        self.gameweek = snapshot["key"]
 
         rows = []
+        histories = []
+        fixture_rows = []
         for p in data:
 
-            # Recent match history for charts
-            history = p.get("history", [])
-            last5 = history[-5:] if len(history) >= 5 else history
+            # Full match history goes to the columnar store,
+            # rows only keep the last 5 points for charts
+            history = p.get("history", []) or []
+            histories.append(history)
+            last5 = history[-5:]
 
             # Extract opponent for next fixture
             fixtures = p.get("fixtures", [])
+            for f in fixtures:
+                if f.get("event") is None:
+                    continue  # not scheduled yet
+                fixture_rows.append({
+                    "id": p["id"],
+                    "event": f["event"],
+                    "opponent": f.get("team_a") if f.get("is_home") else f.get("team_h"),
+                    "is_home": bool(f.get("is_home")),
+                })
+
             if fixtures and len(fixtures) > 0:
                 next_fixture = fixtures[0]
                 next_is_home = next_fixture.get("is_home", None)
@@ -54,6 +75,7 @@ class FPLClient:
                 "total_points": p["total_points"],
                 "minutes": p["minutes"],
                 "form": float(p.get("form", 0)),
+                "selected_by_percent": float(p.get("selected_by_percent", 0) or 0),
 
                 # Advanced stats
                 "xG": p.get("expected_goals", 0),
@@ -63,13 +85,9 @@ class FPLClient:
                 "threat": p.get("threat", 0),
                 "creativity": p.get("creativity", 0),
                 "influence": p.get("influence", 0),
-                "recent_matches_values": [float(m.get("total_points", 0)) for m in last5],
-
-
 
                 # For graphs
-                "recent_matches": last5,    
-                "recent_matches_values": [m.get("total_points", 0) for m in last5],
+                "recent_matches_values": [float(m.get("total_points", 0)) for m in last5],
 
                 "team_strength": 3,  # placeholder, improves ML stability
 
@@ -78,4 +96,11 @@ class FPLClient:
                 "next_is_home": next_is_home,
             })
 
+        self.match_history = MatchHistory.from_histories(
+            [p["id"] for p in data], histories
+        )
+        self.fixtures = pd.DataFrame(
+            fixture_rows, columns=["id", "event", "opponent", "is_home"]
+        )
+
         return pd.DataFrame(rows)
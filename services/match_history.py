@@ -0,0 +1,117 @@
+# services/match_history.py
+
+import numpy as np
+import pandas as pd
+
+from utils.feature_engineering import prefix_sums, segment_tail_mean
+
+# element-summary history keys kept in the columnar store
+HISTORY_FIELDS = {
+    "total_points": "points",
+    "expected_goal_involvements": "xgi",
+    "minutes": "minutes",
+}
+
+
+def _flat_numeric(histories, key, dtype=np.float32):
+    """Flattens one key of every history entry into a numeric array."""
+    values = [m.get(key, 0) for h in histories for m in h]
+    return (
+        pd.to_numeric(pd.Series(values, dtype=object), errors="coerce")
+        .fillna(0.0)
+        .to_numpy(dtype=dtype)
+    )
+
+
+class MatchHistory:
+    """
+    Compact ragged store of per-match history for every player.
+
+    Matches of player i live in positions offsets[i]:offsets[i + 1] of the
+    flat `points`, `xgi` and `minutes` arrays, oldest first.
+    Window reductions use cumulative sums over those segments, so no
+    Python-level loop over players or matches is needed.
+
+    Points and minutes are whole numbers and fit float32 exactly; xGI is
+    kept as float64 so its means match the model's split thresholds.
+    """
+
+    def __init__(self, player_ids, offsets, points, xgi, minutes):
+        self.player_ids = np.asarray(player_ids, dtype=np.int64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.points = np.asarray(points, dtype=np.float32)
+        self.xgi = np.asarray(xgi, dtype=np.float64)
+        self.minutes = np.asarray(minutes, dtype=np.float32)
+        self._index = pd.Index(self.player_ids)
+        self._prefix_cache = {}
+
+    @classmethod
+    def from_histories(cls, player_ids, histories):
+        """
+        Builds the store from raw element-summary `history` lists,
+        one list per entry of `player_ids`.
+        """
+        histories = [h or [] for h in histories]
+        lengths = np.fromiter((len(h) for h in histories), dtype=np.int64, count=len(histories))
+        offsets = np.zeros(len(histories) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        return cls(
+            player_ids,
+            offsets,
+            _flat_numeric(histories, "total_points"),
+            _flat_numeric(histories, "expected_goal_involvements", np.float64),
+            _flat_numeric(histories, "minutes"),
+        )
+
+    def __len__(self):
+        return len(self.player_ids)
+
+    @property
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    @property
+    def nbytes(self):
+        return sum(
+            a.nbytes for a in (self.player_ids, self.offsets, self.points, self.xgi, self.minutes)
+        )
+
+    def _field(self, field):
+        return getattr(self, HISTORY_FIELDS.get(field, field))
+
+    def _prefix(self, field):
+        """Zero-prefixed cumulative sums of a field, cached per field."""
+        name = HISTORY_FIELDS.get(field, field)
+        if name not in self._prefix_cache:
+            self._prefix_cache[name] = prefix_sums(self._field(name))
+        return self._prefix_cache[name]
+
+    def tail_mean(self, field, window):
+        """
+        Mean of the last `window` matches for every player.
+        Players without any history get NaN.
+        """
+        return segment_tail_mean(
+            self._field(field), self.offsets, window, prefix=self._prefix(field)
+        )
+
+    def tail_mean_for(self, player_ids, field, window, fallback=np.nan):
+        """
+        tail_mean aligned to `player_ids`. Unknown players or players
+        without history get the matching `fallback` value.
+        """
+        means = self.tail_mean(field, window)
+        pos = self._index.get_indexer(np.asarray(player_ids))
+
+        out = np.where(pos >= 0, means[np.maximum(pos, 0)], np.nan)
+        return np.where(np.isnan(out), fallback, out)
+
+    def recent(self, player_id, field, n=5):
+        """Last `n` values of `field` for a single player (oldest first)."""
+        pos = self._index.get_indexer([player_id])[0]
+        if pos < 0:
+            return np.zeros(0, dtype=np.float32)
+        end = self.offsets[pos + 1]
+        start = max(self.offsets[pos], end - n)
+        return self._field(field)[start:end]
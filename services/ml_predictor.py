@@ -1,99 +1,211 @@
 # services/ml_predictor.py
 
+import os
+
 import numpy as np
 import pandas as pd
-import joblib
 
-# Load trained model
-_model = joblib.load("models/xgb_fpl_model.pkl")
+from services.match_history import MatchHistory
+from services.model_registry import get_model, model_version
+from services.tree_engine import get_tree_ensemble
+from utils.feature_engineering import FEATURES, FORM_WINDOW, XGI_WINDOW
+from utils.fixture_difficulty import TEAM_FDR
 
+# "xgboost": always XGBoost; "numpy": flattened tree engine;
+# "auto": tree engine for small batches (interactive tabs), XGBoost otherwise
+INFERENCE_BACKENDS = ("auto", "xgboost", "numpy")
+AUTO_NUMPY_MAX_ROWS = 64
 
-def prepare_features(row):
+_backend = os.environ.get("FPL_INFERENCE_BACKEND", "auto")
+
+
+def set_inference_backend(name):
+    """Selects the backend used by every predict_* function."""
+    global _backend
+    if name not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend {name!r}; choose from {INFERENCE_BACKENDS}")
+    _backend = name
+
+
+def get_inference_backend():
+    return _backend
+
+
+def _predict_matrix(X, backend=None):
+    """Runs the model on a prepared feature DataFrame."""
+    backend = backend or _backend
+    model = get_model()
+
+    if backend == "numpy" or (backend == "auto" and len(X) <= AUTO_NUMPY_MAX_ROWS):
+        engine = get_tree_ensemble(model, model_version())
+        return engine.predict(X[FEATURES].to_numpy(dtype=np.float32)).astype(float)
+
+    return np.asarray(model.predict(X[FEATURES]), dtype=float)
+
+
+def _numeric_column(df, column, default):
     """
-    Builds a single-row feature DataFrame for model prediction.
+    Returns a float column, or a constant column if it is missing.
+    Unparseable values fall back to 0 like the old per-row float() casts.
+    """
+    if column not in df.columns:
+        return pd.Series(float(default), index=df.index)
+    return pd.to_numeric(df[column], errors="coerce").fillna(0.0).astype(float)
+
+
+def _rolling_features(df, history, form, xGI):
+    """
+    Resolves rolling_form / rolling_xgi from, in order of preference:
+    a MatchHistory store, precomputed columns, or legacy recent_matches
+    lists. Players without history fall back to form / xGI.
+    """
+    if history is not None:
+        ids = df["id"].to_numpy()
+        rolling_form = history.tail_mean_for(ids, "total_points", FORM_WINDOW, form.to_numpy())
+        rolling_xgi = history.tail_mean_for(ids, "expected_goal_involvements", XGI_WINDOW, xGI.to_numpy())
+        return (
+            pd.Series(rolling_form, index=df.index),
+            pd.Series(rolling_xgi, index=df.index),
+        )
+
+    if "rolling_form" in df.columns and "rolling_xgi" in df.columns:
+        return (
+            pd.to_numeric(df["rolling_form"], errors="coerce").fillna(form),
+            pd.to_numeric(df["rolling_xgi"], errors="coerce").fillna(xGI),
+        )
+
+    if "recent_matches" in df.columns:
+        # Legacy rows carrying raw match dicts: pack them into a store first
+        matches = [m if isinstance(m, list) else [] for m in df["recent_matches"]]
+        history = MatchHistory.from_histories(np.arange(len(df)), matches)
+        rolling_form = history.tail_mean("total_points", FORM_WINDOW)
+        rolling_xgi = history.tail_mean("expected_goal_involvements", XGI_WINDOW)
+        return (
+            pd.Series(np.where(np.isnan(rolling_form), form, rolling_form), index=df.index),
+            pd.Series(np.where(np.isnan(rolling_xgi), xGI, rolling_xgi), index=df.index),
+        )
+
+    return form, xGI
+
+
+def add_rolling_features(df, history):
+    """
+    Returns a copy of `df` with rolling_form / rolling_xgi columns computed
+    from a MatchHistory store, so single-row callers see the same features.
+    """
+    df = df.copy()
+    form = _numeric_column(df, "form", 0)
+    xGI = _numeric_column(df, "xGI", 0)
+    df["rolling_form"], df["rolling_xgi"] = _rolling_features(df, history, form, xGI)
+    return df
+
+
+def build_feature_matrix(df, history=None):
+    """
+    Builds the model feature DataFrame for every player in `df`
+    using column operations.
     Includes position-aware feature gating (GK ≠ attacker).
     """
 
-    matches = row.get("recent_matches", [])
-
-    # -----------------------
-    # Rolling form (last 5)
-    # -----------------------
-    pts = []
-    for m in matches[-5:]:
-        try:
-            pts.append(float(m.get("total_points", 0)))
-        except Exception:
-            pts.append(0.0)
-
-    rolling_form = float(np.mean(pts)) if pts else float(row.get("form", 0))
-
-    # -----------------------
-    # Rolling xGI (last 3)
-    # -----------------------
-    xgi_vals = []
-    for m in matches[-3:]:
-        try:
-            xgi_vals.append(float(m.get("expected_goal_involvements", 0)))
-        except Exception:
-            xgi_vals.append(0.0)
-
-    rolling_xgi = float(np.mean(xgi_vals)) if xgi_vals else float(row.get("xGI", 0))
-
-    # -----------------------
-    # Position encoding
-    # -----------------------
-    pos_map = {"GK": 1, "DEF": 2, "MID": 3, "FWD": 4}
-    position = int(row.get("position", 0))
-
-    # -----------------------
-    # Base features
-    # -----------------------
-    minutes = float(row.get("minutes", 0))
-    xG = float(row.get("xG", 0))
-    xA = float(row.get("xA", 0))
-    xGI = float(row.get("xGI", 0))
-    ict_index = float(row.get("ict_index", 0))
-    team_strength = float(row.get("team_strength", 3))
-    was_home = 1 if row.get("next_is_home") else 0
-    opponent_strength = float(row.get("fixture_difficulty", 3))
+    form = _numeric_column(df, "form", 0)
+    xGI = _numeric_column(df, "xGI", 0)
 
-    # ------------------------------------------------
-    # 🔒 POSITION-AWARE FEATURE GATING (KEY FIX)
-    # ------------------------------------------------
-    # Goalkeepers should NEVER use attacking metrics
-    if position == 1:  # GK
-        xG = 0.0
-        xA = 0.0
-        xGI = 0.0
-        rolling_xgi = 0.0
-
-    # -----------------------
-    # Final feature dict
-    # -----------------------
-    features = {
-        "minutes": minutes,
-        "xG": xG,
-        "xA": xA,
+    # Rolling form (last 5) and rolling xGI (last 3)
+    rolling_form, rolling_xgi = _rolling_features(df, history, form, xGI)
+
+    if "next_is_home" in df.columns:
+        was_home = df["next_is_home"].fillna(False).astype(bool).astype(int)
+    else:
+        was_home = pd.Series(0, index=df.index)
+
+    X = pd.DataFrame({
+        "minutes": _numeric_column(df, "minutes", 0),
+        "xG": _numeric_column(df, "xG", 0),
+        "xA": _numeric_column(df, "xA", 0),
         "xGI": xGI,
-        "ict_index": ict_index,
-        "team_strength": team_strength,
+        "ict_index": _numeric_column(df, "ict_index", 0),
+        "team_strength": _numeric_column(df, "team_strength", 3),
         "was_home": was_home,
         "rolling_form": rolling_form,
         "rolling_xgi": rolling_xgi,
-        "position_encoded": position,
-        "opponent_strength": opponent_strength,
-    }
+        "position_encoded": _numeric_column(df, "position", 0).astype(int),
+        "opponent_strength": _numeric_column(df, "fixture_difficulty", 3),
+    }, index=df.index)
 
-    return pd.DataFrame([features])
+    # ------------------------------------------------
+    # 🔒 POSITION-AWARE FEATURE GATING (KEY FIX)
+    # ------------------------------------------------
+    # Goalkeepers should NEVER use attacking metrics
+    gk_mask = X["position_encoded"] == 1
+    X.loc[gk_mask, ["xG", "xA", "xGI", "rolling_xgi"]] = 0.0
+
+    return X[FEATURES]
+
+
+def prepare_features(row):
+    """
+    Builds a single-row feature DataFrame for model prediction.
+    Thin wrapper around build_feature_matrix.
+    """
+    return build_feature_matrix(pd.DataFrame([row])).reset_index(drop=True)
+
+
+def predict_scores(df, history=None, backend=None):
+    """
+    Predicts FPL points for every player in `df` with a single model call.
+    Returns a float array aligned with the rows of `df`.
+    """
+    if len(df) == 0:
+        return np.zeros(0, dtype=float)
+
+    X = build_feature_matrix(df, history)
+    return _predict_matrix(X, backend)
+
+
+def predict_horizon(df, fixtures, horizon=None, history=None, backend=None):
+    """
+    Predicted points per upcoming gameweek for every player in `df`.
+
+    `fixtures` has one row per fixture (id, event, opponent, is_home),
+    e.g. FPLClient.fixtures. Each fixture reuses the player's feature row
+    with its own venue and opponent difficulty, and all fixtures go
+    through a single model call. Blank gameweeks score 0, double
+    gameweeks sum both fixtures.
+
+    Returns a DataFrame indexed by player id with one column per event
+    (the first `horizon` events if given).
+    """
+    events = np.sort(fixtures["event"].unique())
+    if horizon is not None:
+        events = events[:horizon]
+    ids = df["id"].to_numpy()
+    out = pd.DataFrame(0.0, index=pd.Index(ids, name="id"), columns=events)
+
+    fixtures = fixtures[fixtures["event"].isin(events) & fixtures["id"].isin(ids)]
+    if len(fixtures) == 0:
+        return out
+
+    X = build_feature_matrix(df, history).reset_index(drop=True)
+    rows = pd.Index(ids).get_indexer(fixtures["id"])
+    X = X.iloc[rows].reset_index(drop=True)
+    X["was_home"] = fixtures["is_home"].fillna(False).astype(bool).astype(int).to_numpy()
+    X["opponent_strength"] = (
+        fixtures["opponent"].map(TEAM_FDR).fillna(3).astype(float).to_numpy()
+    )
+
+    points = pd.Series(_predict_matrix(X, backend), index=pd.MultiIndex.from_arrays(
+        [fixtures["id"].to_numpy(), fixtures["event"].to_numpy()]
+    ))
+    per_event = points.groupby(level=[0, 1]).sum().unstack(fill_value=0.0)
+    out.loc[per_event.index, per_event.columns] = per_event
+    return out
 
 
 def predict_player_score(row):
     """
     Predicts FPL points for a single player row.
     """
-    X = prepare_features(row)
-    return float(_model.predict(X)[0])
+    return float(predict_scores(pd.DataFrame([row]))[0])
 
 
 def predict_from_features(X):
@@ -101,4 +213,4 @@ def predict_from_features(X):
     Predict directly from a prepared feature DataFrame.
     Used for explainability and uncertainty modules.
     """
-    return float(_model.predict(X)[0])
+    return float(_predict_matrix(X)[0])
@@ -0,0 +1,112 @@
+# services/model_registry.py
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from utils.feature_engineering import FEATURES
+
+MODELS_DIR = Path(__file__).resolve().parent.parent / "models"
+DEFAULT_MODEL = "xgb_fpl_model"
+
+_lock = threading.Lock()
+_loaded = {}
+
+
+def model_path(name=DEFAULT_MODEL, models_dir=MODELS_DIR):
+    return Path(models_dir) / f"{name}.ubj"
+
+
+def manifest_path(name=DEFAULT_MODEL, models_dir=MODELS_DIR):
+    return Path(models_dir) / f"{name}.manifest.json"
+
+
+def _atomic_write(path, data, mode="wb"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, mode) as f:
+        f.write(data)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+
+def save_model(model, name=DEFAULT_MODEL, features=FEATURES, data_hash=None,
+               metrics=None, models_dir=MODELS_DIR, extra=None):
+    """
+    Stores a trained XGBRegressor / Booster in XGBoost's native UBJ format
+    next to a JSON manifest (features, training data hash, metrics).
+    Returns the manifest.
+    """
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    raw = bytes(booster.save_raw(raw_format="ubj"))
+
+    manifest = {
+        "name": name,
+        "version": hashlib.sha256(raw).hexdigest()[:12],
+        "format": "ubj",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "features": list(features),
+        "training_data_hash": data_hash,
+        "metrics": metrics or {},
+        **(extra or {}),
+    }
+
+    _atomic_write(model_path(name, models_dir), raw)
+    _atomic_write(
+        manifest_path(name, models_dir), json.dumps(manifest, indent=2) + "\n", mode="w"
+    )
+
+    # Next get_model() call picks up the new artifact
+    with _lock:
+        _loaded.pop((name, str(models_dir)), None)
+
+    return manifest
+
+
+def load_manifest(name=DEFAULT_MODEL, models_dir=MODELS_DIR):
+    with open(manifest_path(name, models_dir)) as f:
+        return json.load(f)
+
+
+def _load(name, models_dir):
+    from xgboost import XGBRegressor
+
+    manifest = load_manifest(name, models_dir)
+    if manifest["features"] != list(FEATURES):
+        raise ValueError(
+            f"Model {name} was trained on {manifest['features']}, "
+            f"but the app builds {list(FEATURES)}"
+        )
+
+    model = XGBRegressor()
+    model.load_model(model_path(name, models_dir))
+    return model, manifest
+
+
+def get_model(name=DEFAULT_MODEL, models_dir=MODELS_DIR):
+    """
+    Loads the model on first use and returns the same instance afterwards.
+    The cache is process-wide, so every Streamlit session shares it.
+    """
+    key = (name, str(models_dir))
+    entry = _loaded.get(key)
+    if entry is None:
+        with _lock:
+            entry = _loaded.get(key)
+            if entry is None:
+                entry = _loaded[key] = _load(name, models_dir)
+    return entry[0]
+
+
+def get_manifest(name=DEFAULT_MODEL, models_dir=MODELS_DIR):
+    """Manifest of the loaded model (loads it if needed)."""
+    get_model(name, models_dir)
+    return _loaded[(name, str(models_dir))][1]
+
+
+def model_version(name=DEFAULT_MODEL, models_dir=MODELS_DIR):
+    return get_manifest(name, models_dir)["version"]
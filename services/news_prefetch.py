@@ -0,0 +1,148 @@
+# services/news_prefetch.py
+#
+# Batch job that prefetches and scores news headlines for every player in
+# the current snapshot, most owned (or highest predicted) first, and
+# writes the compact per-player sentiment table the app joins on id.
+# Refreshes are incremental: only feed entries not seen before are scored.
+#
+# Run from the repo root: python -m services.news_prefetch [--limit N]
+
+import argparse
+import time
+
+import pandas as pd
+
+from rag.news import (
+    SENTIMENT_COLUMNS,
+    GoogleNewsSource,
+    NewsCache,
+    NewsSentimentStore,
+    get_default_news,
+    get_default_news_store,
+)
+from rag.sentiment import get_default_scorer, headline_key, sentiment_icon
+from utils.log import log
+
+PREFETCH_RESULTS = 10   # feed entries requested per player
+RECENT_HEADLINES = 20   # scored headlines kept per player
+MAX_AGE = 7 * 24 * 3600  # seconds a scored headline counts towards sentiment
+SEEN_HEADLINES = 200    # headline hashes remembered per player
+BATCH_SIZE = 50         # players fetched per concurrent batch
+RATE = 5.0              # feed requests started per second
+
+
+def rank_players(players, by="ownership"):
+    """
+    Players to prefetch in priority order: by ownership
+    (selected_by_percent) or by predicted_score, ties by table order.
+    """
+    column = "selected_by_percent" if by == "ownership" else "predicted_score"
+    if column not in players.columns:
+        column = "predicted_score"
+    key = pd.to_numeric(players[column], errors="coerce").fillna(0)
+    return players.loc[key.sort_values(ascending=False, kind="stable").index]
+
+
+def sentiment_table(state):
+    """The compact per-player table (SENTIMENT_COLUMNS) from prefetch state."""
+    rows = []
+    for pid, entry in state.items():
+        scores = [h["score"] for h in entry["recent"]]
+        mean = sum(scores) / len(scores) if scores else 0.0
+        rows.append({
+            "id": int(pid),
+            "web_name": entry["web_name"],
+            "news_sentiment": round(mean, 4),
+            "news_icon": sentiment_icon(mean),
+            "headlines": len(scores),
+            "updated_at": entry["updated_at"],
+        })
+    return pd.DataFrame(rows, columns=SENTIMENT_COLUMNS)
+
+
+def prefetch_news(players, news=None, scorer=None, store=None, by="ownership",
+                  limit=None, batch_size=BATCH_SIZE, max_results=PREFETCH_RESULTS,
+                  max_age=MAX_AGE):
+    """
+    Fetches headlines for the ranked players through the news cache (the
+    same path as live_rag.fetch_news_links), scores the unseen ones in a
+    single scorer batch, merges them into the stored state and writes the
+    sentiment table. Headlines first fetched more than `max_age` seconds
+    ago are dropped from every player's state, so old news stops counting.
+    Returns (table, number of new headlines).
+
+    With a StaticNewsSource-backed NewsCache and a temporary
+    NewsSentimentStore this runs fully offline.
+    """
+    news = news or get_default_news()
+    scorer = scorer or get_default_scorer()
+    store = store or get_default_news_store()
+
+    ranked = rank_players(players, by)
+    if limit is not None:
+        ranked = ranked.head(limit)
+
+    state = store.load_state()
+    now = time.time()
+    new_entries = []
+
+    for start in range(0, len(ranked), batch_size):
+        batch = ranked.iloc[start:start + batch_size]
+        articles = news.get_many(batch["web_name"].tolist(), max_results)
+
+        for pid, name in zip(batch["id"].tolist(), batch["web_name"].tolist()):
+            entry = state.setdefault(str(pid), {"web_name": name, "recent": [], "seen": []})
+            seen = set(entry["seen"])
+            fresh = []
+            for article in articles.get(name, []):
+                key = headline_key(article["title"])
+                if key not in seen:
+                    seen.add(key)
+                    fresh.append({"key": key, "title": article["title"],
+                                  "url": article["url"], "fetched_at": now})
+            entry["web_name"] = name
+            entry["updated_at"] = now
+            entry["seen"] = (entry["seen"] + [h["key"] for h in fresh])[-SEEN_HEADLINES:]
+            new_entries.append((entry, fresh))
+
+    titles = [h["title"] for _, fresh in new_entries for h in fresh]
+    scores = iter(scorer.score(titles))
+    for entry, fresh in new_entries:
+        for h in fresh:
+            h["score"] = next(scores)
+        entry["recent"] = (fresh + entry["recent"])[:RECENT_HEADLINES]
+
+    # Headlines stored before fetch times were recorded count as expired
+    cutoff = now - max_age
+    for entry in state.values():
+        entry["recent"] = [h for h in entry["recent"] if h.get("fetched_at", 0) >= cutoff]
+
+    table = sentiment_table(state)
+    store.save(state, table)
+    return table, len(titles)
+
+
+def main():
+    from services.snapshot import get_snapshot
+
+    parser = argparse.ArgumentParser(description="Prefetch news sentiment for the player pool.")
+    parser.add_argument("--by", choices=["ownership", "predicted"], default="ownership")
+    parser.add_argument("--limit", type=int, default=None, help="only the top N players")
+    parser.add_argument("--rate", type=float, default=RATE, help="feed requests per second")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--directory", default=None, help="sentiment table directory")
+    args = parser.parse_args()
+
+    # Fetch every feed now: a run is a refresh, not a cache read
+    news = NewsCache(GoogleNewsSource(concurrency=args.concurrency, rate=args.rate), ttl=0)
+    store = NewsSentimentStore(args.directory) if args.directory else NewsSentimentStore()
+
+    started = time.perf_counter()
+    table, new = prefetch_news(get_snapshot().players, news=news, store=store,
+                               by=args.by, limit=args.limit)
+    log(f"prefetched {len(table)} players, {new} new headlines "
+         f"in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
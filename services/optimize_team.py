@@ -10,7 +10,27 @@ POSITION_MAP = {
     4: "FWD"
 }
 
-def pick_best_xi(df: pd.DataFrame):
+def pick_best_xi(df: pd.DataFrame, method="exact", index=None):
+    """
+    Select the Best XI.
+
+    method="exact" solves the full problem (15-man squad, valid formation,
+    budget, max 3 per club) with services.squad_optimizer and returns the
+    starting XI of the optimal squad; method="greedy" uses the original
+    heuristic below. Falls back to greedy when scipy is unavailable.
+    Pass a PlayerIndex built once per gameweek to skip re-indexing `df`.
+    """
+    if method == "exact":
+        from services.squad_optimizer import milp, solve_squad
+
+        if milp is not None:
+            squad = solve_squad(df, index=index)
+            return squad[squad["starting"]].drop(columns="starting")
+
+    return greedy_best_xi(df, index=index)
+
+
+def greedy_best_xi(df: pd.DataFrame, index=None):
     """
     Select a Best XI squad using a simple greedy optimizer:
     - 1 GK
@@ -20,74 +40,36 @@ def pick_best_xi(df: pd.DataFrame):
     - 3 FLEX (highest predicted scores regardless of position)
     - Max 3 players per team
     - Budget <= 100.0
-    """
-
-    df = df.copy()
-
-    # Convert numeric safely
-    df["now_cost"] = pd.to_numeric(df["now_cost"], errors="coerce").fillna(5)
-    df["predicted_score"] = pd.to_numeric(df["predicted_score"], errors="coerce").fillna(0)
-
-    # Add human-readable positions
-    df["pos"] = df["position"].map(POSITION_MAP)
 
-    budget = 100.0
-    team_count = {}  # track max 3 per club
-    selected = []
-
-    def pick(position, count):
-        """Pick top players in a certain position."""
-        nonlocal budget, selected, team_count
-
-        subset = df[df["pos"] == position].sort_values("predicted_score", ascending=False)
-
-        for _, row in subset.iterrows():
-            team = row["team"]
-
-            # max 3 per club
-            if team_count.get(team, 0) >= 3:
-                continue
-
-            # enough budget?
-            if budget - row["now_cost"] < 0:
-                continue
-
-            # select player
-            selected.append(row)
-            budget -= row["now_cost"]
-            team_count[team] = team_count.get(team, 0) + 1
-
-            if len([s for s in selected if s["pos"] == position]) == count:
-                break
+    Runs on a PlayerIndex (score-sorted position arrays, club masks),
+    see PlayerIndex.greedy_xi for exclude / lock / budget what-ifs.
+    """
+    from services.player_index import PlayerIndex
 
-    # Required positions
-    pick("GK", 1)
-    pick("DEF", 3)
-    pick("MID", 3)
-    pick("FWD", 1)
+    index = index or PlayerIndex.from_frame(df)
+    return index.players(index.greedy_xi())
 
-    # Now fill 3 FLEX spots by highest predicted score
-    flex_needed = 3
-    remaining = df.sort_values("predicted_score", ascending=False)
 
-    for _, row in remaining.iterrows():
+def what_if_xi(df: pd.DataFrame, exclude=(), lock=(), budget=None, method="greedy", index=None):
+    """
+    Best XI for an interactive what-if (exclude / lock players, change
+    the budget), on a PlayerIndex built once per gameweek.
 
-        if len(selected) >= 11:
-            break
+    Defaults to the greedy, which answers thousands of queries per
+    second. method="exact" re-solves the squad MILP instead: optimal,
+    but only a few queries per second (even with highspy), so keep it
+    for the final pick rather than per-click queries.
+    """
+    from services.player_index import BUDGET, PlayerIndex
 
-        team = row["team"]
+    index = index or PlayerIndex.from_frame(df)
+    budget = BUDGET if budget is None else budget
 
-        if row["id"] in [s["id"] for s in selected]:
-            continue
-        if team_count.get(team, 0) >= 3:
-            continue
-        if budget - row["now_cost"] < 0:
-            continue
+    if method == "exact":
+        from services.squad_optimizer import milp, solve_index
 
-        selected.append(row)
-        budget -= row["now_cost"]
-        team_count[team] = team_count.get(team, 0) + 1
+        if milp is not None:
+            rows, starting = solve_index(index, budget, exclude=exclude, lock=lock)
+            return index.players(rows[starting])
 
-    # Convert final list to DataFrame
-    xi_df = pd.DataFrame(selected)
-    return xi_df
+    return index.players(index.greedy_xi(budget, exclude=exclude, lock=lock))
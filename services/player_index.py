@@ -0,0 +1,206 @@
+# services/player_index.py
+
+import numpy as np
+import pandas as pd
+
+from services.optimize_team import POSITION_MAP
+
+BUDGET = 100.0
+MAX_PER_CLUB = 3
+
+
+class PlayerIndex:
+    """
+    Per-gameweek arrays for squad selection, built once from the player
+    table and shared by the optimizers and what-if queries:
+
+    - score / cost / position / club arrays aligned with the table rows
+    - per-position row orders sorted by predicted score
+    - one membership mask per club (a bitset over rows)
+
+    Queries take exclude / lock id lists and a budget and work on these
+    arrays; the table itself is only indexed to return selected rows.
+    """
+
+    def __init__(self, frame, ids, score, cost, position, club, club_ids):
+        self.frame = frame
+        self.ids = ids
+        self.score = score
+        self.cost = cost
+        self.position = position
+        self.club = club
+        self.club_ids = club_ids
+
+        self.pos = np.array([POSITION_MAP.get(p) for p in position], dtype=object)
+        self.club_masks = club[None, :] == np.arange(len(club_ids))[:, None]
+
+        # Stable sorts: ties keep table order
+        self.order = np.argsort(-score, kind="stable")
+        self.by_position = {
+            name: self.order[position[self.order] == code]
+            for code, name in POSITION_MAP.items()
+        }
+        # Cheapest first (overall and per position): greedy_xi's budget reserve
+        self.cheapest = np.argsort(cost, kind="stable").tolist()
+        self.cheapest_by_position = {
+            name: [row for row in self.cheapest if position[row] == code]
+            for code, name in POSITION_MAP.items()
+        }
+        self._row_of = {pid: i for i, pid in enumerate(ids.tolist())}
+        self._dominance = {}
+        # Exact optimizer models (services.squad_optimizer.squad_model)
+        self._models = {}
+
+    def __getstate__(self):
+        # Optimizer models hold solver handles and locks: rebuilt on use
+        # after unpickling (snapshots are pickled with their index)
+        return {**self.__dict__, "_models": {}}
+
+    @classmethod
+    def from_frame(cls, df):
+        """Index a player table with id, position, team, now_cost and predicted_score."""
+        clubs, club = np.unique(df["team"].to_numpy(), return_inverse=True)
+        return cls(
+            frame=df,
+            ids=df["id"].to_numpy(),
+            score=pd.to_numeric(df["predicted_score"], errors="coerce").fillna(0).to_numpy(dtype=float),
+            cost=pd.to_numeric(df["now_cost"], errors="coerce").fillna(5).to_numpy(dtype=float),
+            position=pd.to_numeric(df["position"], errors="coerce").fillna(0).to_numpy(dtype=int),
+            club=club,
+            club_ids=clubs,
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def rows(self, ids):
+        """Row positions of player ids."""
+        try:
+            return np.array([self._row_of[pid] for pid in ids], dtype=int)
+        except KeyError as e:
+            raise ValueError(f"Unknown player id {e.args[0]}") from None
+
+    def mask(self, ids):
+        m = np.zeros(len(self), dtype=bool)
+        m[self.rows(ids)] = True
+        return m
+
+    def players(self, rows):
+        """Table rows for row positions, with numeric cost/score and pos."""
+        return self.frame.iloc[rows].assign(
+            now_cost=self.cost[rows],
+            predicted_score=self.score[rows],
+            pos=self.pos[rows],
+        )
+
+    def dominators(self, pos):
+        """
+        (rows, dom) for one position, where dom[j, i] means row i costs no
+        more and scores no less than row j (ties broken by table order).
+        Cached per index.
+        """
+        if pos not in self._dominance:
+            rows = np.flatnonzero(self.pos == pos)
+            c, s = self.cost[rows], self.score[rows]
+            dom = (c[None, :] <= c[:, None]) & (s[None, :] >= s[:, None])
+            dom &= (c[None, :] < c[:, None]) | (s[None, :] > s[:, None]) | (rows[None, :] < rows[:, None])
+            self._dominance[pos] = (rows, dom)
+        return self._dominance[pos]
+
+    def _reserve(self, free, needs, flex, skip=None):
+        """
+        (cost, rows) of the cheapest `free` players (other than `skip`)
+        that fill `needs` ({pos: count}) and then `flex` slots of any
+        position. Club limits are ignored, so this is a lower bound.
+        """
+        rows = []
+        for pos, count in needs.items():
+            for row in self.cheapest_by_position[pos]:
+                if count <= 0:
+                    break
+                if free[row] and row != skip:
+                    rows.append(row)
+                    count -= 1
+        taken = set(rows)
+        for row in self.cheapest:
+            if flex <= 0:
+                break
+            if free[row] and row != skip and row not in taken:
+                rows.append(row)
+                flex -= 1
+        return float(self.cost[rows].sum()), taken.union(rows)
+
+    def greedy_xi(self, budget=BUDGET, exclude=(), lock=(), max_per_club=MAX_PER_CLUB):
+        """
+        The greedy Best XI (1 GK, 3 DEF, 3 MID, 1 FWD, then 3 flex by
+        score; max_per_club per club; budget) as row positions in pick
+        order. Locked players are picked first, excluded ones never.
+
+        Each pick keeps enough budget to fill the remaining slots with
+        the cheapest available players, so the budget is not spent
+        before the XI is complete; when it is not binding the picks are
+        the plain highest-score ones.
+        """
+        chosen = np.zeros(len(self), dtype=bool)
+        blocked = self.mask(exclude) if len(exclude) else np.zeros(len(self), dtype=bool)
+        club_count = np.zeros(len(self.club_ids), dtype=int)
+        picked = []
+        remaining = float(budget)
+        minimums = {"GK": 1, "DEF": 3, "MID": 3, "FWD": 1}
+        counts = dict.fromkeys(minimums, 0)
+
+        def take(row):
+            nonlocal remaining
+            picked.append(row)
+            if self.pos[row] in counts:
+                counts[self.pos[row]] += 1
+            chosen[row] = True
+            remaining -= self.cost[row]
+            c = self.club[row]
+            club_count[c] += 1
+            if club_count[c] >= max_per_club:
+                blocked[self.club_masks[c]] = True
+
+        for row in self.rows(lock):
+            if chosen[row] or blocked[row] or self.cost[row] > remaining:
+                raise ValueError(f"Cannot lock player {self.ids[row]}: excluded, over budget or club limit")
+            take(row)
+        if len(picked) > 11:
+            raise ValueError("Cannot lock more than 11 players")
+
+        def first(candidates, slot_pos=None):
+            """Best candidate that leaves enough budget for the slots after this one."""
+            ok = ~chosen[candidates] & ~blocked[candidates] & (self.cost[candidates] <= remaining)
+            hit = np.flatnonzero(ok)
+            if not len(hit):
+                return None
+
+            needs = {p: max(k - counts[p], 0) for p, k in minimums.items()}
+            if slot_pos is not None:
+                needs[slot_pos] -= 1
+            flex = 11 - len(picked) - 1 - sum(needs.values())
+            free = ~chosen & ~blocked
+            reserve, reserved = self._reserve(free, needs, flex)
+
+            for row in candidates[hit]:
+                # Picking a reserved player: re-cost the rest without it
+                cost = self._reserve(free, needs, flex, skip=row)[0] if row in reserved else reserve
+                if self.cost[row] + cost <= remaining + 1e-9:
+                    return row
+            return None
+
+        for pos, count in minimums.items():
+            candidates = self.by_position[pos]
+            while counts[pos] < count:
+                row = first(candidates, pos)
+                if row is None:
+                    break
+                take(row)
+
+        while len(picked) < 11:
+            row = first(self.order)
+            if row is None:
+                break
+            take(row)
+
+        return np.array(picked, dtype=int)
@@ -0,0 +1,93 @@
+# services/prewarm.py
+#
+# Background worker that builds the app snapshot ahead of traffic:
+# polls the FPL bootstrap, and when the gameweek key (which includes the
+# deadline) or the model version changes, or the stored snapshot is older
+# than --max-age, rebuilds predictions, simulations, explanations and the
+# Best XI and writes them atomically for the app to read.
+#
+# Run from the repo root: python -m services.prewarm [--once]
+
+import argparse
+import threading
+import time
+
+from services.fpl_cache import FPLCache
+from services.fpl_client import FPLClient
+from services.model_registry import model_version
+from services.snapshot import N_SIMS, SnapshotStore, build_snapshot
+from utils.log import log
+
+POLL_INTERVAL = 5 * 60
+MAX_AGE = 60 * 60
+
+
+def needs_rebuild(info, gameweek, version, max_age=MAX_AGE, now=None):
+    """Whether the stored snapshot pointer is missing, outdated or too old."""
+    if info is None:
+        return True
+    if info.get("gameweek") != gameweek or info.get("model_version") != version:
+        return True
+    now = time.time() if now is None else now
+    return max_age is not None and now - info.get("built_at", 0) >= max_age
+
+
+def prewarm(client, store, force=False, max_age=MAX_AGE, n_sims=N_SIMS):
+    """
+    Builds and saves a snapshot if needed. Returns it, or None when the
+    stored one is still current.
+
+    With a stubbed source (FPLClient(FPLCache(source=..., store=...)))
+    and a temporary SnapshotStore this runs fully offline.
+    """
+    gameweek = client.cache.get_snapshot()["key"]
+    version = model_version()
+    if not force and not needs_rebuild(store.latest_info(), gameweek, version, max_age):
+        return None
+
+    started = time.perf_counter()
+    snapshot = build_snapshot(client, n_sims=n_sims, explain=True)
+    store.save(snapshot)
+    log(f"built snapshot {snapshot.gameweek} / model {snapshot.model_version} "
+         f"in {time.perf_counter() - started:.1f}s")
+    return snapshot
+
+
+def run(client, store, interval=POLL_INTERVAL, max_age=MAX_AGE, n_sims=N_SIMS, stop=None):
+    """Polls every `interval` seconds until `stop` (a threading.Event) is set."""
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        try:
+            prewarm(client, store, max_age=max_age, n_sims=n_sims)
+        except Exception as e:  # keep the worker alive across API hiccups
+            log(f"prewarm failed: {e!r}")
+        stop.wait(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prewarm the FPL app snapshot.")
+    parser.add_argument("--once", action="store_true", help="build (if needed) and exit")
+    parser.add_argument("--force", action="store_true", help="rebuild even if current")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL, help="poll seconds")
+    parser.add_argument("--max-age", type=float, default=MAX_AGE, help="rebuild after seconds")
+    parser.add_argument("--n-sims", type=int, default=N_SIMS)
+    parser.add_argument("--directory", default=None, help="snapshot directory")
+    args = parser.parse_args()
+
+    # Block on refreshes (no stale-while-revalidate) so each poll sees
+    # the current bootstrap and deadline
+    cache = FPLCache(ttl=min(args.interval, 15 * 60), stale_while_revalidate=False)
+    client = FPLClient(cache)
+    store = SnapshotStore(args.directory) if args.directory else SnapshotStore()
+
+    if args.once:
+        prewarm(client, store, force=args.force, max_age=args.max_age, n_sims=args.n_sims)
+        return
+
+    if args.force:
+        prewarm(client, store, force=True, n_sims=args.n_sims)
+    run(client, store, args.interval, args.max_age, args.n_sims)
+
+
+if __name__ == "__main__":
+    main()
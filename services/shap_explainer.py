@@ -1,33 +1,75 @@
+import threading
+
 import pandas as pd
-import numpy as np
+import xgboost as xgb
+
+from services.ml_predictor import build_feature_matrix, prepare_features
+from services.model_registry import get_model, model_version
+from utils.feature_engineering import FEATURES
+
+# (model version, gameweek) -> contributions table; only a few kept
+_MAX_CACHED = 4
+_cache = {}
+_lock = threading.Lock()
 
-from services.ml_predictor import predict_from_features
-from training.train_model import FEATURES
 
-def get_shap_values(player_row):
+def _contribs(X):
     """
-    Cloud-safe local feature attribution via sensitivity analysis.
+    Exact TreeSHAP contributions from XGBoost's pred_contribs.
+    Returns one row per input row: FEATURES + "bias" (expected value).
     """
+    booster = get_model().get_booster()
+    values = booster.predict(xgb.DMatrix(X[FEATURES]), pred_contribs=True)
+    return pd.DataFrame(values, index=X.index, columns=FEATURES + ["bias"])
 
-    # Build baseline feature vector ONCE
-    X = pd.DataFrame([{f: float(player_row.get(f, 0)) for f in FEATURES}])
-    X = X[FEATURES]
 
-    baseline_pred = predict_from_features(X)
+def compute_contributions(df, history=None):
+    """
+    SHAP contributions for every player in `df` in one pass, from the same
+    feature matrix the predictor uses. Indexed by player id.
+    """
+    X = build_feature_matrix(df, history)
+    contributions = _contribs(X)
+    contributions.index = df["id"].to_numpy()
+    return contributions
 
-    contributions = {}
 
-    for feature in FEATURES:
-        X_perturbed = X.copy()
+def get_contributions(df, gameweek=None, history=None):
+    """
+    Cached compute_contributions, keyed by model version and gameweek.
+    Without a gameweek the table is computed but not cached.
+    """
+    if gameweek is None:
+        return compute_contributions(df, history)
+
+    key = (model_version(), gameweek)
+    table = _cache.get(key)
+    if table is None:
+        table = compute_contributions(df, history)
+        with _lock:
+            _cache[key] = table
+            while len(_cache) > _MAX_CACHED:
+                _cache.pop(next(iter(_cache)))
+    return table
+
 
-        original = X_perturbed.at[0, feature]
+def clear_cache():
+    with _lock:
+        _cache.clear()
 
-        # meaningful perturbation
-        delta = max(abs(original) * 0.1, 0.2)
-        X_perturbed.at[0, feature] = original + delta
 
-        new_pred = predict_from_features(X_perturbed)
+def get_shap_values(player_row, contributions=None):
+    """
+    Exact per-feature SHAP values for a single player.
+    Looks the player up in a precomputed `contributions` table when given,
+    otherwise computes the single row directly.
+    Returns (feature row, {feature: contribution}).
+    """
+    X = prepare_features(player_row)
 
-        contributions[feature] = new_pred - baseline_pred
+    if contributions is not None and player_row["id"] in contributions.index:
+        row = contributions.loc[player_row["id"]]
+    else:
+        row = _contribs(X).iloc[0]
 
-    return X, contributions
+    return X, {f: float(row[f]) for f in FEATURES}
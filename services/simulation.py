@@ -0,0 +1,256 @@
+# services/simulation.py
+
+import numpy as np
+import pandas as pd
+
+# Captaincy volatility: base stdev per position + xGI explosiveness
+BASE_STDEV = {"GK": 1.2, "DEF": 1.6, "MID": 2.3, "FWD": 3.0}
+EXPLOSIVENESS = 0.4
+
+# Uncertainty bands: conservative, FPL-realistic std deviation
+MIN_UNCERTAINTY_STDEV = 1.5
+UNCERTAINTY_STDEV_RATIO = 0.35
+
+HAUL_THRESHOLD = 12
+BLANK_THRESHOLD = 2
+
+# Players simulated per block; bounds the (players × sims) matrix in memory
+BLOCK_SIZE = 256
+
+PERCENTILES = (10, 50, 90)
+
+
+def captaincy_stdev(pos, xgi, base_stdev=BASE_STDEV, explosiveness=EXPLOSIVENESS):
+    """Vectorized stdev used by the captaincy simulation."""
+    base = pd.Series(pos).map(base_stdev).fillna(base_stdev["FWD"]).to_numpy(dtype=float)
+    xgi = pd.to_numeric(pd.Series(xgi), errors="coerce").fillna(0).to_numpy(dtype=float)
+    return np.maximum(base, base + xgi * explosiveness)
+
+
+def uncertainty_stdev(predicted):
+    """Vectorized stdev used for P10/P50/P90 bands."""
+    return np.maximum(MIN_UNCERTAINTY_STDEV, UNCERTAINTY_STDEV_RATIO * np.asarray(predicted, dtype=float))
+
+
+def simulate_matrix(mean, stdev, n_sims, rng=None):
+    """
+    (n_players × n_sims) matrix of simulated points in one draw from a
+    np.random.Generator, clamped at 0.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    mean = np.asarray(mean, dtype=float)[:, None]
+    stdev = np.asarray(stdev, dtype=float)[:, None]
+    z = rng.standard_normal((mean.shape[0], n_sims))
+    return np.clip(mean + stdev * z, 0, None)
+
+
+def _simulation_inputs(df, base_stdev=BASE_STDEV, explosiveness=EXPLOSIVENESS):
+    predicted = pd.to_numeric(df["predicted_score"], errors="coerce").fillna(0).to_numpy(dtype=float)
+    cap_stdev = captaincy_stdev(
+        df["pos"].to_numpy(), df["xGI"].to_numpy(), base_stdev, explosiveness
+    )
+    unc_stdev = uncertainty_stdev(predicted)
+    return predicted, cap_stdev, unc_stdev
+
+
+def simulate_players(df, n_sims=10000, seed=None, block_size=BLOCK_SIZE,
+                     base_stdev=BASE_STDEV, explosiveness=EXPLOSIVENESS):
+    """
+    Simulates every player in `df` (needs predicted_score, pos, xGI) and
+    returns one row per player, indexed by player id:
+
+    - captaincy model: stdev, expected_points, expected_captain_points,
+      haul_probability, blank_probability
+    - uncertainty model: p10, p50, p90
+
+    Both models reuse the same float32 standard-normal draws (common
+    random numbers), so only one (block × n_sims) matrix is drawn per block.
+    `seed` may be an int, a np.random.SeedSequence or None.
+    """
+    rng = np.random.default_rng(seed)
+
+    predicted, cap_stdev, unc_stdev = _simulation_inputs(df, base_stdev, explosiveness)
+
+    blocks = []
+    for start in range(0, len(df), block_size):
+        sl = slice(start, start + block_size)
+        mu = predicted[sl, None]
+        z = rng.standard_normal((len(predicted[sl]), n_sims), dtype=np.float32)
+
+        cap = np.clip(mu + cap_stdev[sl, None] * z, 0, None)
+
+        # Clamped affine maps are monotone, so quantiles of the uncertainty
+        # model follow from quantiles of z without a second sort
+        zq = np.percentile(z, PERCENTILES, axis=1)
+        unc_q = np.clip(mu[:, 0] + unc_stdev[sl] * zq, 0, None)
+
+        expected = cap.mean(axis=1, dtype=np.float64)
+        blocks.append(pd.DataFrame({
+            "expected_points": expected,
+            "expected_captain_points": 2 * expected,
+            "haul_probability": (cap >= HAUL_THRESHOLD).mean(axis=1),
+            "blank_probability": (cap <= BLANK_THRESHOLD).mean(axis=1),
+            **{f"p{q}": unc_q[i] for i, q in enumerate(PERCENTILES)},
+        }))
+
+    stats = pd.concat(blocks, ignore_index=True) if blocks else pd.DataFrame()
+
+    table = pd.DataFrame({
+        "player": df["web_name"].to_numpy(),
+        "predicted": predicted,
+        "stdev": cap_stdev,
+    })
+    table = pd.concat([table, stats], axis=1)
+    table.index = pd.Index(df["id"].to_numpy(), name="id")
+    return table
+
+
+class StreamingStats:
+    """
+    Running statistics for one set of players, fed chunk by chunk.
+
+    Keeps O(players) state: running sums for mean/std, threshold counts,
+    and a fixed-grid histogram sketch per player (`bins` buckets over
+    [0, upper]) for quantiles. Quantile error is at most one bucket width.
+    """
+
+    def __init__(self, upper, bins=1024):
+        self.upper = np.asarray(upper, dtype=np.float64)
+        self.bins = bins
+        self.n_players = len(self.upper)
+        self.width = self.upper / bins
+
+        self.n = 0
+        self.total = np.zeros(self.n_players)
+        self.total_sq = np.zeros(self.n_players)
+        self.hauls = np.zeros(self.n_players, dtype=np.int64)
+        self.blanks = np.zeros(self.n_players, dtype=np.int64)
+        self.counts = np.zeros((self.n_players, bins), dtype=np.int64)
+
+    def update(self, sims):
+        """Adds a (players × chunk) block of simulated points."""
+        self.n += sims.shape[1]
+        self.total += sims.sum(axis=1, dtype=np.float64)
+        self.total_sq += np.square(sims, dtype=np.float64).sum(axis=1)
+        self.hauls += (sims >= HAUL_THRESHOLD).sum(axis=1)
+        self.blanks += (sims <= BLANK_THRESHOLD).sum(axis=1)
+
+        bucket = (sims / self.width[:, None].astype(sims.dtype)).astype(np.int32)
+        np.clip(bucket, 0, self.bins - 1, out=bucket)
+        bucket += (np.arange(self.n_players, dtype=np.int32) * self.bins)[:, None]
+        self.counts += np.bincount(
+            bucket.ravel(), minlength=self.n_players * self.bins
+        ).reshape(self.n_players, self.bins)
+
+    def mean(self):
+        return self.total / self.n
+
+    def std(self):
+        return np.sqrt(np.maximum(self.total_sq / self.n - self.mean() ** 2, 0))
+
+    def quantile(self, q):
+        """Quantile (0-1) per player, interpolated inside the bucket."""
+        cum = np.cumsum(self.counts, axis=1)
+        target = q * self.n
+        idx = np.minimum((cum < target).sum(axis=1), self.bins - 1)
+
+        rows = np.arange(self.n_players)
+        before = np.where(idx > 0, cum[rows, np.maximum(idx - 1, 0)], 0)
+        in_bucket = np.maximum(self.counts[rows, idx], 1)
+        frac = np.clip((target - before) / in_bucket, 0, 1)
+        return (idx + frac) * self.width
+
+    def haul_probability(self):
+        return self.hauls / self.n
+
+    def blank_probability(self):
+        return self.blanks / self.n
+
+
+def _iter_chunks(predicted, n_sims, chunk_size, rng):
+    """Standard-normal (players × chunk) blocks until n_sims are drawn."""
+    done = 0
+    while done < n_sims:
+        size = min(chunk_size, n_sims - done)
+        yield rng.standard_normal((len(predicted), size), dtype=np.float32)
+        done += size
+
+
+def _streaming_run(df, n_sims, chunk_size, seed, bins, keep=False,
+                   base_stdev=BASE_STDEV, explosiveness=EXPLOSIVENESS):
+    rng = np.random.default_rng(seed)
+    predicted, cap_stdev, unc_stdev = _simulation_inputs(df, base_stdev, explosiveness)
+
+    # float32 blocks halve the per-chunk working set
+    mu = predicted[:, None].astype(np.float32)
+    cap_scale = cap_stdev[:, None].astype(np.float32)
+    unc_scale = unc_stdev[:, None].astype(np.float32)
+
+    # Sketch range: 0 .. mean + 6 sd (anything above lands in the last bucket)
+    cap = StreamingStats(np.maximum(predicted + 6 * cap_stdev, 1.0), bins)
+    unc = StreamingStats(np.maximum(predicted + 6 * unc_stdev, 1.0), bins)
+
+    kept = []
+    for z in _iter_chunks(predicted, n_sims, chunk_size, rng):
+        cap_block = np.clip(mu + cap_scale * z, 0, None)
+        unc_block = np.clip(mu + unc_scale * z, 0, None)
+        cap.update(cap_block)
+        unc.update(unc_block)
+        if keep:
+            kept.append((cap_block, unc_block))
+
+    table = pd.DataFrame({
+        "player": df["web_name"].to_numpy(),
+        "predicted": predicted,
+        "stdev": cap_stdev,
+        "expected_points": cap.mean(),
+        "expected_captain_points": 2 * cap.mean(),
+        "haul_probability": cap.haul_probability(),
+        "blank_probability": cap.blank_probability(),
+        "sim_std": cap.std(),
+        **{f"p{q}": unc.quantile(q / 100) for q in PERCENTILES},
+    })
+    table.index = pd.Index(df["id"].to_numpy(), name="id")
+    return table, kept
+
+
+def simulate_players_streaming(df, n_sims=100000, chunk_size=1000, seed=None, bins=1024,
+                               base_stdev=BASE_STDEV, explosiveness=EXPLOSIVENESS):
+    """
+    Memory-bounded variant of simulate_players for very large n_sims.
+    Simulations are drawn in (players × chunk_size) blocks and folded into
+    StreamingStats, so memory is O(players × (chunk_size + bins)) and does
+    not grow with n_sims. Same columns as simulate_players plus sim_std.
+    """
+    table, _ = _streaming_run(
+        df, n_sims, chunk_size, seed, bins,
+        base_stdev=base_stdev, explosiveness=explosiveness,
+    )
+    return table
+
+
+def streaming_accuracy(df, n_sims=20000, chunk_size=1000, seed=0, bins=1024):
+    """
+    Error of the streaming estimates against exact statistics computed
+    from the very same draws (so only sketch/rounding error is measured).
+    Returns a DataFrame with max and mean absolute error per column.
+    Keeps every draw in memory; meant for validation, not production.
+    """
+    table, kept = _streaming_run(df, n_sims, chunk_size, seed, bins, keep=True)
+    cap = np.concatenate([c for c, _ in kept], axis=1)
+    unc = np.concatenate([u for _, u in kept], axis=1)
+
+    exact_q = np.percentile(unc, PERCENTILES, axis=1)
+    exact = {
+        "expected_points": cap.mean(axis=1, dtype=np.float64),
+        "haul_probability": (cap >= HAUL_THRESHOLD).mean(axis=1),
+        "blank_probability": (cap <= BLANK_THRESHOLD).mean(axis=1),
+        **{f"p{q}": exact_q[i] for i, q in enumerate(PERCENTILES)},
+    }
+
+    rows = []
+    for column, values in exact.items():
+        err = np.abs(table[column].to_numpy() - values)
+        rows.append({"statistic": column, "max_abs_error": err.max(), "mean_abs_error": err.mean()})
+    return pd.DataFrame(rows)
+
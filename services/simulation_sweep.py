@@ -0,0 +1,109 @@
+# services/simulation_sweep.py
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from services.simulation import (
+    BASE_STDEV,
+    EXPLOSIVENESS,
+    simulate_players,
+    simulate_players_streaming,
+)
+
+# Columns the simulation needs; only these are shipped to workers
+SIM_COLUMNS = ["id", "web_name", "pos", "xGI", "predicted_score"]
+
+# Players per task. Fixed (not derived from the worker count) so the
+# task list, and therefore every task's seed, is the same for any pool size.
+PLAYER_CHUNK = 128
+
+
+def _run_task(task):
+    """Worker entry point: simulate one (scenario, player chunk)."""
+    frame, scenario, seed_seq, streaming = task
+    base_stdev = {**BASE_STDEV, **scenario.get("base_stdev", {})}
+    kwargs = {
+        "n_sims": scenario.get("n_sims", 10000),
+        "seed": seed_seq,
+        "base_stdev": base_stdev,
+        "explosiveness": scenario.get("explosiveness", EXPLOSIVENESS),
+    }
+    if streaming:
+        return simulate_players_streaming(frame, **kwargs)
+    return simulate_players(frame, **kwargs)
+
+
+def build_tasks(frames, scenarios, seed=0, player_chunk=PLAYER_CHUNK, streaming=False):
+    """
+    Expands scenarios × player chunks into tasks, each with its own
+    independent RNG stream spawned from one SeedSequence.
+    """
+    if isinstance(frames, pd.DataFrame):
+        frames = {None: frames}
+
+    tasks, labels = [], []
+    for s_idx, scenario in enumerate(scenarios):
+        frame = frames[scenario.get("gameweek")][SIM_COLUMNS]
+        for start in range(0, len(frame), player_chunk):
+            tasks.append([frame.iloc[start:start + player_chunk], scenario, None, streaming])
+            labels.append(s_idx)
+
+    for task, child in zip(tasks, np.random.SeedSequence(seed).spawn(len(tasks))):
+        task[2] = child
+
+    return [tuple(t) for t in tasks], labels
+
+
+def run_sweep(frames, scenarios, seed=0, workers=None,
+              player_chunk=PLAYER_CHUNK, streaming=False):
+    """
+    Runs every scenario over its player table on a process pool.
+
+    frames: one player DataFrame, or {gameweek: DataFrame}
+    scenarios: dicts with optional keys
+        gameweek, base_stdev ({pos: stdev} overrides), explosiveness, n_sims
+    workers: process count (None = all cores, 1 = run in this process)
+
+    Results are identical for any worker count: seeds are tied to tasks,
+    not to processes. Returns one row per (scenario, player).
+    """
+    tasks, labels = build_tasks(frames, scenarios, seed, player_chunk, streaming)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        results = [_run_task(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_task, tasks, chunksize=max(1, len(tasks) // (4 * workers))))
+
+    parts = []
+    for s_idx, table in zip(labels, results):
+        scenario = scenarios[s_idx]
+        table = table.reset_index()
+        table.insert(0, "scenario", s_idx)
+        table.insert(1, "gameweek", scenario.get("gameweek"))
+        table.insert(2, "explosiveness", scenario.get("explosiveness", EXPLOSIVENESS))
+        table.insert(3, "n_sims", scenario.get("n_sims", 10000))
+        parts.append(table)
+
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+
+def scenario_grid(gameweeks=(None,), explosiveness=(EXPLOSIVENESS,),
+                  base_stdev_scales=(1.0,), n_sims=(10000,)):
+    """Cartesian product of sweep parameters as scenario dicts."""
+    return [
+        {
+            "gameweek": gw,
+            "explosiveness": e,
+            "base_stdev": {pos: sd * scale for pos, sd in BASE_STDEV.items()},
+            "n_sims": n,
+        }
+        for gw in gameweeks
+        for e in explosiveness
+        for scale in base_stdev_scales
+        for n in n_sims
+    ]
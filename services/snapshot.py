@@ -0,0 +1,296 @@
+# services/snapshot.py
+
+import json
+import os
+import pickle
+import re
+import tempfile
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from services.fpl_cache import key_deadline
+from services.fpl_client import FPLClient
+from services.ml_predictor import add_rolling_features, predict_scores
+from services.model_registry import model_version
+from services.optimize_team import POSITION_MAP, pick_best_xi
+from services.player_index import PlayerIndex
+from services.shap_explainer import compute_contributions
+from services.simulation import simulate_players
+from services.squad_simulation import simulate_squad
+from utils.fixture_difficulty import TEAM_FDR
+from utils.team_names import TEAM_NAMES
+
+N_SIMS = 10000
+
+DEFAULT_SNAPSHOT_DIR = Path(__file__).resolve().parent.parent / "cache" / "snapshots"
+
+UNCERTAINTY_COLUMNS = ["player", "predicted", "stdev", "p10", "p50", "p90"]
+CAPTAINCY_COLUMNS = [
+    "player", "predicted", "expected_points", "expected_captain_points",
+    "haul_probability", "blank_probability",
+]
+
+
+class GameweekSnapshot:
+    """
+    Everything the app renders for one gameweek and model version,
+    computed once and then shared read-only by every session:
+
+    - players: player table with predictions, team names and FDR labels
+    - best_xi: optimal starting XI
+    - simulation: Monte Carlo table (uncertainty bands and captaincy
+      stats), indexed by player id
+    - squad_simulation: simulate_squad result for best_xi (XI totals)
+    - index: PlayerIndex for what-if squad queries
+    - contributions: per-player SHAP table, if built with explanations
+    """
+
+    # Snapshots pickled before squad_simulation existed read None
+    squad_simulation = None
+
+    def __init__(self, gameweek, model_version, players, best_xi, simulation,
+                 index=None, fixtures=None, contributions=None, built_at=None,
+                 squad_simulation=None):
+        self.gameweek = gameweek
+        self.model_version = model_version
+        self.players = players
+        self.best_xi = best_xi
+        self.simulation = simulation
+        self.squad_simulation = squad_simulation
+        self.index = index
+        self.fixtures = fixtures
+        self.contributions = contributions
+        self.built_at = built_at or time.time()
+
+    @property
+    def key(self):
+        return self.gameweek, self.model_version
+
+    @property
+    def uncertainty(self):
+        return self.simulation[UNCERTAINTY_COLUMNS]
+
+    @property
+    def captaincy(self):
+        return self.simulation[CAPTAINCY_COLUMNS]
+
+
+def build_snapshot(client=None, n_sims=N_SIMS, seed=None, explain=False):
+    """
+    Runs the full app pipeline: fetch, predict, label, optimize, simulate
+    (players and the best XI), and with `explain` the SHAP contributions
+    for every player.
+    """
+    client = client or FPLClient()
+    df = client.get_players_df()
+
+    df["pos"] = df["position"].map(POSITION_MAP)
+    df = add_rolling_features(df, client.match_history)
+    df["predicted_score"] = predict_scores(df)
+
+    df["next_opponent_name"] = df["next_opponent"].map(TEAM_NAMES)
+    df["fixture_difficulty"] = df["next_opponent"].map(TEAM_FDR).fillna(3)
+    df["fixture_label"] = df["fixture_difficulty"].apply(
+        lambda x: "Easy" if x <= 2 else "Medium" if x == 3 else "Hard"
+    )
+
+    index = PlayerIndex.from_frame(df)
+    best_xi = pick_best_xi(df, index=index)
+    return GameweekSnapshot(
+        gameweek=client.gameweek,
+        model_version=model_version(),
+        players=df,
+        best_xi=best_xi,
+        simulation=simulate_players(df, n_sims=n_sims, seed=seed),
+        squad_simulation=simulate_squad(best_xi, n_sims=n_sims, seed=seed),
+        index=index,
+        fixtures=client.fixtures,
+        contributions=compute_contributions(df) if explain else None,
+    )
+
+
+# ---------------------------------------------------------
+# Local storage, written by the prewarm worker
+# ---------------------------------------------------------
+class SnapshotStore:
+    """
+    Pickled snapshots in a local directory plus a `latest.json` pointer
+    (gameweek, model version, file, built_at). Writes are atomic (tmp
+    file + rename), so readers never see a partial snapshot. The last
+    loaded snapshot is kept in memory and only reloaded when the
+    pointer changes.
+    """
+
+    def __init__(self, directory=DEFAULT_SNAPSHOT_DIR, keep=3):
+        self.directory = Path(directory)
+        self.keep = keep
+        self._loaded = (None, None)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _safe(name):
+        return re.sub(r"[^A-Za-z0-9_.-]", "_", str(name))
+
+    def _path(self, snapshot):
+        return self.directory / f"snapshot-{self._safe(snapshot.gameweek)}-{self._safe(snapshot.model_version)}.pkl"
+
+    def _write(self, path, data):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def latest_info(self):
+        """The `latest.json` pointer, or None."""
+        try:
+            with open(self.directory / "latest.json") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load_latest(self):
+        info = self.latest_info()
+        if info is None:
+            return None
+
+        with self._lock:
+            pointer, snapshot = self._loaded
+            if pointer != info:
+                try:
+                    with open(self.directory / info["file"], "rb") as f:
+                        snapshot = pickle.load(f)
+                except (OSError, KeyError, pickle.UnpicklingError):
+                    return None
+                self._loaded = (info, snapshot)
+            return snapshot
+
+    def save(self, snapshot):
+        path = self._path(snapshot)
+        self._write(path, pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL))
+        info = {
+            "gameweek": snapshot.gameweek,
+            "model_version": snapshot.model_version,
+            "file": path.name,
+            "built_at": snapshot.built_at,
+        }
+        self._write(self.directory / "latest.json", json.dumps(info).encode())
+        self._prune()
+
+    def remove(self, gameweek=None):
+        """
+        Deletes the stored snapshots (all, or one gameweek's) and the
+        `latest.json` pointer if it points at a deleted one.
+        """
+        info = self.latest_info()
+        prefix = "snapshot-" if gameweek is None else f"snapshot-{self._safe(gameweek)}-"
+        with self._lock:
+            if info is not None and (gameweek is None or info.get("gameweek") == gameweek):
+                try:
+                    (self.directory / "latest.json").unlink()
+                except OSError:
+                    pass
+            for path in self.directory.glob(f"{prefix}*.pkl"):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            self._loaded = (None, None)
+
+    def _prune(self):
+        files = sorted(
+            self.directory.glob("snapshot-*.pkl"),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+        for old in files[self.keep:]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+
+@lru_cache(maxsize=1)
+def get_default_store():
+    return SnapshotStore()
+
+
+# ---------------------------------------------------------
+# Process-wide cache, shared by all sessions and reruns
+# ---------------------------------------------------------
+_MAX_CACHED = 2
+_snapshots = {}
+_lock = threading.Lock()
+
+
+def is_current(info, version, now=None):
+    """
+    Whether a store pointer (SnapshotStore.latest_info) is for `version`
+    and its gameweek deadline has not passed yet. Keys without a
+    deadline (e.g. after the last gameweek) never expire.
+    """
+    if info is None or info.get("model_version") != version:
+        return False
+    deadline = key_deadline(info.get("gameweek"))
+    now = time.time() if now is None else now
+    return deadline is None or now < deadline
+
+
+def get_snapshot(client=None, store=None):
+    """
+    The snapshot to render. While the prewarmed snapshot in the store is
+    current (model version matches, deadline not passed) it is served
+    without touching the FPL data at all.
+
+    Otherwise (no worker running, e.g. locally, or the worker is behind)
+    the cached FPL payload decides: if its gameweek key is still the
+    stored one, FPL has not moved on yet and the stored snapshot is
+    served; else the snapshot is built on first use, and concurrent
+    sessions wait for a single build instead of each running the pipeline.
+    """
+    version = model_version()
+    store = store or get_default_store()
+    info = store.latest_info()
+    if is_current(info, version):
+        stored = store.load_latest()
+        if stored is not None:
+            return stored
+
+    client = client or FPLClient()
+    key = (client.cache.get_snapshot()["key"], version)
+
+    if info is not None and (info.get("gameweek"), info.get("model_version")) == key:
+        stored = store.load_latest()
+        if stored is not None:
+            return stored
+
+    snapshot = _snapshots.get(key)
+    if snapshot is not None:
+        return snapshot
+
+    with _lock:
+        snapshot = _snapshots.get(key)
+        if snapshot is None:
+            snapshot = build_snapshot(client)
+            _snapshots[key] = snapshot
+            while len(_snapshots) > _MAX_CACHED:
+                _snapshots.pop(next(iter(_snapshots)))
+    return snapshot
+
+
+def invalidate(gameweek=None, store=None):
+    """
+    Drops cached snapshots (all, or one gameweek's), in memory and in the
+    store, so the next get rebuilds.
+    """
+    with _lock:
+        for key in [k for k in _snapshots if gameweek is None or k[0] == gameweek]:
+            del _snapshots[key]
+    (store or get_default_store()).remove(gameweek)
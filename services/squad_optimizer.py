@@ -0,0 +1,343 @@
+# services/squad_optimizer.py
+
+import threading
+
+import numpy as np
+
+try:
+    from scipy.optimize import Bounds, LinearConstraint, linprog, milp
+    from scipy.sparse import csr_matrix, eye, hstack, vstack
+except ImportError:  # scipy ships with scikit-learn, but stay importable
+    milp = None
+
+try:
+    import highspy
+except ImportError:  # optional: falls back to scipy.optimize.milp
+    highspy = None
+
+from services.optimize_team import POSITION_MAP
+from services.player_index import BUDGET, MAX_PER_CLUB, PlayerIndex
+
+# 15-man squad quota per position
+SQUAD_QUOTA = {"GK": 2, "DEF": 5, "MID": 5, "FWD": 3}
+
+# Starting XI formation rules: (min, max) per position
+XI_RULES = {"GK": (1, 1), "DEF": (3, 5), "MID": (2, 5), "FWD": (1, 3)}
+
+# Bench points are worth a fraction of starting points (cover for rotation)
+BENCH_WEIGHT = 0.1
+
+# Initial reduced-cost window (predicted points) for the restricted MILP
+REDUCED_COST_WINDOW = 0.25
+
+# HiGHS MIP options for the restricted problems: they are small and the
+# LP bound is tight, so restarts and sub-MIP heuristics cost more than
+# they save (exactness is unaffected)
+HIGHS_MIP_OPTIONS = {
+    "mip_rel_gap": 0.0,
+    "mip_allow_restart": False,
+    "mip_heuristic_run_rins": False,
+    "mip_heuristic_run_rens": False,
+    "mip_heuristic_effort": 0.0,
+}
+
+
+def prune_dominated(index, slots, available, max_per_club=MAX_PER_CLUB, squad_size=15):
+    """
+    Boolean mask of players that can be dropped without losing the optimum.
+
+    Player j is dominated by i (same position) if i costs no more and scores
+    no less (ties broken by row order). Given an optimal squad containing j,
+    at most slots[pos] - 1 dominators share j's position in it and at most
+    (squad_size - 1) // max_per_club clubs are full, so if j's available
+    dominators span more clubs than that, one of them can replace j: same
+    position, budget and club limits still hold, and the score does not drop.
+    """
+    full_clubs = (squad_size - 1) // max_per_club
+    drop = np.zeros(len(index), dtype=bool)
+
+    for p, k in slots.items():
+        rows, dom = index.dominators(p)
+        dom = dom & available[rows][None, :]
+        clubs = index.club_masks[:, rows].T
+        dominating_clubs = (dom.astype(np.int32) @ clubs.astype(np.int32) > 0).sum(axis=1)
+        drop[rows] = dominating_clubs > (k - 1) + full_clubs
+
+    return drop
+
+
+def _build_model(score, cost, pos, clubs, budget, max_per_club, squad_quota, xi_rules, bench_weight):
+    """Objective (to minimize) and constraint rows with their bounds. The
+    first n columns are the membership variables (x_i, or y_i if XI-only)."""
+    n = len(score)
+
+    xi_only = squad_quota is None
+    n_vars = n if xi_only else 2 * n
+    y = slice(0, n) if xi_only else slice(n, 2 * n)
+
+    def row(x_coef=None, y_coef=None):
+        r = np.zeros(n_vars)
+        if x_coef is not None and not xi_only:
+            r[:n] = x_coef
+        if y_coef is not None:
+            r[y] = y_coef
+        return r
+
+    rows, lo, hi = [], [], []
+
+    def add(r, lower, upper):
+        rows.append(r)
+        lo.append(lower)
+        hi.append(upper)
+
+    # Who counts against budget / club limits: squad, or starters if XI-only
+    members = (lambda c: row(y_coef=c)) if xi_only else (lambda c: row(x_coef=c))
+
+    add(members(cost), -np.inf, budget)
+    for club in np.unique(clubs):
+        add(members((clubs == club).astype(float)), 0, max_per_club)
+
+    add(row(y_coef=np.ones(n)), 11, 11)
+    for p, (mn, mx) in xi_rules.items():
+        add(row(y_coef=(pos == p).astype(float)), mn, mx)
+
+    if not xi_only:
+        for p, count in squad_quota.items():
+            add(row(x_coef=(pos == p).astype(float)), count, count)
+
+    A = csr_matrix(np.array(rows))
+    lo, hi = np.array(lo, dtype=float), np.array(hi, dtype=float)
+
+    if xi_only:
+        c = -score
+    else:
+        # y_i - x_i <= 0: only squad members can start
+        A = vstack([A, hstack([-eye(n), eye(n)])], format="csr")
+        lo = np.concatenate([lo, np.full(n, -np.inf)])
+        hi = np.concatenate([hi, np.zeros(n)])
+        c = np.concatenate([-bench_weight * score, -(1 - bench_weight) * score])
+
+    return c, A, lo, hi
+
+
+def _lp_bound(c, A, lo, hi, lb, ub=None):
+    """LP relaxation value and the reduced cost of each variable at zero."""
+    eq = lo == hi
+    upper = ~eq & np.isfinite(hi)
+    lower = ~eq & np.isfinite(lo)
+    res = linprog(
+        c,
+        A_ub=vstack([A[upper], -A[lower]]),
+        b_ub=np.concatenate([hi[upper], -lo[lower]]),
+        A_eq=A[eq],
+        b_eq=lo[eq],
+        bounds=np.column_stack([lb, np.ones(len(c)) if ub is None else ub]),
+        method="highs",
+    )
+    if res.status != 0:
+        raise ValueError(f"No feasible squad: {res.message}")
+    return res.fun, res.lower.marginals
+
+
+def _highs(c, A, lo, hi, integer, options):
+    """A persistent HiGHS instance for min c·v s.t. lo <= A v <= hi, 0 <= v <= 1."""
+    h = highspy.Highs()
+    h.setOptionValue("output_flag", False)
+    for name, value in options.items():
+        h.setOptionValue(name, value)
+
+    lp = highspy.HighsLp()
+    lp.num_col_, lp.num_row_ = len(c), A.shape[0]
+    lp.col_cost_ = c
+    lp.col_lower_, lp.col_upper_ = np.zeros(len(c)), np.ones(len(c))
+    lp.row_lower_, lp.row_upper_ = lo, hi
+    A = A.tocsc()
+    lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+    lp.a_matrix_.start_, lp.a_matrix_.index_, lp.a_matrix_.value_ = A.indptr, A.indices, A.data
+    if integer:
+        lp.integrality_ = [highspy.HighsVarType.kInteger] * len(c)
+    h.passModel(lp)
+    return h
+
+
+class SquadModel:
+    """
+    The squad MILP over every player with a known position, built once
+    per PlayerIndex and rule set (see squad_model). A query only changes
+    variable bounds (excluded, dominated and out-of-window players fixed
+    at 0, locked ones at 1) and the budget row, so the HiGHS instances
+    (highspy, if installed) are kept and re-solved.
+    """
+
+    def __init__(self, index, max_per_club, squad_quota, xi_rules, bench_weight):
+        self.index = index
+        self.max_per_club = max_per_club
+        self.xi_only = squad_quota is None
+        if self.xi_only:
+            self.slots, self.size = {p: mx for p, (_, mx) in xi_rules.items()}, 11
+        else:
+            self.slots, self.size = squad_quota, sum(squad_quota.values())
+
+        self.rows = np.flatnonzero(np.isin(index.pos, list(self.slots)))
+        self.c, self.A, self.lo, self.hi = _build_model(
+            index.score[self.rows], index.cost[self.rows], index.pos[self.rows], index.club[self.rows],
+            BUDGET, max_per_club, squad_quota, xi_rules, bench_weight,
+        )
+        self._lock = threading.Lock()
+        if highspy is not None:
+            self._lp = _highs(self.c, self.A, self.lo, self.hi, False, {})
+            self._mip = _highs(self.c, self.A, self.lo, self.hi, True, HIGHS_MIP_OPTIONS)
+            self._cols = np.arange(len(self.c), dtype=np.int32)
+
+    def _bound(self, lower, upper, budget):
+        """LP relaxation value and the reduced cost of each variable at zero."""
+        if highspy is None:
+            hi = self.hi.copy()
+            hi[0] = budget
+            return _lp_bound(self.c, self.A, self.lo, hi, lower, upper)
+
+        self._lp.changeColsBounds(len(self.c), self._cols, lower, upper)
+        self._lp.changeRowBounds(0, -highspy.kHighsInf, budget)
+        self._lp.run()
+        if self._lp.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+            raise ValueError(f"No feasible squad: {self._lp.modelStatusToString(self._lp.getModelStatus())}")
+        return self._lp.getInfo().objective_function_value, np.array(self._lp.getSolution().col_dual)
+
+    def _milp(self, lower, upper, budget, time_limit):
+        """(objective, solution) of the MILP, solution None if none was found."""
+        if highspy is None:
+            hi = self.hi.copy()
+            hi[0] = budget
+            res = milp(
+                self.c,
+                constraints=LinearConstraint(self.A, self.lo, hi),
+                integrality=np.ones(len(self.c)),
+                bounds=Bounds(lower, upper),
+                options={"time_limit": time_limit, "mip_rel_gap": 0},
+            )
+            return res.fun, res.x
+
+        self._mip.changeColsBounds(len(self.c), self._cols, lower, upper)
+        self._mip.changeRowBounds(0, -highspy.kHighsInf, budget)
+        self._mip.setOptionValue("time_limit", float(time_limit))
+        self._mip.run()
+        info = self._mip.getInfo()
+        if info.primal_solution_status != highspy.kSolutionStatusFeasible:
+            return None, None
+        return info.objective_function_value, np.array(self._mip.getSolution().col_value)
+
+    def solve(self, budget=BUDGET, exclude=(), lock=(), time_limit=10.0):
+        """(rows, starting) for one query; see solve_index."""
+        index, rows = self.index, self.rows
+        n = len(rows)
+
+        available = np.isin(index.pos, list(self.slots))
+        if len(exclude):
+            available &= ~index.mask(exclude)
+        locked = index.mask(lock) if len(lock) else np.zeros(len(index), dtype=bool)
+        if (locked & ~available).any():
+            raise ValueError("Locked players must be available (not excluded, known position)")
+
+        pruned = prune_dominated(index, self.slots, available, self.max_per_club, self.size) & ~locked
+        candidate = (available & ~pruned)[rows]
+        copies = len(self.c) // n
+
+        lower = np.zeros(len(self.c))
+        lower[:n] = locked[rows]
+        upper = np.tile(candidate, copies).astype(float)
+
+        with self._lock:
+            lp_value, reduced = self._bound(lower, upper, budget)
+            # Forcing player i into the squad costs at least reduced[i] vs the bound
+            player_cost = reduced[:n]
+
+            window = REDUCED_COST_WINDOW
+            while True:
+                keep = candidate & ((player_cost < window) | locked[rows])
+                value, x = self._milp(lower, np.tile(keep, copies).astype(float), budget, time_limit)
+                if x is not None:
+                    gap = value - lp_value
+                    if gap <= window + 1e-9:
+                        break
+                    window = gap
+                elif (keep == candidate).all():
+                    raise ValueError("No feasible squad for this query")
+                else:
+                    window *= 4
+
+        sol = np.round(x).astype(bool)
+        chosen = sol[:n]
+        starting = chosen if self.xi_only else sol[n:]
+        return rows[chosen], starting[chosen]
+
+
+def squad_model(index, max_per_club=MAX_PER_CLUB, squad_quota=SQUAD_QUOTA, xi_rules=XI_RULES,
+                bench_weight=BENCH_WEIGHT):
+    """The SquadModel for `index` and these rules, built on first use and cached on the index."""
+    key = (
+        max_per_club,
+        None if squad_quota is None else tuple(sorted(squad_quota.items())),
+        tuple(sorted(xi_rules.items())),
+        bench_weight,
+    )
+    if key not in index._models:
+        index._models[key] = SquadModel(index, max_per_club, squad_quota, xi_rules, bench_weight)
+    return index._models[key]
+
+
+def solve_index(index, budget=BUDGET, max_per_club=MAX_PER_CLUB, squad_quota=SQUAD_QUOTA,
+                xi_rules=XI_RULES, bench_weight=BENCH_WEIGHT, exclude=(), lock=(), time_limit=10.0):
+    """
+    Exact squad selection on a PlayerIndex as a MILP (HiGHS, through
+    highspy if installed, else scipy.optimize.milp).
+
+    Variables: x_i (in squad) and y_i (starts), with y_i <= x_i.
+    - squad_quota players per position (pass None for an XI-only problem,
+      where the budget and club limits apply to the starters)
+    - xi_rules (min, max) starters per position, 11 starters
+    - total cost <= budget, at most max_per_club players per club
+    - excluded ids are left out, locked ids are forced in
+    Objective: starters' predicted points + bench_weight × bench points.
+
+    The MILP only sees players whose LP reduced cost is within a window
+    of the relaxation bound; any squad using an excluded player scores at
+    most bound - reduced cost, so once the window covers the gap between
+    the bound and the best squad found, that squad is optimal. Otherwise
+    the window widens to the gap and the MILP runs once more.
+
+    The model is built once per index and rule set (squad_model), so
+    repeated what-if queries only pay for the solves. That is still only
+    a few queries per second on a full player pool (highspy or scipy), far
+    from per-click rates: interactive what-ifs should use the greedy
+    (optimize_team.what_if_xi, thousands per second).
+
+    Returns (rows, starting): index row positions and a starter mask.
+    """
+    if milp is None:
+        raise ImportError("scipy is required for the exact squad optimizer")
+
+    model = squad_model(index, max_per_club, squad_quota, xi_rules, bench_weight)
+    return model.solve(budget, exclude=exclude, lock=lock, time_limit=time_limit)
+
+
+def solve_squad(df, budget=BUDGET, max_per_club=MAX_PER_CLUB, squad_quota=SQUAD_QUOTA,
+                xi_rules=XI_RULES, bench_weight=BENCH_WEIGHT, exclude=(), lock=(),
+                time_limit=10.0, index=None):
+    """
+    solve_index on `df` (or a prebuilt PlayerIndex of it).
+
+    Returns `df` rows of the selected players with a `starting` column,
+    starters first, ordered by position then predicted score.
+    """
+    index = index or PlayerIndex.from_frame(df)
+    rows, starting = solve_index(
+        index, budget, max_per_club, squad_quota, xi_rules, bench_weight,
+        exclude=exclude, lock=lock, time_limit=time_limit,
+    )
+
+    out = index.players(rows).assign(starting=starting)
+    order = out["pos"].map({p: i for i, p in enumerate(POSITION_MAP.values())})
+    out = out.assign(_order=order).sort_values(
+        ["starting", "_order", "predicted_score"], ascending=[False, True, False]
+    )
+    return out.drop(columns="_order")
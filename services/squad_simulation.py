@@ -0,0 +1,119 @@
+# services/squad_simulation.py
+
+import numpy as np
+import pandas as pd
+
+from services.simulation import PERCENTILES, captaincy_stdev
+
+# Loadings (attack, clean sheet) on the shared team factors per position.
+# Each row is scaled so that loadings² + idiosyncratic² = 1, which keeps
+# every player's marginal distribution identical to the independent model;
+# only the correlation between players changes.
+POSITION_LOADINGS = {
+    "GK": (0.0, 0.6),
+    "DEF": (0.15, 0.55),
+    "MID": (0.45, 0.15),
+    "FWD": (0.55, 0.0),
+}
+
+# How strongly the opponent's attacking factor erodes a team's clean sheet
+OPPONENT_ATTACK_WEIGHT = 0.5
+
+
+def factor_structure(df, loadings=POSITION_LOADINGS):
+    """
+    Builds the (players × 2·teams) loading matrix for `df` and the
+    team → next opponent index used to couple fixtures.
+    Returns (L, idio_scale, opponent_of_team, n_teams).
+    """
+    teams = pd.Index(
+        pd.unique(pd.concat([df["team"], df.get("next_opponent", pd.Series(dtype=float))]).dropna())
+    )
+    n_teams = len(teams)
+    team_idx = teams.get_indexer(df["team"])
+
+    att = df["pos"].map(lambda p: loadings.get(p, (0.0, 0.0))[0]).to_numpy(dtype=float)
+    cs = df["pos"].map(lambda p: loadings.get(p, (0.0, 0.0))[1]).to_numpy(dtype=float)
+
+    L = np.zeros((len(df), 2 * n_teams))
+    rows = np.arange(len(df))
+    L[rows, team_idx] = att
+    L[rows, n_teams + team_idx] = cs
+    idio_scale = np.sqrt(np.clip(1 - att ** 2 - cs ** 2, 0, None))
+
+    # Each team's opponent (first one seen in the table), -1 if unknown
+    opponent_of_team = np.full(n_teams, -1)
+    if "next_opponent" in df.columns:
+        pairs = df[["team", "next_opponent"]].dropna().drop_duplicates("team")
+        opponent_of_team[teams.get_indexer(pairs["team"])] = teams.get_indexer(pairs["next_opponent"])
+
+    return L, idio_scale, opponent_of_team, n_teams
+
+
+def sample_team_factors(n_teams, opponent_of_team, n_sims, rng,
+                        opponent_weight=OPPONENT_ATTACK_WEIGHT):
+    """
+    (2·teams × n_sims) factor draws: attack factors, then clean-sheet
+    factors that drop when the fixture opponent's attack factor is high.
+    Both blocks stay standard normal.
+    """
+    attack = rng.standard_normal((n_teams, n_sims))
+    defence = rng.standard_normal((n_teams, n_sims))
+
+    has_opp = opponent_of_team >= 0
+    clean_sheet = defence.copy()
+    clean_sheet[has_opp] = (
+        defence[has_opp] - opponent_weight * attack[opponent_of_team[has_opp]]
+    ) / np.sqrt(1 + opponent_weight ** 2)
+
+    return np.vstack([attack, clean_sheet])
+
+
+def simulate_correlated_points(df, n_sims=10000, seed=None, correlated=True):
+    """
+    (players × n_sims) points with shared team/fixture factors:
+    z = L @ F + idio · ε, points = clip(predicted + stdev · z, 0).
+    With correlated=False every player is independent (same marginals).
+    """
+    rng = np.random.default_rng(seed)
+
+    predicted = pd.to_numeric(df["predicted_score"], errors="coerce").fillna(0).to_numpy(dtype=float)
+    stdev = captaincy_stdev(df["pos"].to_numpy(), df["xGI"].to_numpy())
+
+    if correlated:
+        L, idio_scale, opponent_of_team, n_teams = factor_structure(df)
+        F = sample_team_factors(n_teams, opponent_of_team, n_sims, rng)
+        z = L @ F + idio_scale[:, None] * rng.standard_normal((len(df), n_sims))
+    else:
+        z = rng.standard_normal((len(df), n_sims))
+
+    return np.clip(predicted[:, None] + stdev[:, None] * z, 0, None)
+
+
+def simulate_squad(xi, n_sims=10000, seed=None, captain_id=None, correlated=True):
+    """
+    Distribution of total points for a squad (e.g. pick_best_xi output).
+    The captain (default: highest predicted score) counts double.
+
+    Returns a dict with the `totals` array (n_sims), its mean, std and
+    percentiles, plus the std an independent simulation would give, so
+    the effect of stacking players from one team is visible.
+    """
+    xi = xi.reset_index(drop=True)
+
+    if captain_id is None:
+        captain_id = int(xi.loc[xi["predicted_score"].astype(float).idxmax(), "id"])
+    weights = np.where(xi["id"].to_numpy() == captain_id, 2.0, 1.0)
+
+    totals = weights @ simulate_correlated_points(xi, n_sims, seed, correlated)
+    independent = weights @ simulate_correlated_points(xi, n_sims, seed, correlated=False)
+
+    q = np.percentile(totals, PERCENTILES)
+    return {
+        "captain_id": captain_id,
+        "totals": totals,
+        "expected_total": float(totals.mean()),
+        "std_total": float(totals.std()),
+        "independent_std_total": float(independent.std()),
+        **{f"p{p}": float(q[i]) for i, p in enumerate(PERCENTILES)},
+    }
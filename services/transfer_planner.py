@@ -0,0 +1,279 @@
+# services/transfer_planner.py
+
+import numpy as np
+import pandas as pd
+
+from services.optimize_team import POSITION_MAP
+from services.squad_optimizer import MAX_PER_CLUB, SQUAD_QUOTA, XI_RULES
+
+HIT_COST = 4             # points per transfer beyond the free ones
+MAX_FREE_TRANSFERS = 5   # banked free transfers cap (2024/25 rules)
+MAX_TRANSFERS_PER_WEEK = 2
+
+# Search limits: replacements considered per position each week,
+# single transfers expanded per state, states kept per week
+CANDIDATES_PER_POSITION = 10
+MOVES_PER_STATE = 12
+BEAM_WIDTH = 64
+
+# Per-week weight on predictions further ahead (hits are not discounted);
+# 1.0 maximizes plain expected points net of hits
+DECAY = 1.0
+
+# Squad slots are laid out in position blocks (GK, DEF, MID, FWD);
+# transfers swap like for like, so the layout never changes
+_BLOCKS = []
+_start = 0
+for _pos, _count in SQUAD_QUOTA.items():
+    _BLOCKS.append((_pos, slice(_start, _start + _count)))
+    _start += _count
+SQUAD_SIZE = _start
+
+
+def lineup_points(points, captain=True):
+    """
+    Best starting XI points per gameweek for squads laid out in position
+    blocks: points has shape (..., SQUAD_SIZE, weeks), result (..., weeks).
+
+    Each position's XI minimum comes from its best players and the
+    remaining slots go to the best leftover outfielders. The captain
+    (doubled) is the squad's top scorer, who always starts.
+    """
+    total = 0.0
+    leftovers = []
+    for pos, block in _BLOCKS:
+        ranked = -np.sort(-points[..., block, :], axis=-2)
+        minimum, maximum = XI_RULES[pos]
+        total = total + ranked[..., :minimum, :].sum(axis=-2)
+        if maximum > minimum:
+            leftovers.append(ranked[..., minimum:maximum, :])
+
+    flex = 11 - sum(mn for mn, _ in XI_RULES.values())
+    leftovers = -np.sort(-np.concatenate(leftovers, axis=-2), axis=-2)
+    total = total + leftovers[..., :flex, :].sum(axis=-2)
+
+    if captain:
+        total = total + points.max(axis=-2)
+    return total
+
+
+def starting_xi(points):
+    """
+    Starters and captain for one squad laid out in position blocks, picked
+    by the same rule as lineup_points: returns (bool mask, captain slot).
+    """
+    points = np.asarray(points, dtype=float)
+    starters = np.zeros(len(points), dtype=bool)
+    leftovers = []
+    for pos, block in _BLOCKS:
+        slots = np.arange(block.start, block.stop)
+        ranked = slots[np.argsort(-points[block], kind="stable")]
+        minimum, maximum = XI_RULES[pos]
+        starters[ranked[:minimum]] = True
+        leftovers.extend(ranked[minimum:maximum])
+
+    flex = 11 - sum(mn for mn, _ in XI_RULES.values())
+    leftovers = np.array(leftovers)
+    starters[leftovers[np.argsort(-points[leftovers], kind="stable")][:flex]] = True
+    return starters, int(np.argmax(points))
+
+
+class _State:
+    __slots__ = ("slots", "free", "bank", "score", "parent", "moves", "hits")
+
+    def __init__(self, slots, free, bank, score, parent=None, moves=(), hits=0):
+        self.slots = slots
+        self.free = free
+        self.bank = bank
+        self.score = score
+        self.parent = parent
+        self.moves = moves
+        self.hits = hits
+
+    def key(self):
+        # Order within a position block does not matter
+        return frozenset(self.slots.tolist()), self.free, self.bank
+
+
+def plan_transfers(pool, points, squad, bank=0.0, free_transfers=1, horizon=None,
+                   max_per_week=MAX_TRANSFERS_PER_WEEK, hit_cost=HIT_COST,
+                   max_free=MAX_FREE_TRANSFERS, candidates=CANDIDATES_PER_POSITION,
+                   moves_per_state=MOVES_PER_STATE, beam=BEAM_WIDTH, captain=True,
+                   decay=DECAY):
+    """
+    Transfer sequence maximizing expected points net of hits over the
+    next gameweeks.
+
+    - pool: players (id, position, team, now_cost, web_name)
+    - points: predicted points indexed by player id, one column per
+      gameweek (e.g. ml_predictor.predict_horizon)
+    - squad: the 15 current player ids
+
+    Forward search over gameweeks: each state is (squad, free transfers,
+    bank) and is memoized by that key, keeping the best accumulated
+    points. A state branches into rolling the transfer or making up to
+    max_per_week transfers built from its most promising single swaps
+    (same position, affordable, club limit). Only the `beam` states with
+    the best accumulated points plus the points of holding their squad
+    for the rest of the horizon go on to the next week.
+
+    By default the objective is plain expected points minus hit_cost per
+    extra transfer. With decay < 1, week t's points are weighted by
+    decay**t in the search, so uncertain far-off predictions need a bigger
+    edge to justify a hit now. Players are sold at now_cost (purchase
+    prices are not tracked).
+
+    Returns {"expected_points", "hits", "plan", "squads"}: plan has one
+    row per gameweek, squads the ids held each gameweek.
+    """
+    pool = pool.drop_duplicates("id").set_index("id")
+    weeks = list(points.columns[:horizon] if horizon else points.columns)
+    ids = pool.index.intersection(points.index).union(pd.Index(squad))
+    missing = pd.Index(squad).difference(pool.index)
+    if len(missing):
+        raise ValueError(f"Squad players not in pool: {list(missing)}")
+
+    pool = pool.loc[ids]
+    P = points.reindex(index=ids, columns=weeks).fillna(0.0).to_numpy(dtype=float)
+    pos = pool["position"].map(POSITION_MAP).to_numpy()
+    _, club = np.unique(pool["team"].to_numpy(), return_inverse=True)
+    price = np.round(pd.to_numeric(pool["now_cost"], errors="coerce").fillna(5).to_numpy() * 10).astype(int)
+    index_of = {pid: i for i, pid in enumerate(ids)}
+
+    # Lay the current squad out in position blocks
+    members = np.array([index_of[pid] for pid in squad])
+    slots = []
+    for p, block in _BLOCKS:
+        in_pos = members[pos[members] == p]
+        if len(in_pos) != block.stop - block.start:
+            raise ValueError(f"Squad needs {block.stop - block.start} {p}, got {len(in_pos)}")
+        slots.extend(in_pos)
+    slots = np.array(slots)
+    slot_pos = pos[slots]
+
+    # (Discounted) points drive the search; the plan reports raw points
+    W = P * decay ** np.arange(P.shape[1])
+
+    # Remaining-horizon points, used to rank replacements and swaps
+    remaining = np.cumsum(W[:, ::-1], axis=1)[:, ::-1]
+
+    n_weeks = len(weeks)
+    start = _State(slots, min(free_transfers, max_free), int(round(bank * 10)), 0.0)
+    layer = [start]
+
+    for t in range(n_weeks):
+        shortlist = {
+            p: np.flatnonzero(pos == p)[np.argsort(-remaining[pos == p, t], kind="stable")][:candidates]
+            for p in SQUAD_QUOTA
+        }
+        children = {}
+        for state in layer:
+            for swaps, squad_slots, new_bank in _expand(
+                state, t, shortlist, slot_pos, club, price, remaining, max_per_week, moves_per_state
+            ):
+                n = len(swaps)
+                hits = max(0, n - state.free)
+                free = min(max(state.free - n, 0) + 1, max_free)
+                child = _State(squad_slots, free, new_bank, state.score - hit_cost * hits,
+                               parent=state, moves=swaps, hits=hits)
+                key = child.key()
+                if key not in children or children[key].score < child.score:
+                    children[key] = child
+
+        # Score this week and rank by accumulated + hold value, all at once
+        states = list(children.values())
+        squads = np.stack([s.slots for s in states])
+        values = lineup_points(W[squads][..., t:], captain)
+        for s, v in zip(states, values[:, 0]):
+            s.score += v
+        rank = np.array([s.score for s in states]) + values[:, 1:].sum(axis=1)
+        layer = [states[i] for i in np.argsort(-rank, kind="stable")[:beam]]
+
+    best = max(layer, key=lambda s: s.score)
+    return _plan_table(best, weeks, ids, pool, P, captain, hit_cost)
+
+
+def _expand(state, t, shortlist, slot_pos, club, price, remaining, max_per_week, moves_per_state):
+    """(swaps, squad slots, bank) for rolling and for the best transfer sets."""
+    slots = state.slots
+    yield (), slots, state.bank
+    if max_per_week == 0:
+        return
+
+    in_squad = set(slots.tolist())
+    club_count = np.bincount(club[slots], minlength=club.max() + 1)
+
+    # Every like-for-like swap; singles must be feasible on their own,
+    # pairs only together (selling one player can fund or make club
+    # room for the other)
+    swaps, singles = [], []
+    for s, out in enumerate(slots):
+        budget = state.bank + price[out]
+        for new in shortlist[slot_pos[s]]:
+            if new in in_squad:
+                continue
+            move = (remaining[new, t] - remaining[out, t], s, new)
+            swaps.append(move)
+            if price[new] > budget:
+                continue
+            if club[new] != club[out] and club_count[club[new]] >= MAX_PER_CLUB:
+                continue
+            singles.append(move)
+
+    singles.sort(key=lambda m: -m[0])
+    singles = singles[:moves_per_state]
+
+    for _, s, new in singles:
+        squad = slots.copy()
+        squad[s] = new
+        yield ((slots[s], new),), squad, state.bank + price[slots[s]] - price[new]
+
+    if max_per_week < 2:
+        return
+
+    swaps.sort(key=lambda m: -m[0])
+    swaps = swaps[:moves_per_state]
+    for i, (_, s1, new1) in enumerate(swaps):
+        for _, s2, new2 in swaps[i + 1:]:
+            if s1 == s2 or new1 == new2:
+                continue
+            bank = state.bank + price[slots[s1]] + price[slots[s2]] - price[new1] - price[new2]
+            if bank < 0:
+                continue
+            squad = slots.copy()
+            squad[s1], squad[s2] = new1, new2
+            if np.bincount(club[squad]).max() > MAX_PER_CLUB:
+                continue
+            yield ((slots[s1], new1), (slots[s2], new2)), squad, bank
+
+
+def _plan_table(best, weeks, ids, pool, P, captain, hit_cost):
+    path = []
+    state = best
+    while state.parent is not None:
+        path.append(state)
+        state = state.parent
+    path.reverse()
+
+    names = pool["web_name"] if "web_name" in pool.columns else pd.Series(ids, index=ids)
+    rows, squads = [], []
+    for t, (week, state) in enumerate(zip(weeks, path)):
+        week_points = float(lineup_points(P[state.slots][:, t:t + 1], captain)[0])
+        rows.append({
+            "gameweek": week,
+            "transfers_out": [names.iloc[out] for out, _ in state.moves],
+            "transfers_in": [names.iloc[new] for _, new in state.moves],
+            "hits": state.hits,
+            "free_transfers": state.parent.free,
+            "bank": state.bank / 10,
+            "expected_points": week_points - hit_cost * state.hits,
+        })
+        squads.append(ids[state.slots].tolist())
+
+    plan = pd.DataFrame(rows)
+    return {
+        "expected_points": float(plan["expected_points"].sum()) if len(plan) else 0.0,
+        "hits": int(plan["hits"].sum()) if len(plan) else 0,
+        "plan": plan,
+        "squads": squads,
+    }
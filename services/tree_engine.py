@@ -0,0 +1,145 @@
+# services/tree_engine.py
+
+import json
+import threading
+
+import numpy as np
+
+# Objectives whose prediction is the raw margin (identity link)
+IDENTITY_OBJECTIVES = {"reg:squarederror", "reg:absoluteerror", "reg:pseudohubererror"}
+
+
+class TreeEnsemble:
+    """
+    XGBoost tree ensemble flattened into NumPy node arrays.
+
+    All trees share one set of arrays; child indices are global.
+    Prediction walks every (row, tree) pair one level per step, so the
+    Python-level loop runs `max_depth` times regardless of batch size.
+    Leaves point back to themselves, so no leaf masks are needed.
+    """
+
+    def __init__(self, roots, left, right, feature, threshold, default_left,
+                 value, base_score, max_depth):
+        n_nodes = len(left)
+        is_leaf = left < 0
+        own = np.arange(n_nodes, dtype=np.int64)
+
+        self.roots = roots
+        # children[node + n_nodes * go_left] -> next node
+        self.children = np.concatenate([
+            np.where(is_leaf, own, right),
+            np.where(is_leaf, own, left),
+        ])
+        self.feature = np.where(is_leaf, 0, feature)
+        self.threshold = threshold
+        self.default_left = default_left
+        self.value = value
+        self.n_nodes = n_nodes
+        self.base_score = base_score
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_booster(cls, booster):
+        """Builds the node arrays from a Booster's JSON dump."""
+        model = json.loads(booster.save_raw(raw_format="json"))
+        learner = model["learner"]
+
+        objective = learner["objective"]["name"]
+        if objective not in IDENTITY_OBJECTIVES:
+            raise ValueError(f"Unsupported objective for tree engine: {objective}")
+        if learner["gradient_booster"]["name"] != "gbtree":
+            raise ValueError("Tree engine only supports gbtree models")
+
+        # '[5E-1]' in xgboost >= 2, '5E-1' before
+        base_score = float(learner["learner_model_param"]["base_score"].strip("[]"))
+
+        trees = learner["gradient_booster"]["model"]["trees"]
+
+        roots, left, right, feature, threshold, default_left = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for tree in trees:
+            if any(tree.get("split_type", [])):
+                raise ValueError("Categorical splits are not supported")
+
+            l = np.asarray(tree["left_children"], dtype=np.int64)
+            r = np.asarray(tree["right_children"], dtype=np.int64)
+
+            roots.append(offset)
+            left.append(np.where(l < 0, -1, l + offset))
+            right.append(np.where(r < 0, -1, r + offset))
+            feature.append(np.asarray(tree["split_indices"], dtype=np.int64))
+            # Leaf values are stored in split_conditions
+            threshold.append(np.asarray(tree["split_conditions"], dtype=np.float32))
+            default_left.append(np.asarray(tree["default_left"], dtype=bool))
+
+            max_depth = max(max_depth, _tree_depth(l, r))
+            offset += len(l)
+
+        threshold = np.concatenate(threshold)
+        left = np.concatenate(left)
+
+        return cls(
+            roots=np.asarray(roots, dtype=np.int64),
+            left=left,
+            right=np.concatenate(right),
+            feature=np.concatenate(feature),
+            threshold=threshold,
+            default_left=np.concatenate(default_left),
+            value=np.where(left < 0, threshold, 0).astype(np.float32),
+            base_score=np.float32(base_score),
+            max_depth=max_depth,
+        )
+
+    def predict(self, X):
+        """Predicts every row of a 2D float array (NaN = missing)."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+
+        n_rows, n_features = X.shape
+        flat = X.ravel()
+        row_base = (np.arange(n_rows, dtype=np.int64) * n_features)[:, None]
+        node = np.broadcast_to(self.roots, (n_rows, len(self.roots))).copy()
+
+        for _ in range(self.max_depth):
+            x = flat[row_base + self.feature[node]]
+            # NaN < t is False, so missing values only go left by default
+            go_left = (x < self.threshold[node]) | (np.isnan(x) & self.default_left[node])
+            node = self.children[node + self.n_nodes * go_left]
+
+        # XGBoost adds the trees one at a time onto base_score in float32;
+        # a cumulative sum in the same order matches it bit for bit, where
+        # sum()'s pairwise order drifts by up to ~1e-5 over 400 trees
+        margin = np.empty((n_rows, len(self.roots) + 1), dtype=np.float32)
+        margin[:, 0] = self.base_score
+        margin[:, 1:] = self.value[node]
+        return np.cumsum(margin, axis=1, dtype=np.float32)[:, -1]
+
+
+def _tree_depth(left, right):
+    """Depth (number of splits on the longest path) of one tree."""
+    depth = np.zeros(len(left), dtype=np.int64)
+    for i in range(len(left)):
+        if left[i] >= 0:
+            depth[left[i]] = depth[i] + 1
+            depth[right[i]] = depth[i] + 1
+    return int(depth.max()) if len(depth) else 0
+
+
+_lock = threading.Lock()
+_engines = {}
+
+
+def get_tree_ensemble(model, version):
+    """Flattened ensemble for a model, built once per model version."""
+    engine = _engines.get(version)
+    if engine is None:
+        with _lock:
+            engine = _engines.get(version)
+            if engine is None:
+                booster = model.get_booster() if hasattr(model, "get_booster") else model
+                engine = _engines[version] = TreeEnsemble.from_booster(booster)
+    return engine
@@ -2,26 +2,22 @@
 
 import numpy as np
 from services.ml_predictor import predict_player_score
+from services.simulation import simulate_matrix, uncertainty_stdev
 
-def predict_with_uncertainty(player_row, n_simulations=1000):
+
+def predict_with_uncertainty(player_row, n_simulations=1000, rng=None):
     """
     Returns P10, P50, P90 estimates using Monte Carlo simulation
     around the model's predicted score.
+    For the whole player pool, use services.simulation.simulate_players.
     """
 
     mean_pred = predict_player_score(player_row)
 
     # Conservative, FPL-realistic std deviation
-    # You can tune this later
-    std_dev = max(1.5, 0.35 * mean_pred)
-
-    simulations = np.random.normal(
-        loc=mean_pred,
-        scale=std_dev,
-        size=n_simulations
-    )
+    std_dev = uncertainty_stdev([mean_pred])
 
-    simulations = np.clip(simulations, 0, None)
+    simulations = simulate_matrix([mean_pred], std_dev, n_simulations, rng)[0]
 
     return {
         "p10": float(np.percentile(simulations, 10)),
@@ -0,0 +1,206 @@
+# tests/conftest.py
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from aiohttp import web
+
+# Run from the repo root without installing the package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def make_player(pid, team=1, element_type=3):
+    return {"id": pid, "web_name": f"Player{pid}", "element_type": element_type, "team": team}
+
+
+def make_gameweek(round_, points=2):
+    return {
+        "round": round_,
+        "total_points": points,
+        "minutes": 90,
+        "expected_goals": "0.10",
+        "expected_assists": "0.05",
+        "expected_goal_involvements": "0.15",
+        "ict_index": "3.0",
+        "was_home": round_ % 2 == 0,
+        "opponent_team": 2,
+    }
+
+
+def make_player_table(n=200, seed=0):
+    """
+    Player rows shaped like FPLClient.get_players_df: FPL's string-typed
+    stats, some unknown venues, and recent_matches lists (some empty).
+    """
+    rng = np.random.default_rng(seed)
+
+    def stat(scale):
+        return [f"{v:.2f}" for v in rng.gamma(1.5, scale, n)]
+
+    def matches():
+        return [
+            {"total_points": int(rng.integers(0, 13)),
+             "expected_goal_involvements": f"{rng.gamma(1.0, 0.3):.2f}"}
+            for _ in range(int(rng.integers(0, 8)))
+        ]
+
+    return pd.DataFrame({
+        "id": np.arange(1, n + 1),
+        "web_name": [f"Player{i}" for i in range(1, n + 1)],
+        "position": rng.choice([1, 2, 3, 4], n, p=[0.1, 0.33, 0.4, 0.17]),
+        "team": rng.integers(1, 21, n),
+        "now_cost": np.round(rng.uniform(4.0, 13.0, n), 1),
+        "form": stat(1.5),
+        "minutes": rng.integers(0, 900, n),
+        "xG": stat(0.15),
+        "xA": stat(0.1),
+        "xGI": stat(0.25),
+        "ict_index": stat(3.0),
+        "team_strength": rng.integers(2, 6, n),
+        "next_is_home": rng.choice(np.array([True, False, None], dtype=object), n),
+        "fixture_difficulty": rng.integers(1, 6, n),
+        "recent_matches": [matches() for _ in range(n)],
+    })
+
+
+class StubSource:
+    """
+    In-memory FPL data source for FPLCache: a bootstrap with `n_players`
+    players (a valid squad pool) and one upcoming gameweek, and summaries
+    with a short history and fixture list. Counts every fetch.
+    """
+
+    def __init__(self, n_players=40, deadline="2999-08-16T17:30:00Z"):
+        self.elements = [
+            {
+                "id": pid,
+                "web_name": f"Player{pid}",
+                "team": pid % 10 + 1,
+                "element_type": [1, 2, 2, 3, 3, 4][pid % 6] if pid > 4 else 1,
+                "now_cost": 45 + pid % 8 * 5,
+                "total_points": pid,
+                "minutes": 90 * (pid % 5),
+                "event_points": 2,
+                "form": f"{pid % 7}.0",
+                "expected_goals": "0.20",
+                "expected_assists": "0.10",
+                "expected_goal_involvements": "0.30",
+                "ict_index": "4.0",
+            }
+            for pid in range(1, n_players + 1)
+        ]
+        self.deadline = deadline
+        self.bootstrap_calls = 0
+        self.summary_calls = []
+
+    def fetch_bootstrap(self):
+        self.bootstrap_calls += 1
+        events = [{"id": 1, "is_next": True, "deadline_time": self.deadline}]
+        return {"elements": [dict(e) for e in self.elements], "events": events}
+
+    def fetch_summaries(self, player_ids):
+        self.summary_calls.append(sorted(player_ids))
+        return {
+            pid: {
+                "history": [
+                    {"round": r, "total_points": (pid + r) % 9, "expected_goal_involvements": "0.30"}
+                    for r in (1, 2, 3)
+                ],
+                "fixtures": [{"event": 4, "is_home": pid % 2 == 0,
+                              "team_h": pid % 10 + 1, "team_a": (pid + 3) % 10 + 1}],
+            }
+            for pid in player_ids
+        }
+
+
+class FakeFPLServer:
+    """
+    Local stand-in for the FPL API (bootstrap-static and element-summary)
+    served by aiohttp on a background thread, so code that calls
+    asyncio.run itself can be tested against real HTTP.
+
+    - failures: {path: [status, ...]} returned (in order) before the
+      real payload, e.g. {"/api/element-summary/3/": [429, 503]}
+    - requests: (time, path) of every request
+    - max_in_flight: most element-summary requests served at once
+    """
+
+    def __init__(self, players, histories, events=None, delay=0.0):
+        self.players = players
+        self.histories = histories
+        self.events = events or []
+        self.delay = delay
+        self.failures = {}
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.url = None
+
+        self._loop = asyncio.new_event_loop()
+        self._runner = None
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    async def _bootstrap(self, request):
+        return self._reply(request, {"elements": self.players, "events": self.events})
+
+    async def _summary(self, request):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            pid = int(request.match_info["pid"])
+            return self._reply(request, {"history": self.histories.get(pid, [])})
+        finally:
+            self.in_flight -= 1
+
+    def _reply(self, request, payload):
+        self.requests.append((time.monotonic(), request.path))
+        pending = self.failures.get(request.path)
+        if pending:
+            return web.Response(status=pending.pop(0))
+        return web.json_response(payload)
+
+    def count(self, path):
+        return sum(1 for _, p in self.requests if p == path)
+
+    def times(self, path):
+        return [t for t, p in self.requests if p == path]
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_get("/api/bootstrap-static/", self._bootstrap)
+        app.router.add_get("/api/element-summary/{pid}/", self._summary)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/api"
+
+    def start(self):
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+@pytest.fixture
+def fpl_server():
+    """Fake FPL API with 6 players and 3 finished gameweeks."""
+    players = [make_player(pid, team=pid % 3 + 1) for pid in range(1, 7)]
+    histories = {p["id"]: [make_gameweek(r, points=p["id"] + r) for r in (1, 2, 3)] for p in players}
+    events = [{"id": r, "finished": r <= 3, "is_current": r == 3} for r in (1, 2, 3, 4)]
+    server = FakeFPLServer(players, histories, events).start()
+    yield server
+    server.stop()
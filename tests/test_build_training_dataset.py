@@ -0,0 +1,75 @@
+# tests/test_build_training_dataset.py
+
+import pandas as pd
+
+from training.build_training_dataset import add_features
+from utils.feature_engineering import add_rolling_features
+
+
+def raw_rows(season, rounds, points, player_id=1):
+    return pd.DataFrame({
+        "season": season,
+        "player_id": player_id,
+        "position": "MID",
+        "team_strength": 3,
+        "round": rounds,
+        "total_points": points,
+        "minutes": 90,
+        "xG": 0.25,
+        "xA": 0.25,
+        "xGI": 0.5,
+        "ict_index": 4.0,
+        "was_home": True,
+    })
+
+
+def two_seasons():
+    # Player id 1 in 2024-25 is not the same player as id 1 in 2023-24
+    return pd.concat([
+        raw_rows("2024-25", [1, 2], [2, 4]),
+        raw_rows("2023-24", [36, 37, 38], [5, 5, 5]),
+    ], ignore_index=True)
+
+
+def test_rolling_windows_restart_each_season():
+    df = add_features(two_seasons())
+
+    new_season = df[df["season"] == "2024-25"]
+    assert new_season["rolling_form"].tolist() == [2.0, 3.0]
+    assert df[df["season"] == "2023-24"]["rolling_form"].tolist() == [5.0, 5.0, 5.0]
+
+
+def test_rolling_without_season_column_groups_by_player():
+    df = add_rolling_features(two_seasons().drop(columns="season").assign(round=[39, 40, 36, 37, 38]))
+
+    assert df["round"].tolist() == [36, 37, 38, 39, 40]
+    assert df["rolling_form"].tolist() == [5.0, 5.0, 5.0, 4.25, 4.2]
+
+
+def test_incremental_build_appends_a_new_season(tmp_path):
+    from training.build_training_dataset import (
+        OUTPUT_COLUMNS,
+        build_training_dataset,
+        update_training_dataset,
+    )
+
+    raw_csv = tmp_path / "raw.csv"
+    output_csv = tmp_path / "training.csv"
+    paths = dict(raw_root=tmp_path / "raw", raw_csv=raw_csv,
+                 output_root=tmp_path / "training", output_csv=output_csv)
+
+    raw_rows("2023-24", [1, 2, 3], [5, 5, 5]).to_csv(raw_csv, index=False)
+    build_training_dataset(**paths)
+
+    # Rounds 1-2 of the new season are <= last season's max round
+    pd.concat([
+        raw_rows("2023-24", [1, 2, 3], [5, 5, 5]),
+        raw_rows("2024-25", [1, 2], [2, 4]),
+    ]).to_csv(raw_csv, index=False)
+
+    appended = update_training_dataset(**paths)
+
+    assert appended["season"].tolist() == ["2024-25", "2024-25"]
+    assert appended["rolling_form"].tolist() == [2.0, 3.0]
+    assert len(pd.read_csv(output_csv)) == 5
+    assert list(pd.read_csv(output_csv, nrows=0).columns) == OUTPUT_COLUMNS
@@ -0,0 +1,252 @@
+# tests/test_fetch_history.py
+
+import asyncio
+import json
+
+import pandas as pd
+import pytest
+
+from conftest import make_gameweek
+from data.fetch_history import fetch_histories_async, load_checkpoint, load_fpl_history
+
+
+def fetch(server, tmp_path, **kwargs):
+    kwargs.setdefault("backoff", 0.01)
+    return asyncio.run(fetch_histories_async(
+        server.players,
+        base_url=server.url,
+        checkpoint_path=tmp_path / "checkpoint.jsonl",
+        **kwargs,
+    ))
+
+
+def test_fetches_every_player(fpl_server, tmp_path):
+    results = fetch(fpl_server, tmp_path)
+
+    assert sorted(results) == [p["id"] for p in fpl_server.players]
+    assert [row["round"] for row in results[1]] == [1, 2, 3]
+    assert results[2][0]["total_points"] == 3
+
+
+@pytest.mark.parametrize("statuses", [[429], [503, 500], [429, 502, 504]])
+def test_retries_rate_limits_and_server_errors(fpl_server, tmp_path, statuses):
+    path = "/api/element-summary/3/"
+    fpl_server.failures[path] = list(statuses)
+
+    results = fetch(fpl_server, tmp_path, retries=3)
+
+    assert len(results[3]) == 3
+    assert fpl_server.count(path) == len(statuses) + 1
+
+
+def test_backoff_grows_exponentially(fpl_server, tmp_path):
+    path = "/api/element-summary/2/"
+    fpl_server.failures[path] = [503, 503]
+
+    fetch(fpl_server, tmp_path, retries=2, backoff=0.05)
+
+    first, second, third = fpl_server.times(path)
+    # backoff * 2**attempt * (1 + jitter), jitter in [0, 1)
+    assert second - first >= 0.05
+    assert third - second >= 0.10
+
+
+def test_client_errors_are_not_retried(fpl_server, tmp_path):
+    path = "/api/element-summary/4/"
+    fpl_server.failures[path] = [404]
+
+    with pytest.raises(RuntimeError, match="rerun to resume"):
+        fetch(fpl_server, tmp_path, retries=3)
+    assert fpl_server.count(path) == 1
+
+
+def test_resumes_from_checkpoint(fpl_server, tmp_path):
+    path = "/api/element-summary/5/"
+    fpl_server.failures[path] = [500, 500]
+
+    # Retries exhausted for one player: the others are checkpointed
+    with pytest.raises(RuntimeError):
+        fetch(fpl_server, tmp_path, retries=1)
+    checkpointed = load_checkpoint(tmp_path / "checkpoint.jsonl")
+    assert sorted(checkpointed) == [1, 2, 3, 4, 6]
+
+    first_run = len(fpl_server.requests)
+    results = fetch(fpl_server, tmp_path, retries=1)
+
+    assert sorted(results) == [1, 2, 3, 4, 5, 6]
+    assert [p for _, p in fpl_server.requests[first_run:]] == [path]
+
+
+def test_checkpoint_ignores_partial_last_line(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    path.write_text(json.dumps({"player_id": 1, "rows": [{"round": 1}]}) + "\n" + '{"player_id": 2, "ro')
+
+    assert load_checkpoint(path) == {1: [{"round": 1}]}
+
+
+def test_checkpoint_for_another_key_is_ignored(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    key = {"season": "2023-24", "round": 3}
+    path.write_text(
+        json.dumps({"key": key}) + "\n" + json.dumps({"player_id": 1, "rows": [{"round": 1}]}) + "\n"
+    )
+
+    assert load_checkpoint(path, key) == {1: [{"round": 1}]}
+    assert load_checkpoint(path, {"season": "2023-24", "round": 4}) == {}
+    assert load_checkpoint(path, {"season": "2024-25", "round": 3}) == {}
+
+
+def test_respects_concurrency_limit(fpl_server, tmp_path):
+    fpl_server.players = [dict(fpl_server.players[0], id=pid) for pid in range(1, 25)]
+    fpl_server.delay = 0.05
+
+    fetch(fpl_server, tmp_path, concurrency=3)
+
+    assert fpl_server.max_in_flight == 3
+
+
+def test_full_load_writes_csv_and_removes_checkpoint(fpl_server, tmp_path):
+    output = tmp_path / "history.csv"
+    checkpoint = tmp_path / "checkpoint.jsonl"
+
+    df = load_fpl_history(output, base_url=fpl_server.url, backoff=0.01,
+                          checkpoint_path=checkpoint, store_dir=None)
+
+    assert len(df) == 6 * 3
+    assert output.exists()
+    assert not checkpoint.exists()
+
+
+def run_main(monkeypatch, server, tmp_path, *extra):
+    from data import fetch_history
+
+    monkeypatch.setattr("sys.argv", [
+        "fetch_history",
+        "--output", str(tmp_path / "history.csv"),
+        "--base-url", server.url,
+        "--backoff", "0.01",
+        "--checkpoint", str(tmp_path / "checkpoint.jsonl"),
+        "--store-dir", "",
+        *extra,
+    ])
+    fetch_history.main()
+    return pd.read_csv(tmp_path / "history.csv")
+
+
+def test_main_full_load(monkeypatch, fpl_server, tmp_path):
+    df = run_main(monkeypatch, fpl_server, tmp_path)
+
+    assert len(df) == 6 * 3
+
+
+def test_main_incremental_appends_new_rounds(monkeypatch, fpl_server, tmp_path):
+    run_main(monkeypatch, fpl_server, tmp_path)
+
+    # Gameweek 4 finishes: only its rows are appended
+    for pid, history in fpl_server.histories.items():
+        history.append(make_gameweek(4, points=pid))
+    fpl_server.events[3]["finished"] = True
+    first_run = len(fpl_server.requests)
+
+    df = run_main(monkeypatch, fpl_server, tmp_path, "--incremental")
+
+    assert len(df) == 6 * 4
+    assert df.groupby("player_id")["round"].apply(list).map(lambda r: r == [1, 2, 3, 4]).all()
+    assert fpl_server.count("/api/element-summary/1/") == 2
+    assert len(fpl_server.requests) - first_run == 1 + 6
+
+
+def test_main_incremental_up_to_date(monkeypatch, fpl_server, tmp_path):
+    run_main(monkeypatch, fpl_server, tmp_path)
+    first_run = len(fpl_server.requests)
+
+    df = run_main(monkeypatch, fpl_server, tmp_path, "--incremental")
+
+    assert len(df) == 6 * 3
+    assert len(fpl_server.requests) - first_run == 1  # bootstrap only
+
+
+def test_full_load_keeps_other_seasons_in_store(fpl_server, tmp_path):
+    from data.storage import read_partitioned
+
+    store = tmp_path / "store"
+    options = dict(base_url=fpl_server.url, backoff=0.01,
+                   checkpoint_path=tmp_path / "checkpoint.jsonl", store_dir=store)
+
+    fpl_server.events[0]["deadline_time"] = "2023-08-11T17:30:00Z"
+    load_fpl_history(tmp_path / "history.csv", **options)
+    fpl_server.events[0]["deadline_time"] = "2024-08-16T17:30:00Z"
+    load_fpl_history(tmp_path / "history.csv", **options)
+    # Reloading a season replaces only that season
+    load_fpl_history(tmp_path / "history.csv", **options)
+
+    df = read_partitioned(store)
+    assert df.groupby("season").size().to_dict() == {"2023-24": 6 * 3, "2024-25": 6 * 3}
+
+
+def test_main_incremental_starts_a_new_season(monkeypatch, fpl_server, tmp_path):
+    fpl_server.events[0]["deadline_time"] = "2023-08-11T17:30:00Z"
+    run_main(monkeypatch, fpl_server, tmp_path)
+
+    # New season: same player ids, rounds restart at 1
+    fpl_server.events[0]["deadline_time"] = "2024-08-16T17:30:00Z"
+    for event in fpl_server.events:
+        event["finished"] = event["id"] <= 2
+    for pid, history in fpl_server.histories.items():
+        history[:] = [make_gameweek(r, points=pid) for r in (1, 2)]
+
+    df = run_main(monkeypatch, fpl_server, tmp_path, "--incremental")
+
+    assert df.groupby("season").size().to_dict() == {"2023-24": 6 * 3, "2024-25": 6 * 2}
+
+
+def test_main_incremental_reads_csv_without_season(monkeypatch, fpl_server, tmp_path):
+    run_main(monkeypatch, fpl_server, tmp_path)
+    legacy = pd.read_csv(tmp_path / "history.csv").drop(columns="season")
+    legacy.to_csv(tmp_path / "history.csv", index=False)
+    first_run = len(fpl_server.requests)
+
+    df = run_main(monkeypatch, fpl_server, tmp_path, "--incremental")
+
+    assert len(df) == 6 * 3
+    assert (df["season"] == "2023-24").all()
+    assert len(fpl_server.requests) - first_run == 1  # bootstrap only
+
+
+def test_round_in_progress_is_stored_once_finished(monkeypatch, fpl_server, tmp_path):
+    # Gameweek 4 is under way: partial points already show in the history
+    for pid, history in fpl_server.histories.items():
+        history.append(make_gameweek(4, points=1))
+
+    df = run_main(monkeypatch, fpl_server, tmp_path)
+    assert df["round"].max() == 3
+
+    for pid, history in fpl_server.histories.items():
+        history[-1] = make_gameweek(4, points=pid + 10)
+    fpl_server.events[3]["finished"] = True
+
+    df = run_main(monkeypatch, fpl_server, tmp_path, "--incremental")
+
+    gw4 = df[df["round"] == 4].set_index("player_id")["total_points"]
+    assert gw4.to_dict() == {pid: pid + 10 for pid in range(1, 7)}
+
+
+def test_incremental_run_discards_stale_checkpoint(monkeypatch, fpl_server, tmp_path):
+    run_main(monkeypatch, fpl_server, tmp_path)
+
+    # Left by a full run interrupted during gameweek 4, before it finished
+    stale = [make_gameweek(r, points=1) for r in (1, 2, 3, 4)]
+    (tmp_path / "checkpoint.jsonl").write_text(
+        json.dumps({"key": {"season": "2023-24", "round": 3}}) + "\n"
+        + "".join(json.dumps({"player_id": pid, "rows": stale}) + "\n" for pid in range(1, 7))
+    )
+
+    for pid, history in fpl_server.histories.items():
+        history.append(make_gameweek(4, points=pid + 10))
+    fpl_server.events[3]["finished"] = True
+
+    df = run_main(monkeypatch, fpl_server, tmp_path, "--incremental")
+
+    gw4 = df[df["round"] == 4].set_index("player_id")["total_points"]
+    assert gw4.to_dict() == {pid: pid + 10 for pid in range(1, 7)}
+    assert not (tmp_path / "checkpoint.jsonl").exists()
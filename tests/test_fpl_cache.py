@@ -0,0 +1,102 @@
+# tests/test_fpl_cache.py
+
+import pytest
+
+from conftest import StubSource
+from services import fpl_cache
+from services.fpl_cache import FileCacheStore, FPLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.time() for TTL checks."""
+    now = [1_000_000.0]
+    monkeypatch.setattr(fpl_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_reuses_snapshot_saved_by_another_process(tmp_path, clock):
+    store = FileCacheStore(tmp_path)
+    app_source, worker_source = StubSource(), StubSource()
+    app = FPLCache(app_source, FileCacheStore(tmp_path), ttl=60, stale_while_revalidate=False)
+    worker = FPLCache(worker_source, store, ttl=60, stale_while_revalidate=False)
+
+    worker.get_snapshot()
+    assert app.get_snapshot()["fetched_at"] == clock[0]
+
+    # Past the TTL the worker refreshes first; the app reads its payload
+    clock[0] += 120
+    worker.refresh()
+    assert app.get_snapshot()["fetched_at"] == clock[0]
+    assert app_source.bootstrap_calls == 0
+
+
+def make_cache(tmp_path, source, **kwargs):
+    kwargs.setdefault("ttl", 60)
+    return FPLCache(source, FileCacheStore(tmp_path), **kwargs)
+
+
+def test_fresh_reads_are_served_from_cache(tmp_path, clock):
+    source = StubSource(n_players=4)
+    cache = make_cache(tmp_path, source)
+
+    first = cache.get_snapshot()
+    clock[0] += 59
+    assert cache.get_snapshot() is first
+
+    assert source.bootstrap_calls == 1
+    assert source.summary_calls == [[1, 2, 3, 4]]
+
+
+def test_persisted_snapshot_survives_restart(tmp_path, clock):
+    make_cache(tmp_path, StubSource(n_players=4)).get_snapshot()
+    source = StubSource(n_players=4)
+
+    players = make_cache(tmp_path, source).get_players()
+
+    assert [p["id"] for p in players] == [1, 2, 3, 4]
+    assert [m["round"] for m in players[0]["history"]] == [1, 2, 3]
+    assert source.bootstrap_calls == 0 and source.summary_calls == []
+
+
+def test_expired_read_refreshes_synchronously(tmp_path, clock):
+    source = StubSource(n_players=4)
+    cache = make_cache(tmp_path, source, stale_while_revalidate=False)
+    cache.get_snapshot()
+
+    clock[0] += 60
+    snapshot = cache.get_snapshot()
+
+    assert snapshot["fetched_at"] == clock[0]
+    assert source.bootstrap_calls == 2
+    # Nothing changed: no summary is fetched again
+    assert source.summary_calls == [[1, 2, 3, 4], []]
+
+
+def test_stale_read_is_served_while_refreshing_in_background(tmp_path, clock):
+    source = StubSource(n_players=4)
+    cache = make_cache(tmp_path, source)
+    first = cache.get_snapshot()
+
+    clock[0] += 120
+    assert cache.get_snapshot() is first
+    cache._refresh_thread.join()
+
+    assert source.bootstrap_calls == 2
+    assert cache.get_snapshot()["fetched_at"] == clock[0]
+    assert source.bootstrap_calls == 2
+
+
+def test_refresh_only_fetches_changed_players(tmp_path, clock):
+    source = StubSource(n_players=4)
+    cache = make_cache(tmp_path, source)
+    cache.get_snapshot()
+
+    source.elements[2]["total_points"] += 6
+    cache.refresh()
+    assert source.summary_calls[-1] == [3]
+
+    # A new deadline is a new gameweek key: every summary is re-fetched
+    source.deadline = "2999-08-23T17:30:00Z"
+    cache.refresh()
+    assert source.summary_calls[-1] == [1, 2, 3, 4]
@@ -0,0 +1,137 @@
+# tests/test_ingest.py
+
+import hashlib
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("bs4")
+pytest.importorskip("chromadb")
+pytest.importorskip("langchain_community")
+pytest.importorskip("langchain_text_splitters")
+
+from langchain_community.vectorstores import Chroma  # noqa: E402
+
+from rag.ingest import ingest_documents  # noqa: E402
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures" / "news"
+
+pytestmark = pytest.mark.filterwarnings("ignore::DeprecationWarning")
+
+
+class HashEmbeddings:
+    """Deterministic offline embeddings; records the size of every batch."""
+
+    def __init__(self, dim=16):
+        self.dim = dim
+        self.batches = []
+
+    def _vector(self, text):
+        seed = int(hashlib.sha1(text.encode()).hexdigest()[:8], 16)
+        return np.random.default_rng(seed).normal(size=self.dim).tolist()
+
+    def embed_documents(self, texts):
+        self.batches.append(len(texts))
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+@pytest.fixture
+def pages(tmp_path):
+    directory = tmp_path / "pages"
+    shutil.copytree(FIXTURES, directory)
+    return {path.stem: str(path) for path in sorted(directory.glob("*.html"))}
+
+
+def stored(store, embeddings):
+    db = Chroma(persist_directory=str(store), embedding_function=embeddings)
+    data = db.get(include=["metadatas", "documents"])
+    return {
+        doc_id: (meta["source"], text)
+        for doc_id, meta, text in zip(data["ids"], data["metadatas"], data["documents"])
+    }
+
+
+def ingest(sources, store, embeddings, **kwargs):
+    return ingest_documents(list(sources), store, embeddings=embeddings, **kwargs)
+
+
+def test_first_ingest_embeds_every_chunk(pages, tmp_path):
+    embeddings = HashEmbeddings()
+    report = ingest(pages.values(), tmp_path / "store", embeddings)
+
+    docs = stored(tmp_path / "store", embeddings)
+    assert report["embedded"] == report["chunks"] == len(docs) > 0
+    assert report["skipped"] == report["deleted"] == 0
+    assert {source for source, _ in docs.values()} == set(pages.values())
+    assert any("ruled out of the Manchester derby" in text for _, text in docs.values())
+
+
+def test_reingest_unchanged_pages_adds_nothing(pages, tmp_path):
+    embeddings = HashEmbeddings()
+    ingest(pages.values(), tmp_path / "store", embeddings)
+    before = stored(tmp_path / "store", embeddings)
+    embeddings.batches.clear()
+
+    report = ingest(pages.values(), tmp_path / "store", embeddings)
+
+    assert report["embedded"] == report["deleted"] == 0
+    assert report["skipped"] == len(before)
+    assert embeddings.batches == []
+    assert stored(tmp_path / "store", embeddings) == before
+
+
+def test_changed_page_replaces_its_chunks(pages, tmp_path):
+    embeddings = HashEmbeddings()
+    ingest(pages.values(), tmp_path / "store", embeddings)
+    before = stored(tmp_path / "store", embeddings)
+
+    changed = Path(pages["transfers"])
+    changed.write_text(changed.read_text().replace("talks over a new contract", "agreed a new contract"))
+    report = ingest(pages.values(), tmp_path / "store", embeddings)
+
+    after = stored(tmp_path / "store", embeddings)
+    texts = [text for source, text in after.values() if source == pages["transfers"]]
+    assert report["embedded"] == report["deleted"] == 1
+    assert len(after) == len(before)
+    assert any("agreed a new contract" in t for t in texts)
+    assert not any("talks over a new contract" in t for t in texts)
+
+    # The unchanged page keeps its documents (same ids)
+    untouched = {i for i, (s, _) in before.items() if s == pages["premier_league"]}
+    assert untouched <= set(after)
+
+
+def test_removed_page_is_deleted(pages, tmp_path):
+    embeddings = HashEmbeddings()
+    ingest(pages.values(), tmp_path / "store", embeddings)
+
+    report = ingest([pages["premier_league"]], tmp_path / "store", embeddings)
+
+    after = stored(tmp_path / "store", embeddings)
+    assert report["deleted"] >= 1
+    assert {source for source, _ in after.values()} == {pages["premier_league"]}
+
+
+def test_unreadable_page_keeps_its_chunks(pages, tmp_path):
+    embeddings = HashEmbeddings()
+    ingest(pages.values(), tmp_path / "store", embeddings)
+    before = stored(tmp_path / "store", embeddings)
+
+    Path(pages["transfers"]).unlink()
+    report = ingest(pages.values(), tmp_path / "store", embeddings)
+
+    assert report["sources"] == 1
+    assert report["deleted"] == 0
+    assert stored(tmp_path / "store", embeddings) == before
+
+
+def test_embeds_in_batches(pages, tmp_path):
+    embeddings = HashEmbeddings()
+    report = ingest(pages.values(), tmp_path / "store", embeddings, batch_size=1)
+
+    assert embeddings.batches == [1] * report["embedded"]
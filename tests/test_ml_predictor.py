@@ -0,0 +1,71 @@
+# tests/test_ml_predictor.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_player_table
+from services.ml_predictor import build_feature_matrix, predict_player_score, predict_scores
+from services.model_registry import get_model
+from utils.feature_engineering import FEATURES
+
+
+def baseline_features(row):
+    """The original per-row prepare_features, kept as the reference."""
+    matches = row.get("recent_matches", [])
+
+    pts = [float(m.get("total_points", 0)) for m in matches[-5:]]
+    rolling_form = float(np.mean(pts)) if pts else float(row.get("form", 0))
+    xgi_vals = [float(m.get("expected_goal_involvements", 0)) for m in matches[-3:]]
+    rolling_xgi = float(np.mean(xgi_vals)) if xgi_vals else float(row.get("xGI", 0))
+
+    position = int(row.get("position", 0))
+    xG, xA, xGI = float(row.get("xG", 0)), float(row.get("xA", 0)), float(row.get("xGI", 0))
+    if position == 1:  # GK
+        xG = xA = xGI = rolling_xgi = 0.0
+
+    return pd.DataFrame([{
+        "minutes": float(row.get("minutes", 0)),
+        "xG": xG,
+        "xA": xA,
+        "xGI": xGI,
+        "ict_index": float(row.get("ict_index", 0)),
+        "team_strength": float(row.get("team_strength", 3)),
+        "was_home": 1 if row.get("next_is_home") else 0,
+        "rolling_form": rolling_form,
+        "rolling_xgi": rolling_xgi,
+        "position_encoded": position,
+        "opponent_strength": float(row.get("fixture_difficulty", 3)),
+    }])
+
+
+@pytest.fixture(scope="module")
+def players():
+    return make_player_table(200, seed=1)
+
+
+def test_feature_matrix_matches_per_row_baseline(players):
+    # Rolling means may differ in the last float64 bit (summation order);
+    # the model sees float32, where they must be identical
+    batched = build_feature_matrix(players).to_numpy(dtype=np.float32)
+    baseline = pd.concat([baseline_features(row) for _, row in players.iterrows()])[FEATURES]
+
+    assert np.abs(batched - baseline.to_numpy(dtype=np.float32)).max() == 0.0
+
+
+def test_batched_predictions_match_per_row_baseline(players):
+    model = get_model()
+    baseline = np.array([
+        float(model.predict(baseline_features(row))[0]) for _, row in players.iterrows()
+    ])
+
+    batched = predict_scores(players, backend="xgboost")
+
+    assert np.abs(batched - baseline).max() == 0.0
+
+
+def test_single_row_wrapper_matches_batch(players):
+    batched = predict_scores(players, backend="xgboost")
+    single = np.array([predict_player_score(row) for _, row in players.head(20).iterrows()])
+
+    assert np.abs(single - batched[:20]).max() < 1e-5
@@ -0,0 +1,227 @@
+# tests/test_news_sentiment.py
+
+import pandas as pd
+import pytest
+
+from rag.news import NewsCache, NewsSentimentStore, StaticNewsSource, join_sentiment
+from rag.sentiment import HeadlineScorer
+from services.news_prefetch import prefetch_news
+
+FEEDS = {
+    "Haaland": [
+        {"title": "Haaland ruled out with an injury", "url": "https://example.com/1"},
+        {"title": "Haaland injury doubt for the derby", "url": "https://example.com/2"},
+    ],
+    "Saka": [{"title": "Saka in top form with a goal and an assist", "url": "https://example.com/3"}],
+}
+
+
+@pytest.fixture
+def players():
+    return pd.DataFrame({
+        "id": [1, 2, 3],
+        "web_name": ["Haaland", "Saka", "Pickford"],
+        "predicted_score": [8.0, 6.5, 4.0],
+        "form": [5.0, 4.0, 3.0],
+        "xGI": [0.9, 0.6, 0.0],
+    })
+
+
+@pytest.fixture
+def prefetched(players, tmp_path):
+    store = NewsSentimentStore(tmp_path)
+    prefetch_news(players, news=NewsCache(StaticNewsSource(FEEDS)), scorer=HeadlineScorer(),
+                  store=store, by="predicted_score")
+    return store
+
+
+def test_join_sentiment_maps_table_by_id(players, prefetched):
+    df = join_sentiment(players, prefetched.load_table())
+
+    assert df["news_headlines"].tolist() == [2, 1, 0]
+    haaland, saka, pickford = df.itertuples()
+    assert haaland.news_sentiment < 0 < saka.news_sentiment
+    assert pickford.news_sentiment == 0.0 and pickford.news_icon == "🟡"
+
+
+def test_join_sentiment_without_table_is_neutral(players):
+    df = join_sentiment(players, None)
+
+    assert (df["news_sentiment"] == 0.0).all()
+    assert (df["news_headlines"] == 0).all()
+    assert set(df["news_icon"]) == {"🟡"}
+
+
+def test_sentiment_tag_uses_joined_columns(players, prefetched, monkeypatch):
+    pytest.importorskip("duckduckgo_search")
+    from rag import live_rag
+
+    df = join_sentiment(players, prefetched.load_table())
+    live_score = lambda articles: (99.0, "live")  # noqa: E731
+    monkeypatch.setattr(live_rag.get_default_scorer(), "sentiment", live_score)
+
+    haaland, saka, pickford = (row for _, row in df.iterrows())
+    assert live_rag.compute_sentiment_tag(haaland, []) == (haaland["news_sentiment"], haaland["news_icon"])
+    assert live_rag.compute_sentiment_tag(saka, []) == (saka["news_sentiment"], saka["news_icon"])
+    # No prefetched headlines: live headlines are scored
+    assert live_rag.compute_sentiment_tag(pickford, []) == (99.0, "live")
+
+
+def test_old_headlines_stop_counting(players, tmp_path, monkeypatch):
+    from services import news_prefetch
+
+    store = NewsSentimentStore(tmp_path)
+    clock = [1_000_000.0]
+    monkeypatch.setattr(news_prefetch.time, "time", lambda: clock[0])
+
+    def run(feeds):
+        news = NewsCache(StaticNewsSource(feeds), ttl=0)
+        table, _ = prefetch_news(players, news=news, scorer=HeadlineScorer(), store=store,
+                                 by="predicted_score", max_age=3600)
+        return table.set_index("web_name")
+
+    run(FEEDS)
+    clock[0] += 1800
+    later = {"Saka": [{"title": "Saka scores again", "url": "https://example.com/4"}]}
+    table = run(later)
+    assert table.loc["Haaland", "headlines"] == 2
+    assert table.loc["Saka", "headlines"] == 2
+
+    # The first injury headlines are now over an hour old
+    clock[0] += 1801
+    table = run(later)
+    assert table.loc["Haaland", "headlines"] == 0
+    assert table.loc["Haaland", "news_sentiment"] == 0.0
+    assert table.loc["Saka", "headlines"] == 1
+
+
+class FakeDate:
+    today_value = "2025-08-16"
+
+    @classmethod
+    def today(cls):
+        return cls
+
+    @classmethod
+    def isoformat(cls):
+        return cls.today_value
+
+
+@pytest.fixture
+def news_clock(monkeypatch):
+    """Controllable day and time.time() inside rag.news."""
+    from rag import news
+
+    now = [1_000_000.0]
+    monkeypatch.setattr(news.time, "time", lambda: now[0])
+    monkeypatch.setattr(news, "date", FakeDate)
+    monkeypatch.setattr(FakeDate, "today_value", "2025-08-16")
+    return now
+
+
+def test_news_cache_serves_repeat_requests_from_memory(news_clock):
+    source = StaticNewsSource(FEEDS)
+    cache = NewsCache(source)
+
+    first = cache.get_many(["Haaland", "Saka"])
+    news_clock[0] += 60
+    second = cache.get_many(["Saka", "Haaland"])
+
+    assert first == second
+    assert second["Haaland"] == FEEDS["Haaland"]
+    assert source.calls == [["Haaland", "Saka"]]
+
+
+def test_news_cache_refetches_after_ttl_or_on_a_new_day(news_clock):
+    source = StaticNewsSource(FEEDS)
+    cache = NewsCache(source, ttl=3600)
+    cache.get("Haaland")
+
+    news_clock[0] += 3600
+    cache.get("Haaland")
+    assert len(source.calls) == 2
+
+    FakeDate.today_value = "2025-08-17"
+    cache.get("Haaland")
+    assert len(source.calls) == 3
+
+
+def test_news_cache_batches_misses_and_collapses_duplicates(news_clock):
+    source = StaticNewsSource(FEEDS)
+    cache = NewsCache(source)
+    cache.get("Saka")
+
+    found = cache.get_many(["Haaland", "Pickford", "Saka", "Haaland"])
+
+    assert source.calls == [["Saka"], ["Haaland", "Pickford"]]
+    assert found == {"Haaland": FEEDS["Haaland"], "Pickford": [], "Saka": FEEDS["Saka"]}
+
+
+def test_news_cache_does_not_cache_failed_feeds(news_clock):
+    class FlakySource(StaticNewsSource):
+        def fetch(self, names, max_results=6):
+            articles = super().fetch(names, max_results)
+            if len(self.calls) == 1:
+                articles["Haaland"] = None  # feed request failed
+            return articles
+
+    source = FlakySource(FEEDS)
+    cache = NewsCache(source)
+
+    assert cache.get_many(["Haaland", "Saka"]) == {"Haaland": [], "Saka": FEEDS["Saka"]}
+    assert cache.get("Haaland") == FEEDS["Haaland"]
+    assert source.calls == [["Haaland", "Saka"], ["Haaland"]]
+
+
+class CountingModel:
+    """LexiconSentimentModel under the same name, recording every batch."""
+
+    def __init__(self):
+        from rag.sentiment import LexiconSentimentModel
+
+        self.inner = LexiconSentimentModel()
+        self.name = self.inner.name
+        self.batches = []
+
+    def score(self, headlines):
+        self.batches.append(list(headlines))
+        return self.inner.score(headlines)
+
+
+HEADLINES = [
+    "Haaland ruled out with an injury",
+    "Saka in top form with a goal and an assist",
+    "Palmer fit for the weekend",
+]
+
+
+def test_headlines_are_scored_once_across_scorers(tmp_path):
+    from rag.sentiment import SentimentStore
+
+    first = HeadlineScorer(store=SentimentStore(tmp_path)).score(HEADLINES[:2])
+
+    # A new session: fresh scorer and store over the same directory
+    model = CountingModel()
+    scores = HeadlineScorer(model=model, store=SentimentStore(tmp_path)).score(HEADLINES)
+
+    assert scores[:2] == first
+    assert model.batches == [HEADLINES[2:]]
+
+
+@pytest.mark.parametrize("content", ['{"ab12": 0.5, "cd', "[1, 2]", ""])
+def test_corrupt_or_partial_shards_are_ignored(tmp_path, content):
+    from rag.sentiment import SentimentStore, headline_key
+
+    model = CountingModel()
+    HeadlineScorer(model=model, store=SentimentStore(tmp_path)).score(HEADLINES)
+    for shard in (tmp_path / model.name).glob("*.json"):
+        shard.write_text(content)
+
+    model = CountingModel()
+    scorer = HeadlineScorer(model=model, store=SentimentStore(tmp_path))
+
+    assert scorer.score(HEADLINES) == pytest.approx(list(model.inner.score(HEADLINES)))
+    assert model.batches == [HEADLINES]
+    # Re-scored headlines are written back in valid shards
+    stored = SentimentStore(tmp_path).get_many(model.name, [headline_key(h) for h in HEADLINES])
+    assert len(stored) == 3
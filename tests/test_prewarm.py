@@ -0,0 +1,56 @@
+# tests/test_prewarm.py
+
+import pytest
+
+from conftest import StubSource
+from services import snapshot as snapshots
+from services.fpl_cache import FileCacheStore, FPLCache
+from services.fpl_client import FPLClient
+from services.prewarm import prewarm
+from services.snapshot import SnapshotStore, get_snapshot
+
+
+@pytest.fixture
+def client(tmp_path):
+    source = StubSource()
+    cache = FPLCache(source, FileCacheStore(tmp_path / "fpl"), stale_while_revalidate=False)
+    return FPLClient(cache)
+
+
+def forbid_builds(monkeypatch):
+    """Fails any in-process build by the app path."""
+    def build(*args, **kwargs):
+        raise AssertionError("snapshot rebuilt in process")
+
+    monkeypatch.setattr(snapshots, "build_snapshot", build)
+    monkeypatch.setattr(snapshots, "_snapshots", {})
+
+
+def test_prewarm_writes_snapshot_the_app_reads(client, tmp_path, monkeypatch):
+    store = SnapshotStore(tmp_path / "snapshots")
+
+    built = prewarm(client, store, n_sims=200)
+
+    assert store.latest_info()["gameweek"] == "gw1-2999-08-16T17:30:00Z"
+    assert len(built.best_xi) == 11
+    assert built.contributions is not None
+
+    # A fresh app process: reads the stored snapshot, no build, no fetch
+    app_client = FPLClient(FPLCache(StubSource(), FileCacheStore(tmp_path / "app-fpl")))
+    forbid_builds(monkeypatch)
+    served = get_snapshot(app_client, SnapshotStore(tmp_path / "snapshots"))
+
+    assert served.key == built.key
+    assert served.best_xi["id"].tolist() == built.best_xi["id"].tolist()
+    assert app_client.cache.source.bootstrap_calls == 0
+
+
+def test_prewarm_skips_current_snapshot(client, tmp_path):
+    store = SnapshotStore(tmp_path / "snapshots")
+    prewarm(client, store, n_sims=200)
+    summaries = len(client.cache.source.summary_calls)
+
+    assert prewarm(client, store, n_sims=200) is None
+    assert prewarm(client, store, n_sims=200, force=True) is not None
+    # The rebuild reused the cached element summaries
+    assert len(client.cache.source.summary_calls) == summaries
@@ -0,0 +1,122 @@
+# tests/test_shap_explainer.py
+
+from itertools import combinations
+from math import factorial
+
+import numpy as np
+import pytest
+import xgboost as xgb
+from xgboost import XGBRegressor
+
+from conftest import make_player_table
+from services import shap_explainer
+from services.ml_predictor import build_feature_matrix
+from services.model_registry import get_model
+from services.shap_explainer import compute_contributions, get_shap_values
+from utils.feature_engineering import FEATURES
+
+
+def tree_nodes(booster):
+    """{tree: {node id: row}} from the booster's dataframe dump."""
+    trees = {}
+    for row in booster.trees_to_dataframe().itertuples():
+        trees.setdefault(row.Tree, {})[row.ID] = row
+    return trees
+
+
+def expected_value(nodes, node_id, x, known):
+    """
+    Path-dependent E[tree(x) | x_known]: known features follow x, the
+    others average both children by cover (the TreeSHAP definition).
+    """
+    node = nodes[node_id]
+    if node.Feature == "Leaf":
+        return node.Gain
+    if node.Feature in known:
+        child = node.Yes if x[node.Feature] < node.Split else node.No
+        return expected_value(nodes, child, x, known)
+    yes, no = nodes[node.Yes], nodes[node.No]
+    return (yes.Cover * expected_value(nodes, node.Yes, x, known)
+            + no.Cover * expected_value(nodes, node.No, x, known)) / node.Cover
+
+
+def brute_force_shap(booster, x):
+    """Exact Shapley values over every feature subset, plus the bias."""
+    trees = tree_nodes(booster)
+    x = dict(zip(FEATURES, x))
+    margin = float(booster.predict(xgb.DMatrix(np.array([list(x.values())]), feature_names=FEATURES),
+                                   output_margin=True)[0])
+    full = sum(expected_value(nodes, f"{t}-0", x, set(FEATURES)) for t, nodes in trees.items())
+    base = margin - full
+
+    m = len(FEATURES)
+    value = {
+        subset: base + sum(expected_value(nodes, f"{t}-0", x, set(subset)) for t, nodes in trees.items())
+        for k in range(m + 1) for subset in combinations(FEATURES, k)
+    }
+    phi = {}
+    for f in FEATURES:
+        others = [g for g in FEATURES if g != f]
+        phi[f] = sum(
+            factorial(k) * factorial(m - k - 1) / factorial(m)
+            * (value[tuple(g for g in FEATURES if g in set(s) | {f})] - value[s])
+            for k in range(m) for s in combinations(others, k)
+        )
+    return phi, value[()]
+
+
+@pytest.fixture(scope="module")
+def players():
+    return make_player_table(300, seed=6)
+
+
+@pytest.fixture
+def small_model(players, monkeypatch):
+    """A 15-tree model small enough for brute-force Shapley values."""
+    X = build_feature_matrix(players)
+    y = X["rolling_form"] + 3 * X["xGI"] - 0.5 * X["opponent_strength"] + X["was_home"]
+    model = XGBRegressor(n_estimators=15, max_depth=3, learning_rate=0.3, random_state=0)
+    model.fit(X, y)
+    monkeypatch.setattr(shap_explainer, "get_model", lambda: model)
+    return model
+
+
+def test_treeshap_matches_brute_force_shapley(players, small_model):
+    sample = players.head(3)
+    contributions = compute_contributions(sample)
+    X = build_feature_matrix(sample)
+
+    for pid, (_, x) in zip(sample["id"], X.iterrows()):
+        phi, bias = brute_force_shap(small_model.get_booster(), x.to_numpy(dtype=np.float32))
+        row = contributions.loc[pid]
+        assert max(abs(row[f] - phi[f]) for f in FEATURES) < 1e-5
+        assert abs(row["bias"] - bias) < 1e-5
+
+
+def test_contributions_sum_to_xgboost_prediction(players):
+    contributions = compute_contributions(players)
+    predicted = get_model().predict(build_feature_matrix(players))
+
+    # Both sides accumulate 400 trees in float32 on predictions up to
+    # ~15 points, so the tolerance is relative
+    np.testing.assert_allclose(contributions.to_numpy(dtype=np.float64).sum(axis=1), predicted,
+                               rtol=1e-5, atol=1e-5)
+
+
+def test_batch_table_matches_single_row(players):
+    contributions = compute_contributions(players)
+
+    for _, row in players.head(10).iterrows():
+        _, direct = get_shap_values(row)
+        _, looked_up = get_shap_values(row, contributions)
+        assert max(abs(direct[f] - looked_up[f]) for f in FEATURES) < 1e-5
+
+
+def test_matches_shap_package(players):
+    shap = pytest.importorskip("shap")
+    X = build_feature_matrix(players)
+
+    expected = shap.TreeExplainer(get_model()).shap_values(X)
+    contributions = compute_contributions(players)[FEATURES].to_numpy()
+
+    assert np.abs(contributions - expected).max() < 1e-5
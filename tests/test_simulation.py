@@ -0,0 +1,82 @@
+# tests/test_simulation.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_player_table
+from services.captaincy_optimizer import captaincy_report
+from services.optimize_team import POSITION_MAP
+from services.simulation import simulate_matrix, simulate_players, uncertainty_stdev
+from services.simulation_sweep import PLAYER_CHUNK, run_sweep, scenario_grid
+
+
+def sim_table(n, seed=0):
+    """Player table shaped for the simulations (pos, xGI, predicted_score)."""
+    df = make_player_table(n, seed=seed)
+    df["pos"] = df["position"].map(POSITION_MAP)
+    df["predicted_score"] = pd.to_numeric(df["form"]) + 1.0
+    return df
+
+
+# 300 players: two full PLAYER_CHUNKs and a partial one
+@pytest.mark.parametrize("n_players", [PLAYER_CHUNK, 300])
+def test_sweep_is_identical_for_any_worker_count(n_players):
+    df = sim_table(n_players)
+    scenarios = scenario_grid(explosiveness=(0.2, 0.6), n_sims=(500,))
+
+    serial = run_sweep(df, scenarios, seed=7, workers=1)
+    parallel = run_sweep(df, scenarios, seed=7, workers=3)
+
+    assert len(serial) == 2 * n_players
+    pd.testing.assert_frame_equal(serial, parallel)
+
+
+def test_sweep_seed_changes_draws():
+    df = sim_table(50)
+    scenarios = scenario_grid(n_sims=(500,))
+
+    a = run_sweep(df, scenarios, seed=1, workers=1)
+    b = run_sweep(df, scenarios, seed=2, workers=1)
+
+    assert not a["expected_points"].equals(b["expected_points"])
+
+
+def per_player(row, n_sims, rng):
+    """The single-player path: captaincy_report plus uncertainty bands."""
+    report = captaincy_report(row, n_sims=n_sims, rng=rng, keep_distribution=False)
+    predicted = float(row["predicted_score"])
+    sims = simulate_matrix([predicted], uncertainty_stdev([predicted]), n_sims, rng)[0]
+    for q in (10, 50, 90):
+        report[f"p{q}"] = np.percentile(sims, q)
+    return report
+
+
+def test_vectorized_simulation_matches_per_player_path():
+    n_sims = 20000
+    df = sim_table(40, seed=3)
+    table = simulate_players(df, n_sims=n_sims, seed=0)
+    rng = np.random.default_rng(1)
+
+    for row, (_, sim) in zip(df.to_dict("records"), table.iterrows()):
+        ref = per_player(row, n_sims, rng)
+        # Tolerances of about 4 standard errors of the difference of two runs
+        se = sim["stdev"] / np.sqrt(n_sims)
+        assert sim["stdev"] == pytest.approx(ref["stdev"], abs=0.01)
+        assert sim["expected_points"] == pytest.approx(ref["expected_points"], abs=6 * se + 0.01)
+        assert sim["haul_probability"] == pytest.approx(ref["haul_probability"], abs=0.02)
+        assert sim["blank_probability"] == pytest.approx(ref["blank_probability"], abs=0.02)
+
+        unc_se = uncertainty_stdev([row["predicted_score"]])[0] / np.sqrt(n_sims)
+        for q in ("p10", "p50", "p90"):
+            assert sim[q] == pytest.approx(ref[q], abs=10 * unc_se)
+
+
+def test_simulation_is_deterministic_for_a_seed():
+    df = sim_table(300, seed=4)
+
+    pd.testing.assert_frame_equal(simulate_players(df, n_sims=1000, seed=5),
+                                  simulate_players(df, n_sims=1000, seed=5))
+    assert not simulate_players(df, n_sims=1000, seed=6)["p50"].equals(
+        simulate_players(df, n_sims=1000, seed=5)["p50"]
+    )
@@ -0,0 +1,164 @@
+# tests/test_snapshot.py
+
+import pytest
+
+from services import snapshot as snapshots
+from services.snapshot import GameweekSnapshot, SnapshotStore, get_snapshot, is_current
+
+
+# Gameweek keys as gameweek_key builds them: id plus deadline
+PAST_GW = "gw5-2020-08-14T17:30:00Z"
+NEXT_GW = "gw6-2999-08-21T17:30:00Z"
+
+
+class FakeCache:
+    def __init__(self, key):
+        self.key = key
+        self.reads = 0
+
+    def get_snapshot(self):
+        self.reads += 1
+        return {"key": self.key}
+
+
+class FakeClient:
+    def __init__(self, key):
+        self.cache = FakeCache(key)
+        self.gameweek = key
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    """Fixed model version; builds record their gameweek instead of running the pipeline."""
+    built = []
+
+    def build(client, **kwargs):
+        built.append(client.gameweek)
+        return make_snapshot(client.gameweek)
+
+    monkeypatch.setattr(snapshots, "model_version", lambda: "m1")
+    monkeypatch.setattr(snapshots, "build_snapshot", build)
+    monkeypatch.setattr(snapshots, "_snapshots", {})
+    return built
+
+
+def make_snapshot(gameweek, version="m1"):
+    return GameweekSnapshot(gameweek, version, players=None, best_xi=None, simulation=None)
+
+
+def test_returns_stored_snapshot_for_current_gameweek(tmp_path, offline):
+    store = SnapshotStore(tmp_path)
+    store.save(make_snapshot("gw5-deadline"))
+
+    snapshot = get_snapshot(FakeClient("gw5-deadline"), store)
+
+    assert snapshot.key == ("gw5-deadline", "m1")
+    assert offline == []
+
+
+def test_current_stored_snapshot_skips_fpl_data(tmp_path, offline):
+    store = SnapshotStore(tmp_path)
+    store.save(make_snapshot(NEXT_GW))
+    client = FakeClient("gw7-other")
+
+    snapshot = get_snapshot(client, store)
+
+    assert snapshot.key == (NEXT_GW, "m1")
+    assert client.cache.reads == 0
+    assert offline == []
+
+
+def test_passed_deadline_keeps_stored_snapshot_until_fpl_moves_on(tmp_path, offline):
+    store = SnapshotStore(tmp_path)
+    store.save(make_snapshot(PAST_GW))
+
+    snapshot = get_snapshot(FakeClient(PAST_GW), store)
+
+    assert snapshot.key == (PAST_GW, "m1")
+    assert offline == []
+
+
+def test_rebuilds_when_stored_gameweek_is_stale(tmp_path, offline):
+    store = SnapshotStore(tmp_path)
+    store.save(make_snapshot(PAST_GW))
+
+    snapshot = get_snapshot(FakeClient(NEXT_GW), store)
+
+    assert snapshot.key == (NEXT_GW, "m1")
+    assert offline == [NEXT_GW]
+
+
+def test_rebuilds_when_stored_model_is_stale(tmp_path, offline):
+    store = SnapshotStore(tmp_path)
+    store.save(make_snapshot("gw5-deadline", version="m0"))
+
+    snapshot = get_snapshot(FakeClient("gw5-deadline"), store)
+
+    assert snapshot.key == ("gw5-deadline", "m1")
+    assert offline == ["gw5-deadline"]
+
+
+def test_builds_once_per_key(tmp_path, offline):
+    store = SnapshotStore(tmp_path)
+    client = FakeClient("gw5-deadline")
+
+    assert get_snapshot(client, store) is get_snapshot(client, store)
+    assert offline == ["gw5-deadline"]
+
+
+def test_invalidate_removes_stored_gameweek(tmp_path, offline):
+    store = SnapshotStore(tmp_path)
+    store.save(make_snapshot("gw4-deadline"))
+    store.save(make_snapshot("gw5-deadline"))
+    client = FakeClient("gw5-deadline")
+    assert get_snapshot(client, store).key == ("gw5-deadline", "m1")
+
+    snapshots.invalidate("gw5-deadline", store=store)
+
+    assert store.latest_info() is None
+    assert [p.name for p in tmp_path.glob("*.pkl")] == ["snapshot-gw4-deadline-m1.pkl"]
+    get_snapshot(client, store)
+    assert offline == ["gw5-deadline"]
+
+
+def test_invalidate_other_gameweek_keeps_latest(tmp_path, offline):
+    store = SnapshotStore(tmp_path)
+    store.save(make_snapshot("gw4-deadline"))
+    store.save(make_snapshot("gw5-deadline"))
+
+    snapshots.invalidate("gw4-deadline", store=store)
+
+    assert store.latest_info()["gameweek"] == "gw5-deadline"
+    assert get_snapshot(FakeClient("gw5-deadline"), store).key == ("gw5-deadline", "m1")
+    assert offline == []
+
+
+def test_invalidate_all(tmp_path, offline):
+    store = SnapshotStore(tmp_path)
+    store.save(make_snapshot("gw5-deadline"))
+    client = FakeClient("gw5-deadline")
+    get_snapshot(client, store)
+
+    snapshots.invalidate(store=store)
+
+    assert store.latest_info() is None and list(tmp_path.glob("*.pkl")) == []
+    assert store.load_latest() is None
+
+
+def test_snapshots_pickled_without_squad_simulation_still_load(tmp_path):
+    store = SnapshotStore(tmp_path)
+    old = make_snapshot("gw5-deadline")
+    del old.__dict__["squad_simulation"]
+    store.save(old)
+
+    assert SnapshotStore(tmp_path).load_latest().squad_simulation is None
+
+
+def test_is_current_checks_model_version_and_deadline():
+    info = {"gameweek": PAST_GW, "model_version": "m1"}
+
+    assert is_current(info, "m1", now=0)
+    assert not is_current(info, "m1")
+    assert not is_current(info, "m2", now=0)
+    assert is_current({"gameweek": "gw0", "model_version": "m1"}, "m1")
+    assert not is_current(None, "m1")
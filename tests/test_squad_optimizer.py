@@ -0,0 +1,110 @@
+# tests/test_squad_optimizer.py
+
+import pickle
+
+import numpy as np
+import pytest
+
+pytest.importorskip("scipy")
+
+from benchmarks.bench_squad_optimizer import GREEDY_RULES, synthetic_pool, what_if_queries  # noqa: E402
+from services import squad_optimizer  # noqa: E402
+from services.player_index import PlayerIndex  # noqa: E402
+from services.squad_optimizer import SQUAD_QUOTA, solve_index, squad_model  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def index():
+    return PlayerIndex.from_frame(synthetic_pool(300, seed=3))
+
+
+def points(index, rows, starting):
+    return index.score[rows][starting].sum() + 0.1 * index.score[rows][~starting].sum()
+
+
+def test_squad_is_valid(index):
+    rows, starting = solve_index(index, budget=95.0)
+
+    assert len(rows) == 15 and starting.sum() == 11
+    assert index.cost[rows].sum() <= 95.0 + 1e-9
+    assert np.bincount(index.club[rows]).max() <= 3
+    assert {p: (index.pos[rows] == p).sum() for p in SQUAD_QUOTA} == SQUAD_QUOTA
+
+
+def test_model_is_built_once_per_rule_set(index):
+    assert squad_model(index) is squad_model(index)
+    assert squad_model(index, squad_quota=None) is not squad_model(index)
+
+
+def test_what_if_queries_honour_exclude_and_lock(index):
+    for exclude, lock, budget in what_if_queries(index.frame, 5, seed=1):
+        rows, _ = solve_index(index, budget, exclude=exclude, lock=lock)
+
+        ids = set(index.ids[rows])
+        assert not ids & set(exclude)
+        assert set(lock) <= ids
+        assert index.cost[rows].sum() <= budget + 1e-9
+
+
+def test_persistent_model_matches_fresh_scipy_solves(index, monkeypatch):
+    queries = list(what_if_queries(index.frame, 5, seed=2))
+    reused = [points(index, *solve_index(index, b, exclude=e, lock=l)) for e, l, b in queries]
+
+    # scipy.optimize.milp on a fresh index: no highspy, no cached model
+    monkeypatch.setattr(squad_optimizer, "highspy", None)
+    fresh_index = PlayerIndex.from_frame(index.frame)
+    fresh = [points(fresh_index, *solve_index(fresh_index, b, exclude=e, lock=l)) for e, l, b in queries]
+
+    np.testing.assert_allclose(reused, fresh, atol=1e-9)
+
+
+def test_infeasible_query_raises(index):
+    with pytest.raises(ValueError, match="No feasible squad"):
+        solve_index(index, budget=20.0)
+
+
+@pytest.mark.parametrize("budget", [80.0, 90.0, 100.0])
+def test_greedy_fills_the_xi_within_budget(index, budget):
+    rows = index.greedy_xi(budget)
+
+    assert len(rows) == 11
+    assert index.cost[rows].sum() <= budget + 1e-9
+    assert np.bincount(index.club[rows]).max() <= 3
+
+
+def test_greedy_is_plain_top_score_when_budget_is_loose(index):
+    rows = index.greedy_xi(1000.0)
+
+    flex = rows[8:]
+    # After the positional minimums, the best remaining players by score
+    rest = [r for r in index.order if r not in set(rows[:8])][:3]
+    assert list(flex) == rest
+
+
+def test_exact_xi_beats_greedy(index):
+    greedy = index.greedy_xi(100.0)
+    rows, _ = solve_index(index, 100.0, squad_quota=None, xi_rules=GREEDY_RULES)
+
+    assert index.score[rows].sum() >= index.score[greedy].sum() - 1e-9
+
+
+def test_index_pickles_without_its_models(index):
+    solve_index(index)
+
+    restored = pickle.loads(pickle.dumps(index))
+
+    assert restored._models == {}
+    np.testing.assert_array_equal(solve_index(restored)[0], solve_index(index)[0])
+
+
+def test_what_if_xi_defaults_to_greedy(index):
+    from services.optimize_team import what_if_xi
+
+    exclude, lock = index.ids[:2], index.ids[2:3]
+    greedy = what_if_xi(None, exclude, lock, budget=95.0, index=index)
+    exact = what_if_xi(None, exclude, lock, budget=95.0, method="exact", index=index)
+
+    assert greedy["id"].tolist() == index.ids[index.greedy_xi(95.0, exclude, lock)].tolist()
+    for xi in (greedy, exact):
+        assert len(xi) == 11 and lock[0] in xi["id"].tolist()
+        assert not set(exclude) & set(xi["id"])
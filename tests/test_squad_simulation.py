@@ -0,0 +1,74 @@
+# tests/test_squad_simulation.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.squad_simulation import simulate_correlated_points, simulate_squad
+
+N_SIMS = 50_000
+
+
+def squad(next_opponent=False):
+    """
+    An XI stacked on two clubs: team 1 has GK, 2 DEF, 2 MID, FWD; team 2
+    has DEF, 2 MID, FWD; team 3 one MID. Predictions are high enough
+    that the clamp at 0 hardly bites, so points correlate like the factors.
+    """
+    rows = [
+        (1, "GK", 1), (2, "DEF", 1), (3, "DEF", 1), (4, "MID", 1), (5, "MID", 1), (6, "FWD", 1),
+        (7, "DEF", 2), (8, "MID", 2), (9, "MID", 2), (10, "FWD", 2), (11, "MID", 3),
+    ]
+    df = pd.DataFrame(rows, columns=["id", "pos", "team"])
+    df["predicted_score"] = 8.0 + df["id"] % 3
+    df["xGI"] = 0.5
+    df["web_name"] = "P" + df["id"].astype(str)
+    if next_opponent:
+        df["next_opponent"] = df["team"].map({1: 2, 2: 1, 3: 4})
+    return df
+
+
+def test_marginals_match_the_independent_model():
+    df = squad(next_opponent=True)
+
+    correlated = simulate_correlated_points(df, N_SIMS, seed=0)
+    independent = simulate_correlated_points(df, N_SIMS, seed=1, correlated=False)
+
+    np.testing.assert_allclose(correlated.mean(axis=1), independent.mean(axis=1), atol=0.05)
+    np.testing.assert_allclose(correlated.std(axis=1), independent.std(axis=1), rtol=0.02)
+
+
+def test_teammates_correlate_and_other_teams_do_not():
+    df = squad()
+    corr = np.corrcoef(simulate_correlated_points(df, N_SIMS, seed=2))
+    team = df["team"].to_numpy()
+    pos = df["pos"].to_numpy()
+
+    same = team[:, None] == team[None, :]
+    off_diagonal = ~np.eye(len(df), dtype=bool)
+    # Keepers only load on the clean-sheet factor and forwards only on
+    # attack, so that one teammate pair is uncorrelated by design
+    disjoint = np.isin(pos, "GK")[:, None] & np.isin(pos, "FWD")[None, :]
+    disjoint |= disjoint.T
+    attackers = np.isin(pos, ["MID", "FWD"])
+
+    assert (corr[same & off_diagonal & ~disjoint] > 0.05).all()
+    assert (corr[same & off_diagonal & attackers[:, None] & attackers[None, :]] > 0.15).all()
+    assert np.abs(corr[~same]).max() < 0.03
+
+def test_opponent_attack_lowers_clean_sheet_points():
+    df = squad(next_opponent=True)
+    corr = np.corrcoef(simulate_correlated_points(df, N_SIMS, seed=3))
+
+    # Team 1 keeper vs team 2 forward
+    assert corr[0, 9] < -0.05
+
+
+def test_stacking_teammates_widens_the_squad_total():
+    result = simulate_squad(squad(), n_sims=N_SIMS, seed=4)
+
+    assert result["std_total"] > 1.2 * result["independent_std_total"]
+    assert result["expected_total"] == pytest.approx(
+        simulate_squad(squad(), n_sims=N_SIMS, seed=5, correlated=False)["expected_total"], rel=0.01
+    )
+    assert result["p10"] < result["p50"] < result["p90"]
@@ -0,0 +1,49 @@
+# tests/test_train_model.py
+
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from training import train_model
+from utils.feature_engineering import FEATURES, TARGET
+
+
+def synthetic_batches(n_rows=3000, batch_size=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, len(FEATURES)))
+    df = pd.DataFrame(X, columns=FEATURES).assign(**{
+        TARGET: 2 * X[:, 0] + X[:, 3] + rng.normal(0, 0.1, n_rows),
+        "season": "2024-25",
+        "player_id": np.arange(n_rows) % 300,
+        "round": np.arange(n_rows) // 300 + 1,
+    })
+
+    def batches(columns=None, filters=None, batch_size=batch_size, **kwargs):
+        for start in range(0, len(df), batch_size):
+            yield df.iloc[start:start + batch_size][columns]
+
+    return batches
+
+
+@pytest.fixture
+def cache_dirs(monkeypatch, tmp_path):
+    """Small synthetic training set; TemporaryDirectory goes under tmp_path."""
+    monkeypatch.setattr(train_model, "iter_training_batches", synthetic_batches())
+    monkeypatch.setitem(train_model.PARAMS, "n_estimators", 20)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    return tmp_path
+
+
+@pytest.mark.parametrize("tree_method", ["hist", "approx"])
+def test_external_memory_training(cache_dirs, tree_method):
+    model, rmse, n_train = train_model.train_external_memory(
+        n_jobs=1, tree_method=tree_method, batch_size=1000,
+    )
+
+    assert 2000 < n_train < 3000
+    assert rmse < 2.0  # target stdev ~2.2; 20 rounds at eta 0.04
+    assert model.predict(np.zeros((1, len(FEATURES)), dtype=np.float32)).shape == (1,)
+    # The external-memory cache directory is gone
+    assert list(cache_dirs.iterdir()) == []
@@ -0,0 +1,180 @@
+# tests/test_transfer_planner.py
+
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.squad_optimizer import MAX_PER_CLUB, SQUAD_QUOTA
+from services.transfer_planner import HIT_COST, lineup_points, plan_transfers
+
+POSITIONS = {"GK": 1, "DEF": 2, "MID": 3, "FWD": 4}
+# No search limits: the beam keeps every state
+EXHAUSTIVE = dict(candidates=100, moves_per_state=10_000, beam=10**6)
+
+
+def squad_pool(extra=(), price=5.0):
+    """
+    A 15-man squad on separate clubs (ids 1-15, GK..FWD), each scoring 2
+    every week, plus `extra` players: (position, points per week, price).
+    """
+    rows = []
+    for pos, count in SQUAD_QUOTA.items():
+        for _ in range(count):
+            pid = len(rows) + 1
+            rows.append({"id": pid, "position": POSITIONS[pos], "team": pid, "now_cost": price})
+    for i, (pos, _, cost) in enumerate(extra):
+        rows.append({"id": 100 + i, "position": POSITIONS[pos], "team": 50 + i, "now_cost": cost})
+    pool = pd.DataFrame(rows).assign(web_name=lambda df: "P" + df["id"].astype(str))
+    return pool, list(range(1, 16))
+
+
+def flat_points(pool, extra, weeks):
+    points = pd.DataFrame(2.0, index=pool["id"], columns=range(1, weeks + 1))
+    for i, (_, week_points, _) in enumerate(extra):
+        points.loc[100 + i] = week_points
+    return points
+
+
+def plan(extra, weeks=1, **kwargs):
+    pool, squad = squad_pool(extra)
+    points = flat_points(pool, extra, weeks)
+    return plan_transfers(pool, points, squad, captain=False, **kwargs)
+
+
+def test_hit_taken_when_the_second_transfer_gains_more_than_it_costs():
+    result = plan([("MID", [8.0], 5.0), ("MID", [8.0], 5.0)])
+
+    assert result["plan"]["transfers_in"].iloc[0] == ["P100", "P101"]
+    assert result["hits"] == 1
+    assert result["expected_points"] == 11 * 2 + 2 * 6 - HIT_COST
+
+
+def test_no_hit_when_the_second_transfer_gains_less_than_it_costs():
+    result = plan([("MID", [5.0], 5.0), ("MID", [5.0], 5.0)])
+
+    assert len(result["plan"]["transfers_in"].iloc[0]) == 1
+    assert result["hits"] == 0
+    assert result["expected_points"] == 11 * 2 + 3
+
+
+def test_banked_free_transfers_are_used_without_hits():
+    result = plan([("MID", [5.0], 5.0), ("MID", [5.0], 5.0)], free_transfers=2)
+
+    assert len(result["plan"]["transfers_in"].iloc[0]) == 2
+    assert result["hits"] == 0
+    assert result["expected_points"] == 11 * 2 + 2 * 3
+
+
+def test_free_transfers_bank_up_to_the_cap():
+    # Upgrades exist but are unaffordable: every week is rolled
+    extra = [("FWD", [20.0] * 3, 9.0)]
+
+    assert plan(extra, weeks=3, free_transfers=4)["plan"]["free_transfers"].tolist() == [4, 5, 5]
+    assert plan(extra, weeks=3, free_transfers=9)["plan"]["free_transfers"].tolist() == [5, 5, 5]
+
+
+def random_pool(n_extra, weeks, seed, clubs=6):
+    """Squad plus extra players on few clubs, varied prices and points."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for pos, count in SQUAD_QUOTA.items():
+        for _ in range(count):
+            rows.append({"position": POSITIONS[pos]})
+    for _ in range(n_extra):
+        rows.append({"position": int(rng.integers(1, 5))})
+
+    pool = pd.DataFrame(rows)
+    pool["id"] = np.arange(1, len(pool) + 1)
+    pool["web_name"] = "P" + pool["id"].astype(str)
+    # Squad: at most 3 per club; extras on any club
+    pool["team"] = np.concatenate([np.arange(15) % 5 + 1, rng.integers(1, clubs + 1, n_extra)])
+    pool["now_cost"] = np.round(rng.uniform(4.0, 9.0, len(pool)), 1)
+    points = pd.DataFrame(rng.gamma(2.0, 2.0, (len(pool), weeks)).round(1),
+                          index=pool["id"], columns=range(1, weeks + 1))
+    return pool, points, list(range(1, 16))
+
+
+def check_feasible(pool, squad, bank, value):
+    players = pool.set_index("id").loc[squad]
+    counts = players["position"].value_counts().to_dict()
+    assert counts == {POSITIONS[p]: n for p, n in SQUAD_QUOTA.items()}
+    assert players["team"].value_counts().max() <= MAX_PER_CLUB
+    assert bank >= -1e-9
+    assert players["now_cost"].sum() + bank == pytest.approx(value)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_every_step_respects_budget_and_club_limit(seed):
+    pool, points, squad = random_pool(25, weeks=4, seed=seed)
+    bank = 0.5
+    value = pool.set_index("id").loc[squad, "now_cost"].sum() + bank
+
+    result = plan_transfers(pool, points, squad, bank=bank, max_per_week=2)
+
+    free = 1
+    for row, held in zip(result["plan"].itertuples(), result["squads"]):
+        check_feasible(pool, held, row.bank, value)
+        n = len(row.transfers_in)
+        assert row.free_transfers == free
+        assert row.hits == max(0, n - free)
+        free = min(max(free - n, 0) + 1, 5)
+    assert result["expected_points"] == pytest.approx(result["plan"]["expected_points"].sum())
+
+
+def exhaustive_best(pool, points, squad, bank, free, weeks, max_free=5):
+    """Best points net of hits over every sequence of 0-2 transfers a week."""
+    pool = pool.set_index("id")
+    P = points.loc[pool.index].to_numpy()
+    pos = pool["position"].to_numpy()
+    club = pool["team"].to_numpy()
+    price = np.round(pool["now_cost"].to_numpy() * 10).astype(int)
+    row_of = {pid: i for i, pid in enumerate(pool.index)}
+
+    def week_points(members, t):
+        # lineup_points wants position blocks: sort members by position
+        members = sorted(members, key=lambda r: pos[r])
+        return float(lineup_points(P[members][:, t:t + 1])[0])
+
+    def options(members, bank):
+        yield (), members, bank
+        out_in = [(o, n) for o in members for n in range(len(pos))
+                  if pos[n] == pos[o] and n not in members]
+        moves = [(m,) for m in out_in] + [
+            (a, b) for a, b in combinations(out_in, 2) if a[0] != b[0] and a[1] != b[1]
+        ]
+        for move in moves:
+            new = set(members)
+            cash = bank
+            for o, n in move:
+                new.remove(o)
+                new.add(n)
+                cash += price[o] - price[n]
+            if cash < 0 or np.bincount(club[list(new)]).max() > MAX_PER_CLUB:
+                continue
+            yield move, frozenset(new), cash
+
+    def best(t, members, bank, free):
+        if t == weeks:
+            return 0.0
+        value = -np.inf
+        for move, new, cash in options(members, bank):
+            hits = max(0, len(move) - free)
+            nxt = min(max(free - len(move), 0) + 1, max_free)
+            value = max(value, week_points(new, t) - HIT_COST * hits + best(t + 1, new, cash, nxt))
+        return value
+
+    return best(0, frozenset(row_of[p] for p in squad), int(round(bank * 10)), free)
+
+
+# Seeds 11, 17 and 26 need pairs that are only feasible together
+@pytest.mark.parametrize("seed", [0, 1, 11, 17, 26])
+def test_matches_exhaustive_search_over_two_weeks(seed):
+    pool, points, squad = random_pool(5, weeks=2, seed=seed, clubs=5)
+
+    result = plan_transfers(pool, points, squad, bank=0.5, **EXHAUSTIVE)
+
+    assert result["expected_points"] == pytest.approx(
+        exhaustive_best(pool, points, squad, bank=0.5, free=1, weeks=2)
+    )
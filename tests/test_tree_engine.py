@@ -0,0 +1,60 @@
+# tests/test_tree_engine.py
+
+import numpy as np
+import pytest
+import xgboost as xgb
+
+from conftest import make_player_table
+from services.ml_predictor import build_feature_matrix, predict_scores
+from services.model_registry import get_model
+from services.tree_engine import TreeEnsemble
+from utils.feature_engineering import FEATURES
+
+
+@pytest.fixture(scope="module")
+def booster():
+    return get_model().get_booster()
+
+
+@pytest.fixture(scope="module")
+def engine(booster):
+    return TreeEnsemble.from_booster(booster)
+
+
+def xgboost_predict(booster, X):
+    return booster.predict(xgb.DMatrix(X, feature_names=FEATURES, missing=np.nan))
+
+
+def test_matches_xgboost_on_player_features(booster, engine):
+    X = build_feature_matrix(make_player_table(500, seed=2)).to_numpy(dtype=np.float32)
+
+    assert np.abs(engine.predict(X) - xgboost_predict(booster, X)).max() < 1e-5
+
+
+def test_matches_xgboost_on_thresholds_and_missing_values(booster, engine):
+    rng = np.random.default_rng(3)
+    X = build_feature_matrix(make_player_table(300, seed=3)).to_numpy(dtype=np.float32)
+
+    # Values exactly on split thresholds, and missing values (default direction)
+    thresholds = engine.threshold[engine.children[:engine.n_nodes] != np.arange(engine.n_nodes)]
+    on_split = rng.random(X.shape) < 0.3
+    X[on_split] = rng.choice(thresholds, on_split.sum())
+    X[rng.random(X.shape) < 0.1] = np.nan
+
+    assert np.abs(engine.predict(X) - xgboost_predict(booster, X)).max() < 1e-5
+
+
+def test_numpy_backend_matches_xgboost_backend():
+    players = make_player_table(100, seed=4)
+
+    numpy = predict_scores(players, backend="numpy")
+    xgboost = predict_scores(players, backend="xgboost")
+
+    assert np.abs(numpy - xgboost).max() < 1e-5
+
+
+def test_single_row(engine, booster):
+    X = build_feature_matrix(make_player_table(1, seed=5)).to_numpy(dtype=np.float32)
+
+    assert engine.predict(X[0]).shape == (1,)
+    assert abs(engine.predict(X[0])[0] - xgboost_predict(booster, X)[0]) < 1e-5
@@ -0,0 +1,88 @@
+# tests/test_vector_index.py
+
+import numpy as np
+import pytest
+
+import rag.vector_store as vector_store
+from rag.vector_index import KEEP_VERSIONS, VectorIndex
+
+
+def corpus(n=500, dim=32, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, dim)).astype(np.float32)
+    texts = [f"chunk {i}" for i in range(n)]
+    metadatas = [{"source": f"doc{i % 7}"} for i in range(n)]
+    ids = [f"id-{i}" for i in range(n)]
+    return vectors, texts, metadatas, ids
+
+
+def brute_force(vectors, query, k):
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    sims = unit @ (query / np.linalg.norm(query))
+    return np.argsort(-sims, kind="stable")[:k], sims
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_top_k_matches_brute_force_cosine(seed):
+    vectors, texts, _, _ = corpus(seed=seed)
+    index = VectorIndex.from_vectors(vectors, texts)
+    rng = np.random.default_rng(seed + 100)
+
+    for query in rng.normal(size=(20, vectors.shape[1])):
+        expected, sims = brute_force(vectors, query, 10)
+        hits = index.search(query, 10)
+        assert [row for row, _ in hits] == expected.tolist()
+        np.testing.assert_allclose([s for _, s in hits], sims[expected], atol=1e-5)
+
+
+def test_int8_recall_at_k():
+    vectors, texts, _, _ = corpus(n=2000, dim=64)
+    index = VectorIndex.from_vectors(vectors, texts, quantize_int8=True)
+    queries = np.random.default_rng(7).normal(size=(50, vectors.shape[1]))
+
+    k = 10
+    found = 0
+    for query in queries:
+        expected, _ = brute_force(vectors, query, k)
+        found += len(set(expected.tolist()) & {row for row, _ in index.search(query, k)})
+    assert found / (k * len(queries)) >= 0.9
+
+
+@pytest.mark.parametrize("quantize_int8", [False, True])
+def test_save_load_round_trip(tmp_path, quantize_int8):
+    vectors, texts, metadatas, ids = corpus(n=100)
+    index = VectorIndex.from_vectors(vectors, texts, metadatas, ids, quantize_int8)
+    index.save(tmp_path)
+
+    loaded = VectorIndex.load(tmp_path)
+    assert loaded.quantized == quantize_int8
+    np.testing.assert_array_equal(loaded.vectors, index.vectors)
+    assert (loaded.texts, loaded.metadatas, loaded.ids) == (texts, metadatas, ids)
+
+    query = vectors[3] + 0.1
+    assert loaded.search(query, 5) == index.search(query, 5)
+
+
+def test_resave_swaps_versions_and_keeps_open_index(tmp_path):
+    vectors, texts, _, _ = corpus(n=50)
+    VectorIndex.from_vectors(vectors, texts).save(tmp_path)
+    first = VectorIndex.load(tmp_path)
+
+    for i in range(KEEP_VERSIONS + 2):
+        VectorIndex.from_vectors(vectors[: 10 + i], texts[: 10 + i]).save(tmp_path)
+
+    assert len(VectorIndex.load(tmp_path)) == 10 + KEEP_VERSIONS + 1
+    assert len(list(tmp_path.glob("v-*"))) == KEEP_VERSIONS
+    assert not list(tmp_path.glob("*.tmp"))
+    # The memory map of a pruned version still reads its data
+    assert len(first) == 50 and first.search(vectors[0], 1)[0][0] == 0
+
+
+def test_missing_index_asks_for_export(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_store, "get_embeddings", lambda: None)
+    monkeypatch.setattr(vector_store, "INDEX_DIRECTORY", str(tmp_path / "rag_index"))
+
+    with pytest.raises(FileNotFoundError, match="rag.ingest --index"):
+        vector_store.get_retriever("index")
+    with pytest.raises(FileNotFoundError, match="rag.ingest --index"):
+        VectorIndex.load(tmp_path)
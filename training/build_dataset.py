@@ -1,11 +1,15 @@
 import pandas as pd
 
+from data.storage import load_raw_history
+from utils.feature_engineering import add_rolling_features
+
 def build_ml_dataset():
-    df = pd.read_csv("data/fpl_raw_history.csv")
+    df = load_raw_history()
 
-    # Rolling xGI windows
-    df["xGI_3"] = df.groupby("player_id")["xGI"].rolling(3).mean().reset_index(0, drop=True)
-    df["xGI_5"] = df.groupby("player_id")["xGI"].rolling(5).mean().reset_index(0, drop=True)
+    # Rolling xGI windows (full windows only, like rolling(n).mean())
+    df = add_rolling_features(
+        df, {"xGI_3": ("xGI", 3), "xGI_5": ("xGI", 5)}, min_periods=None
+    )
 
     # Fill missing
     df = df.fillna(0)
@@ -16,4 +20,6 @@ def build_ml_dataset():
     df.to_csv("data/training_ready.csv", index=False)
     print("Saved dataset: data/training_ready.csv")
 
-build_ml_dataset()
+
+if __name__ == "__main__":
+    build_ml_dataset()
@@ -1,27 +1,30 @@
 # training/build_training_dataset.py
 
-import pandas as pd
-
-print("Loading raw FPL history...")
-
-df = pd.read_csv("data/fpl_raw_history.csv")
+import argparse
+import os
 
-# Sort for rolling computations
-df = df.sort_values(["player_id", "round"])
-
-# Rolling features
-df["rolling_form"] = df.groupby("player_id")["total_points"].transform(lambda x: x.rolling(5, min_periods=1).mean())
-df["rolling_xgi"] = df.groupby("player_id")["xGI"].transform(lambda x: x.rolling(3, min_periods=1).mean())
+import pandas as pd
 
-# Position encoding
-position_map = {"GK": 1, "DEF": 2, "MID": 3, "FWD": 4}
-df["position_encoded"] = df["position"].map(position_map)
+from data.storage import (
+    RAW_HISTORY_CSV,
+    RAW_HISTORY_DIR,
+    TRAINING_CSV,
+    TRAINING_DIR,
+    TRAINING_DTYPES,
+    has_store,
+    load_raw_history,
+    load_training_dataset,
+    pyarrow_available,
+    write_partitioned,
+)
+from utils.feature_engineering import ROLLING_FEATURES, add_rolling_features
 
-# Use team strength as opponent strength
-df["opponent_strength"] = df["team_strength"]
+# Keys used to find which rows are already in the training dataset.
+# FPL reuses player ids every season, so a player is (season, player_id).
+PLAYER_COLUMNS = ["season", "player_id"]
+KEY_COLUMNS = PLAYER_COLUMNS + ["round"]
 
-# Final training dataset
-final = df[[
+OUTPUT_COLUMNS = [
     "minutes",
     "xG",
     "xA",
@@ -33,9 +36,139 @@ final = df[[
     "rolling_xgi",
     "position_encoded",
     "team_strength",
-    "total_points"
-]]
+    "total_points",
+    "player_id",
+    "round",
+    "season",
+]
+
+
+def add_features(df):
+    """
+    Adds rolling and encoded features to raw history rows.
+    `df` must contain every earlier row a rolling window needs.
+    """
+
+    # Sorted rolling features (cumulative sums over player segments)
+    df = add_rolling_features(df, ROLLING_FEATURES)
+
+    # Position encoding
+    position_map = {"GK": 1, "DEF": 2, "MID": 3, "FWD": 4}
+    df["position_encoded"] = df["position"].map(position_map)
+
+    # Use team strength as opponent strength
+    df["opponent_strength"] = df["team_strength"]
+
+    return df
+
+
+def _stored_rounds(df, last_round):
+    """Latest stored round of each row's (season, player_id), 0 if none."""
+    players = pd.MultiIndex.from_frame(df[PLAYER_COLUMNS])
+    return pd.Series(last_round.reindex(players).fillna(0).to_numpy(), index=df.index)
+
+
+def _save(final, output_root, output_csv, mode):
+    if output_root is not None and pyarrow_available():
+        write_partitioned(final, output_root, TRAINING_DTYPES, mode=mode)
+
+    if mode == "overwrite":
+        final.to_csv(output_csv, index=False)
+    else:
+        final.to_csv(output_csv, mode="a", header=False, index=False)
+
+
+def build_training_dataset(
+    raw_root=RAW_HISTORY_DIR,
+    raw_csv=RAW_HISTORY_CSV,
+    output_root=TRAINING_DIR,
+    output_csv=TRAINING_CSV,
+):
+    """
+    Full rebuild of the training dataset from the raw history.
+    Writes the columnar store (if pyarrow is installed) and a CSV export.
+    """
+    print("Loading raw FPL history...")
+    df = load_raw_history(root=raw_root, csv_path=raw_csv)
+
+    # Final training dataset
+    final = add_features(df)[OUTPUT_COLUMNS]
+
+    print(f"Saving training dataset to {output_csv} ...")
+    _save(final, output_root, output_csv, mode="overwrite")
+    print("Done! Shape:", final.shape)
+    return final
+
+
+def update_training_dataset(
+    raw_root=RAW_HISTORY_DIR,
+    raw_csv=RAW_HISTORY_CSV,
+    output_root=TRAINING_DIR,
+    output_csv=TRAINING_CSV,
+):
+    """
+    Incremental build: only raw rows with a `round` newer than the latest
+    one already in the training dataset (per season and player) are
+    featurized and appended. Rolling windows are trailing, so older rows never change;
+    each new row only needs the player's previous (window - 1) rows.
+    Falls back to a full rebuild if the dataset has no key columns.
+    """
+    args = (raw_root, raw_csv, output_root, output_csv)
+
+    if not os.path.exists(output_csv):
+        return build_training_dataset(*args)
+
+    existing_columns = pd.read_csv(output_csv, nrows=0).columns
+    if list(existing_columns) != OUTPUT_COLUMNS:
+        print("Training dataset has an outdated layout; rebuilding.")
+        return build_training_dataset(*args)
+
+    if output_root is not None and pyarrow_available() and not has_store(output_root):
+        print("Training store missing; rebuilding.")
+        return build_training_dataset(*args)
+
+    trained = load_training_dataset(columns=KEY_COLUMNS, root=output_root, csv_path=output_csv)
+    last_round = trained.groupby(PLAYER_COLUMNS)["round"].max()
+
+    raw = load_raw_history(root=raw_root, csv_path=raw_csv)
+    is_new = raw["round"] > _stored_rounds(raw, last_round)
+
+    if not is_new.any():
+        print("Training dataset already up to date.")
+        return raw.iloc[0:0]
+
+    # Tail context: the last (window - 1) stored rows of affected players
+    context_size = max(window for _, window in ROLLING_FEATURES.values()) - 1
+    players = pd.MultiIndex.from_frame(raw[PLAYER_COLUMNS])
+    affected = players.isin(players[is_new.to_numpy()])
+    old_rows = raw[affected & ~is_new].sort_values(KEY_COLUMNS, kind="stable")
+    context = old_rows.groupby(PLAYER_COLUMNS).tail(context_size)
+
+    featurized = add_features(pd.concat([context, raw[is_new]]))
+    new_final = featurized[featurized["round"] > _stored_rounds(featurized, last_round)]
+    new_final = new_final[OUTPUT_COLUMNS]
+
+    _save(new_final, output_root, output_csv, mode="append")
+    print(f"Appended {len(new_final)} rows to {output_csv}")
+    return new_final
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the ML training dataset.")
+    parser.add_argument("--raw", default=str(RAW_HISTORY_CSV))
+    parser.add_argument("--output", default=str(TRAINING_CSV))
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only featurize rounds newer than those already in the dataset.",
+    )
+    args = parser.parse_args()
+
+    if args.incremental:
+        update_training_dataset(raw_csv=args.raw, output_csv=args.output)
+    else:
+        build_training_dataset(raw_csv=args.raw, output_csv=args.output)
+
 
-print("Saving training dataset to data/training_ready.csv ...")
-final.to_csv("data/training_ready.csv", index=False)
-print("Done! Shape:", final.shape)
+if __name__ == "__main__":
+    main()
@@ -1,60 +1,248 @@
 # training/train_model.py
 
+import argparse
+import hashlib
 import os
-import joblib
+import tempfile
+import time
+
+import numpy as np
 import pandas as pd
+import xgboost as xgb
 from xgboost import XGBRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error
-import numpy as np
 
-# 1) Load training dataset
-df = pd.read_csv("data/training_ready.csv")
-
-# 2) Feature list must match what we will use at prediction time
-FEATURES = [
-    "minutes",
-    "xG",
-    "xA",
-    "xGI",
-    "ict_index",
-    "team_strength",
-    "was_home",
-    "rolling_form",
-    "rolling_xgi",
-    "position_encoded",
-    "opponent_strength",
-]
-
-target = "total_points"
-
-X = df[FEATURES]
-y = df[target]
-
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42
-)
-
-print("Training XGBoost model...")
-
-model = XGBRegressor(
-    n_estimators=400,
-    learning_rate=0.04,
-    max_depth=5,
-    subsample=0.9,
-    colsample_bytree=0.9,
-    random_state=42,
-)
-
-model.fit(X_train, y_train)
-
-# 3) Compute MSE then take sqrt manually → RMSE
-mse = mean_squared_error(y_test, model.predict(X_test))
-rmse = np.sqrt(mse)
-
-print("Validation RMSE:", rmse)
-
-# 4) Save model
-os.makedirs("models", exist_ok=True)
-joblib.dump(model, "models/xgb_fpl_model.pkl")
-print("Model saved → models/xgb_fpl_model.pkl")
+from data.storage import iter_training_batches, load_training_dataset
+from services.model_registry import DEFAULT_MODEL, MODELS_DIR, save_model
+from utils.feature_engineering import FEATURES, TARGET
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Same hyperparameters for both training paths
+PARAMS = {
+    "n_estimators": 400,
+    "learning_rate": 0.04,
+    "max_depth": 5,
+    "subsample": 0.9,
+    "colsample_bytree": 0.9,
+    "random_state": 42,
+}
+
+# Columns used to assign rows to train/validation deterministically
+SPLIT_KEYS = ["season", "player_id", "round"]
+
+
+def peak_memory_mb():
+    """Peak resident set size of this process in MB (None if unknown)."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _season_filters(seasons):
+    return [("season", "in", list(seasons))] if seasons else None
+
+
+def training_data_hash(seasons=None, batch_size=65536):
+    """Content hash of the selected training rows (recorded in the manifest)."""
+    digest = hashlib.sha256()
+    for batch in iter_training_batches(
+        columns=FEATURES + [TARGET], filters=_season_filters(seasons), batch_size=batch_size
+    ):
+        digest.update(pd.util.hash_pandas_object(batch, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def validation_mask(batch, offset, valid_fraction):
+    """
+    Deterministic train/validation assignment that does not depend on
+    batch size: hashes (season, player_id, round) when present, else the
+    global row position.
+    """
+    if set(SPLIT_KEYS).issubset(batch.columns):
+        h = pd.util.hash_pandas_object(batch[SPLIT_KEYS], index=False).to_numpy()
+    else:
+        positions = pd.Series(np.arange(offset, offset + len(batch)))
+        h = pd.util.hash_pandas_object(positions, index=False).to_numpy()
+    return (h % 1000) < int(valid_fraction * 1000)
+
+
+def iter_split_batches(part, seasons=None, batch_size=65536, valid_fraction=0.2):
+    """Yields (X, y) float32 arrays for the 'train' or 'valid' part."""
+    offset = 0
+    columns = FEATURES + [TARGET] + SPLIT_KEYS
+    for batch in iter_training_batches(
+        columns=columns, filters=_season_filters(seasons), batch_size=batch_size
+    ):
+        mask = validation_mask(batch, offset, valid_fraction)
+        offset += len(batch)
+
+        rows = batch[mask] if part == "valid" else batch[~mask]
+        if len(rows):
+            yield rows[FEATURES].to_numpy(np.float32), rows[TARGET].to_numpy(np.float32)
+
+
+class TrainingBatchIter(xgb.DataIter):
+    """
+    Streams training batches into XGBoost's external-memory DMatrix, so
+    only one batch is materialized in pandas at a time.
+    """
+
+    def __init__(self, cache_prefix, **split_kwargs):
+        self._split_kwargs = split_kwargs
+        self._batches = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self._batches is None:
+            self._batches = iter_split_batches("train", **self._split_kwargs)
+
+        for X, y in self._batches:
+            input_data(data=X, label=y)
+            return True
+        return False
+
+    def reset(self):
+        self._batches = None
+
+
+def streaming_rmse(booster, **split_kwargs):
+    """Validation RMSE computed batch by batch."""
+    sq_err, n = 0.0, 0
+    for X, y in iter_split_batches("valid", **split_kwargs):
+        pred = booster.inplace_predict(X)
+        sq_err += float(np.sum((pred - y) ** 2))
+        n += len(y)
+    return float(np.sqrt(sq_err / n)) if n else float("nan")
+
+
+def train_in_memory(seasons=None, n_jobs=-1, tree_method="hist"):
+    """Original path: load everything into pandas, random 80/20 split."""
+    df = load_training_dataset(
+        columns=FEATURES + [TARGET], filters=_season_filters(seasons)
+    )
+
+    X = df[FEATURES]
+    y = df[TARGET]
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42
+    )
+
+    model = XGBRegressor(**PARAMS, n_jobs=n_jobs, tree_method=tree_method)
+    model.fit(X_train, y_train)
+
+    # Compute MSE then take sqrt manually → RMSE
+    mse = mean_squared_error(y_test, model.predict(X_test))
+    return model, float(np.sqrt(mse)), len(X_train)
+
+
+def train_external_memory(seasons=None, n_jobs=-1, tree_method="hist",
+                          batch_size=65536, valid_fraction=0.2):
+    """
+    Streams every selected season through a DataIter-backed DMatrix.
+    Memory is bounded by the batch size plus XGBoost's paged cache.
+    """
+    split_kwargs = {
+        "seasons": seasons,
+        "batch_size": batch_size,
+        "valid_fraction": valid_fraction,
+    }
+
+    params = {
+        "objective": "reg:squarederror",
+        "eta": PARAMS["learning_rate"],
+        "max_depth": PARAMS["max_depth"],
+        "subsample": PARAMS["subsample"],
+        "colsample_bytree": PARAMS["colsample_bytree"],
+        "seed": PARAMS["random_state"],
+        "tree_method": tree_method,
+        "nthread": os.cpu_count() if n_jobs in (None, -1) else n_jobs,
+    }
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        it = TrainingBatchIter(os.path.join(cache_dir, "cache"), **split_kwargs)
+
+        # Quantile DMatrix builds the hist cuts while streaming (xgboost >= 3)
+        if tree_method == "hist" and hasattr(xgb, "ExtMemQuantileDMatrix"):
+            dtrain = xgb.ExtMemQuantileDMatrix(it, nthread=params["nthread"])
+        else:
+            dtrain = xgb.DMatrix(it, nthread=params["nthread"])
+        dtrain.feature_names = FEATURES
+
+        booster = xgb.train(params, dtrain, num_boost_round=PARAMS["n_estimators"])
+        n_train = dtrain.num_row()
+
+        # The DMatrix pages live in cache_dir: release them before it is removed
+        del dtrain, it
+
+    rmse = streaming_rmse(booster, **split_kwargs)
+
+    # Wrap in the sklearn estimator the app loads
+    model = XGBRegressor()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "model.json")
+        booster.save_model(path)
+        model.load_model(path)
+
+    return model, rmse, n_train
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the FPL points model.")
+    parser.add_argument("--seasons", nargs="*", help="Seasons to train on (default: all).")
+    parser.add_argument("--external-memory", action="store_true",
+                        help="Stream batches through an external-memory DMatrix.")
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--tree-method", default="hist", choices=["hist", "approx", "exact"])
+    parser.add_argument("--batch-size", type=int, default=65536)
+    parser.add_argument("--name", default=DEFAULT_MODEL)
+    parser.add_argument("--models-dir", default=str(MODELS_DIR))
+    args = parser.parse_args()
+
+    print("Training XGBoost model...")
+    start = time.perf_counter()
+
+    if args.external_memory:
+        model, rmse, n_train = train_external_memory(
+            args.seasons, args.n_jobs, args.tree_method, args.batch_size
+        )
+    else:
+        model, rmse, n_train = train_in_memory(args.seasons, args.n_jobs, args.tree_method)
+
+    wall = time.perf_counter() - start
+    peak = peak_memory_mb()
+
+    print("Training rows:", n_train)
+    print("Validation RMSE:", rmse)
+    print(f"Wall time: {wall:.2f}s")
+    if peak is not None:
+        print(f"Peak memory: {peak:.1f} MB")
+
+    # Save model (native UBJ + manifest)
+    manifest = save_model(
+        model,
+        name=args.name,
+        models_dir=args.models_dir,
+        data_hash=training_data_hash(args.seasons, args.batch_size),
+        metrics={
+            "rmse": rmse,
+            "train_rows": n_train,
+            "wall_time_s": round(wall, 3),
+            "peak_memory_mb": peak,
+        },
+        extra={
+            "seasons": args.seasons or "all",
+            "external_memory": args.external_memory,
+            "tree_method": args.tree_method,
+        },
+    )
+    print(f"Model saved → {args.models_dir}/{args.name}.ubj (version {manifest['version']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
 import streamlit as st
 import pandas as pd
 
+from services.squad_simulation import simulate_squad
+
 PITCH_COLOR = "#0B6623"   # Dark green
 
+# Fixed seed when no snapshot simulation is passed, so reruns agree
+SQUAD_SEED = 0
+
 def display_player(player):
     """Render a single player headshot + name box."""
     photo_url = (
@@ -22,11 +27,26 @@ def display_player(player):
     )
 
 
-def display_best_xi_pitch(best_xi: pd.DataFrame):
-    """Full visual pitch layout for Best XI."""
+def display_best_xi_pitch(best_xi: pd.DataFrame, squad=None):
+    """
+    Full visual pitch layout for Best XI. `squad` is its simulate_squad
+    result (stored in the gameweek snapshot); simulated here if missing.
+    """
     st.markdown("##  Next Week Best XI Pitch ")
     st.markdown("Visual lineup based on predicted score")
 
+    # Total XI points with shared team/fixture factors (captain doubled)
+    if squad is None:
+        squad = simulate_squad(best_xi, n_sims=5000, seed=SQUAD_SEED)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Floor (P10)", f"{squad['p10']:.1f}")
+    col2.metric("Expected XI Points", f"{squad['expected_total']:.1f}")
+    col3.metric("Ceiling (P90)", f"{squad['p90']:.1f}")
+    st.caption(
+        f"Squad volatility: ±{squad['std_total']:.1f} pts "
+        f"(±{squad['independent_std_total']:.1f} if players were independent)"
+    )
+
     # Pitch container
     st.markdown(
         f"""
@@ -91,8 +91,8 @@ def show_player_modal(player):
     # -------------------------------
     # Chart 1: Recent Match Points
     # -------------------------------
-    if isinstance(player.get("recent_matches"), list) and len(player["recent_matches"]) > 0:
-        points = [m.get("total_points", 0) for m in player["recent_matches"]]
+    if isinstance(player.get("recent_matches_values"), list) and len(player["recent_matches_values"]) > 0:
+        points = player["recent_matches_values"]
 
         fig1 = go.Figure()
         fig1.add_trace(go.Scatter(
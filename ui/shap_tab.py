@@ -2,7 +2,7 @@
 
 import streamlit as st
 import numpy as np
-from services.shap_explainer import get_shap_values
+from services.shap_explainer import get_contributions, get_shap_values
 
 FEATURE_EXPLANATIONS = {
     "minutes": "Minutes played recently. Higher minutes increase opportunity for FPL points.",
@@ -20,9 +20,14 @@ FEATURE_EXPLANATIONS = {
 
 
 
-def display_shap_tab(df):
+def display_shap_tab(df, gameweek=None, contributions=None):
     st.header("Model Explainability")
 
+    # Whole-table SHAP values, prewarmed in the snapshot or
+    # computed once per model version + gameweek
+    if contributions is None:
+        contributions = get_contributions(df, gameweek)
+
     selected_player = st.selectbox(
         "Select a player to explain",
         df["web_name"].tolist(),
@@ -31,7 +36,7 @@ def display_shap_tab(df):
 
     player_row = df[df["web_name"] == selected_player].iloc[0]
 
-    result = get_shap_values(player_row)
+    result = get_shap_values(player_row, contributions)
 
     if result is None:
         st.warning(
@@ -52,6 +57,7 @@ def display_shap_tab(df):
         rows.append({
             "Feature": feature,
             "Impact (%)": round(abs(value) / total * 100, 1),
+            "Contribution (pts)": round(value, 2),
             "Direction": "↑" if value > 0 else "↓"
         })
 
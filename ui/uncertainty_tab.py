@@ -40,7 +40,7 @@ def interpret_variance(player_row, p10, p90):
 
     return "Variance profile unavailable."
 
-def display_uncertainty_tab(df):
+def display_uncertainty_tab(df, sim_table=None):
     st.subheader("Prediction Uncertainty")
 
     selected_player = st.selectbox(
@@ -51,7 +51,10 @@ def display_uncertainty_tab(df):
 
     player_row = df[df["web_name"] == selected_player].iloc[0]
 
-    results = predict_with_uncertainty(player_row)
+    if sim_table is not None and player_row["id"] in sim_table.index:
+        results = sim_table.loc[player_row["id"], ["p10", "p50", "p90"]].to_dict()
+    else:
+        results = predict_with_uncertainty(player_row)
 
     st.markdown("### Predicted Points Distribution")
 
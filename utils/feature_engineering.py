@@ -0,0 +1,119 @@
+# utils/feature_engineering.py
+
+import numpy as np
+
+# Model feature order; must match between training and prediction
+FEATURES = [
+    "minutes",
+    "xG",
+    "xA",
+    "xGI",
+    "ict_index",
+    "team_strength",
+    "was_home",
+    "rolling_form",
+    "rolling_xgi",
+    "position_encoded",
+    "opponent_strength",
+]
+
+TARGET = "total_points"
+
+# Rolling windows (in matches) shared by training and live prediction
+FORM_WINDOW = 5
+XGI_WINDOW = 3
+
+# feature name -> (history column, window) for training rows
+ROLLING_FEATURES = {
+    "rolling_form": ("total_points", FORM_WINDOW),
+    "rolling_xgi": ("xGI", XGI_WINDOW),
+}
+
+
+def segment_offsets(keys):
+    """
+    Offsets of the runs of equal values in a sorted key array:
+    segment i is keys[offsets[i]:offsets[i + 1]].
+    A 2-D array (one column per key) splits wherever any key changes.
+    """
+    keys = np.asarray(keys)
+    if len(keys) == 0:
+        return np.zeros(1, dtype=np.int64)
+    changed = keys[1:] != keys[:-1]
+    if changed.ndim > 1:
+        changed = changed.any(axis=1)
+    starts = np.flatnonzero(changed) + 1
+    return np.concatenate(([0], starts, [len(keys)])).astype(np.int64)
+
+
+def prefix_sums(values):
+    """Cumulative sums of values and of valid (non-NaN) counts, zero-prefixed."""
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+
+    sums = np.zeros(len(values) + 1, dtype=np.float64)
+    counts = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(np.where(valid, values, 0.0), out=sums[1:])
+    np.cumsum(valid, out=counts[1:])
+    return sums, counts
+
+
+def _window_mean(sums, counts, start, end, min_periods):
+    n = counts[end] - counts[start]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = (sums[end] - sums[start]) / n
+    means[n < max(min_periods, 1)] = np.nan
+    return means
+
+
+def segment_rolling_mean(values, offsets, window, min_periods=1, prefix=None):
+    """
+    Trailing rolling mean of every element within its segment, like
+    groupby(...).rolling(window, min_periods).mean() on sorted data.
+    NaNs are skipped; windows with fewer than `min_periods` valid values
+    are NaN. `prefix` lets callers reuse prefix_sums across windows.
+    """
+    sums, counts = prefix if prefix is not None else prefix_sums(values)
+    offsets = np.asarray(offsets, dtype=np.int64)
+
+    end = np.arange(1, len(sums), dtype=np.int64)
+    seg_start = np.repeat(offsets[:-1], np.diff(offsets))
+    start = np.maximum(seg_start, end - window)
+    return _window_mean(sums, counts, start, end, min_periods)
+
+
+def segment_tail_mean(values, offsets, window, prefix=None):
+    """
+    Mean of the last `window` values of every segment.
+    Empty segments get NaN.
+    """
+    sums, counts = prefix if prefix is not None else prefix_sums(values)
+    offsets = np.asarray(offsets, dtype=np.int64)
+
+    end = offsets[1:]
+    start = np.maximum(offsets[:-1], end - window)
+    return _window_mean(sums, counts, start, end, 1)
+
+
+def add_rolling_features(df, features=ROLLING_FEATURES, group="player_id",
+                         order="round", min_periods=1, season="season"):
+    """
+    Returns `df` sorted by (group, order) with one trailing rolling-mean
+    column per entry of `features` ({name: (column, window)}).
+    min_periods=None requires a full window, like pandas' default.
+    If `df` has a `season` column, windows restart every season: FPL
+    reuses player ids, so the same id is a different player history.
+    """
+    keys = [group]
+    if season is not None and season in df.columns:
+        keys = [season, group]
+
+    df = df.sort_values(keys + [order], kind="stable")
+    offsets = segment_offsets(df[keys].to_numpy())
+
+    for name, (column, window) in features.items():
+        values = df[column].to_numpy(dtype=np.float64)
+        periods = window if min_periods is None else min_periods
+        df[name] = segment_rolling_mean(values, offsets, window, periods)
+
+    return df
@@ -0,0 +1,8 @@
+# utils/log.py
+
+from datetime import datetime
+
+
+def log(message):
+    """Prints `message` with a timestamp, flushed (for long-running jobs)."""
+    print(f"[{datetime.now().isoformat(timespec='seconds')}] {message}", flush=True)